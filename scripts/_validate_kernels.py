@@ -0,0 +1,43 @@
+"""
+_validate_kernels.py
+Numba-compiled kernels for pdf_validate_boxes.py.
+
+Importing this module requires numba. pdf_validate_boxes only imports it for
+large forms and uses its NumPy or pure-Python indexes otherwise.
+"""
+
+import numba
+import numpy as np
+
+
+@numba.njit(cache=True)
+def find_intersections(rects, page_order, page_end, position, limit):
+    """Return the first `limit` intersecting same-page pairs, in (i, j) order.
+
+    Args:
+        rects: (N, 4) float64 array of [left, top, right, bottom].
+        page_order: Rect indexes sorted by page, ascending within a page.
+        page_end: For each rect, the end of its page's run in page_order.
+        position: For each rect, its own position in page_order.
+        limit: Maximum number of pairs to return.
+
+    Returns:
+        (K, 2) int64 array of index pairs i < j, K <= limit.
+    """
+    n = rects.shape[0]
+    out = np.empty((limit, 2), dtype=np.int64)
+    k = 0
+    for i in range(n):
+        for p in range(position[i] + 1, page_end[i]):
+            j = page_order[p]
+            # Same test as rects_intersect
+            if rects[i, 0] >= rects[j, 2] or rects[i, 2] <= rects[j, 0]:
+                continue
+            if rects[i, 1] >= rects[j, 3] or rects[i, 3] <= rects[j, 1]:
+                continue
+            out[k, 0] = i
+            out[k, 1] = j
+            k += 1
+            if k == limit:
+                return out
+    return out[:k]
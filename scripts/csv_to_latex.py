@@ -18,8 +18,15 @@ Examples:
 """
 
 import argparse
+import io
+import os
+import re
 import subprocess
 import sys
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache, partial
+from itertools import cycle, islice, repeat
 from pathlib import Path
 
 
@@ -27,9 +34,16 @@ def _ensure_package(pip_name, import_name=None):
     """Try importing a package; auto-install via pip if missing."""
     if import_name is None:
         import_name = pip_name
+    if import_name in sys.modules:
+        return
     try:
         __import__(import_name)
     except ImportError:
+        if os.environ.get("LATEX_SKILL_AUTOINSTALL") == "0":
+            print(f"Error: Package '{import_name}' not found and auto-install is disabled "
+                  f"(LATEX_SKILL_AUTOINSTALL=0)", file=sys.stderr)
+            print(f"Please install manually: pip install {pip_name}", file=sys.stderr)
+            sys.exit(1)
         print(f":: Package '{import_name}' not found. Installing {pip_name}...", file=sys.stderr)
         try:
             subprocess.check_call(
@@ -52,202 +66,221 @@ def _ensure_package(pip_name, import_name=None):
 
 _ensure_package("pandas")
 
+import numpy as np
 import pandas as pd
 
-def escape_latex(text):
-    """Escape special LaTeX characters in text."""
-    if pd.isna(text):
-        return ""
-
-    text = str(text)
-
-    # Escape special characters
-    replacements = {
-        '\\': r'\textbackslash{}',
-        '&': r'\&',
-        '%': r'\%',
-        '$': r'\$',
-        '#': r'\#',
-        '_': r'\_',
-        '{': r'\{',
-        '}': r'\}',
-        '~': r'\textasciitilde{}',
-        '^': r'\textasciicircum{}',
-    }
-
-    for char, replacement in replacements.items():
-        text = text.replace(char, replacement)
-
-    return text
-
-def detect_alignment(df):
-    """Auto-detect column alignment based on data types."""
-    alignment = ""
-    for col in df.columns:
-        dtype = df[col].dtype
-        if pd.api.types.is_numeric_dtype(dtype):
-            alignment += "r"  # Right-align numbers
-        else:
-            alignment += "l"  # Left-align text
-    return alignment
-
-def generate_booktabs_table(df, caption, label, align, highlight_header, alternating_rows):
-    """Generate a table using booktabs package (professional style)."""
-    lines = []
-
-    # Table environment
-    lines.append(r"\begin{table}[htbp]")
-    lines.append(r"    \centering")
-
-    if caption:
-        lines.append(f"    \\caption{{{escape_latex(caption)}}}")
-    if label:
-        lines.append(f"    \\label{{{label}}}")
-
-    # Tabular environment
-    lines.append(f"    \\begin{{tabular}}{{{align}}}")
-    lines.append(r"        \toprule")
-
-    # Header row
-    headers = [escape_latex(col) for col in df.columns]
-    if highlight_header:
-        headers = [f"\\textbf{{{h}}}" for h in headers]
-    lines.append("        " + " & ".join(headers) + r" \\")
-    lines.append(r"        \midrule")
-
-    # Data rows
-    for idx, row in df.iterrows():
-        escaped_row = [escape_latex(val) for val in row]
-        row_str = " & ".join(escaped_row) + r" \\"
-
-        if alternating_rows and idx % 2 == 1:
-            lines.append(f"        \\rowcolor{{gray!10}} {row_str}")
-        else:
-            lines.append(f"        {row_str}")
-
-    lines.append(r"        \bottomrule")
-    lines.append(r"    \end{tabular}")
-    lines.append(r"\end{table}")
-
-    return "\n".join(lines)
-
-def generate_grid_table(df, caption, label, align, highlight_header, alternating_rows):
-    """Generate a table with full grid lines."""
-    lines = []
-
-    # Table environment
-    lines.append(r"\begin{table}[htbp]")
-    lines.append(r"    \centering")
-
-    if caption:
-        lines.append(f"    \\caption{{{escape_latex(caption)}}}")
-    if label:
-        lines.append(f"    \\label{{{label}}}")
-
-    # Tabular environment with vertical lines
-    align_with_lines = "|" + "|".join(list(align)) + "|"
-    lines.append(f"    \\begin{{tabular}}{{{align_with_lines}}}")
-    lines.append(r"        \hline")
+# LaTeX special characters and their escaped forms
+LATEX_REPLACEMENTS = {
+    '\\': r'\textbackslash{}',
+    '&': r'\&',
+    '%': r'\%',
+    '$': r'\$',
+    '#': r'\#',
+    '_': r'\_',
+    '{': r'\{',
+    '}': r'\}',
+    '~': r'\textasciitilde{}',
+    '^': r'\textasciicircum{}',
+}
 
-    # Header row
-    headers = [escape_latex(col) for col in df.columns]
-    if highlight_header:
-        headers = [f"\\textbf{{{h}}}" for h in headers]
-    lines.append("        " + " & ".join(headers) + r" \\")
-    lines.append(r"        \hline")
+# Matches any single special character, so text is escaped in one pass and
+# the braces of \textbackslash{} are never re-escaped
+LATEX_SPECIAL_RE = re.compile(r'[\\&%$#_{}~^]')
 
-    # Data rows
-    for idx, row in df.iterrows():
-        escaped_row = [escape_latex(val) for val in row]
-        row_str = " & ".join(escaped_row) + r" \\"
+def _replace_special(match):
+    return LATEX_REPLACEMENTS[match.group()]
 
-        if alternating_rows and idx % 2 == 1:
-            lines.append(f"        \\rowcolor{{gray!10}} {row_str}")
-        else:
-            lines.append(f"        {row_str}")
-        lines.append(r"        \hline")
+@lru_cache(maxsize=65536)
+def _escape_str(text):
+    """Escape a str; cached because table cells repeat heavily."""
+    # Most cells (numbers, dates, plain words) need no escaping at all
+    if not LATEX_SPECIAL_RE.search(text):
+        return text
+    return LATEX_SPECIAL_RE.sub(_replace_special, text)
 
-    lines.append(r"    \end{tabular}")
-    lines.append(r"\end{table}")
+def escape_latex(text):
+    """Escape special LaTeX characters in text."""
+    if not isinstance(text, str):
+        if pd.isna(text):
+            return ""
+        text = str(text)
+
+    return _escape_str(text)
+
+def escape_latex_series(series):
+    """Escape special LaTeX characters across a whole column at once.
+
+    Vectorized counterpart of escape_latex(): missing values become empty
+    strings and each distinct value is escaped only once, so categorical
+    columns cost as many escapes as they have categories.
+    """
+    series = series.astype('string').fillna('')
+    codes, uniques = pd.factorize(series)
+    escaped = np.array([_escape_str(value) for value in uniques], dtype=object)
+    return pd.Series(escaped[codes], index=series.index)
+
+def escape_latex_frame(df):
+    """Return a copy of df with every cell escaped for LaTeX."""
+    return pd.concat(
+        [escape_latex_series(df.iloc[:, i]) for i in range(df.shape[1])],
+        axis=1,
+    )
 
-    return "\n".join(lines)
+# Tables with more data rows than this are escaped and formatted in parallel
+PARALLEL_ROW_THRESHOLD = 50_000
+
+def _format_rows(escaped, alternating_rows, row_sep=None, start=0):
+    """Format the cells of an already-escaped DataFrame as tabular rows.
+
+    Rows are joined straight from a 2-D object array, avoiding the per-row
+    Series construction of iterrows(). If row_sep is given it is emitted
+    after every row (e.g. \\hline for grid tables). start is the index of
+    the first row within the whole table, which keeps the alternating row
+    colours in step when a table is formatted in chunks.
+    """
+    if alternating_rows:
+        prefixes = cycle(("        ", "        \\rowcolor{gray!10} "))
+        prefixes = islice(prefixes, start % 2, None)
+    else:
+        prefixes = repeat("        ")
 
-def generate_simple_table(df, caption, label, align, highlight_header, alternating_rows):
-    """Generate a simple table with minimal lines."""
     lines = []
+    for prefix, cells in zip(prefixes, escaped.to_numpy(dtype=object).tolist()):
+        lines.append(prefix + " & ".join(cells) + r" \\")
+        if row_sep:
+            lines.append(row_sep)
+    return lines
+
+def _format_chunk(df, alternating_rows, row_sep, start):
+    """Escape and format one contiguous slice of the table as a text block."""
+    return "\n".join(_format_rows(escape_latex_frame(df), alternating_rows, row_sep, start))
+
+def iter_body(df, alternating_rows, row_sep=None):
+    """Yield the escaped and formatted data rows of df as text blocks.
+
+    Blocks are meant to be written separated by newlines. Large tables are
+    split into one contiguous chunk per CPU and formatted in worker
+    processes, each chunk arriving as one block in table order; smaller
+    ones are not worth the process start-up and yield one block per row.
+    """
+    workers = os.cpu_count() or 1
+    if len(df) <= PARALLEL_ROW_THRESHOLD or workers == 1:
+        yield from _format_rows(escape_latex_frame(df), alternating_rows, row_sep)
+        return
+
+    bounds = np.linspace(0, len(df), workers + 1, dtype=int)
+    starts = bounds[:-1].tolist()
+    chunks = [df.iloc[lo:hi] for lo, hi in zip(starts, bounds[1:].tolist())]
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        yield from executor.map(
+            _format_chunk, chunks, repeat(alternating_rows), repeat(row_sep), starts
+        )
 
-    # Table environment
-    lines.append(r"\begin{table}[htbp]")
-    lines.append(r"    \centering")
-
-    if caption:
-        lines.append(f"    \\caption{{{escape_latex(caption)}}}")
-    if label:
-        lines.append(f"    \\label{{{label}}}")
-
-    # Tabular environment
-    lines.append(f"    \\begin{{tabular}}{{{align}}}")
-    lines.append(r"        \hline")
-
-    # Header row
-    headers = [escape_latex(col) for col in df.columns]
-    if highlight_header:
-        headers = [f"\\textbf{{{h}}}" for h in headers]
-    lines.append("        " + " & ".join(headers) + r" \\")
-    lines.append(r"        \hline")
-
-    # Data rows
-    for idx, row in df.iterrows():
-        escaped_row = [escape_latex(val) for val in row]
-        row_str = " & ".join(escaped_row) + r" \\"
-
-        if alternating_rows and idx % 2 == 1:
-            lines.append(f"        \\rowcolor{{gray!10}} {row_str}")
-        else:
-            lines.append(f"        {row_str}")
-
-    lines.append(r"        \hline")
-    lines.append(r"    \end{tabular}")
-    lines.append(r"\end{table}")
+def format_body(df, alternating_rows, row_sep=None):
+    """Escape and format all data rows of df as a single text block."""
+    return "\n".join(iter_body(df, alternating_rows, row_sep))
 
-    return "\n".join(lines)
+def detect_alignment(df):
+    """Auto-detect column alignment based on data types.
+
+    Numeric columns are right-aligned, everything else left-aligned.
+    """
+    # Wide tables repeat a handful of dtypes, so classify each distinct one once
+    dtypes = df.dtypes.tolist()
+    is_numeric = {dtype: pd.api.types.is_numeric_dtype(dtype) for dtype in set(dtypes)}
+    return "".join("r" if is_numeric[dtype] else "l" for dtype in dtypes)
+
+# Pre-indented rule lines shared by the table styles
+TOPRULE = r"        \toprule"
+MIDRULE = r"        \midrule"
+BOTTOMRULE = r"        \bottomrule"
+HLINE = r"        \hline"
+
+# Rules and decorations that distinguish the table styles. Rule entries are
+# emitted on their own line; None means the style omits that rule.
+STYLE_SPECS = {
+    'booktabs': {
+        'top_rule': TOPRULE,
+        'mid_rule': MIDRULE,
+        'row_rule': None,
+        'bottom_rule': BOTTOMRULE,
+        'header_end': r" \\",
+        'vertical_lines': False,
+    },
+    'grid': {
+        'top_rule': HLINE,
+        'mid_rule': HLINE,
+        'row_rule': HLINE,
+        'bottom_rule': None,
+        'header_end': r" \\",
+        'vertical_lines': True,
+    },
+    'simple': {
+        'top_rule': HLINE,
+        'mid_rule': HLINE,
+        'row_rule': None,
+        'bottom_rule': HLINE,
+        'header_end': r" \\",
+        'vertical_lines': False,
+    },
+    'plain': {
+        'top_rule': None,
+        'mid_rule': None,
+        'row_rule': None,
+        'bottom_rule': None,
+        'header_end': r" \\[0.5ex]",
+        'vertical_lines': False,
+    },
+}
 
-def generate_plain_table(df, caption, label, align, highlight_header, alternating_rows):
-    """Generate a plain table with no lines."""
-    lines = []
+def write_table(buf, df, caption, label, align, highlight_header, alternating_rows, spec):
+    """Write a LaTeX table in the style described by spec to a text stream.
 
+    Data rows are written as they are formatted, so the table is never
+    held in memory as a single string.
+    """
     # Table environment
-    lines.append(r"\begin{table}[htbp]")
-    lines.append(r"    \centering")
+    buf.write("\\begin{table}[htbp]\n    \\centering\n")
 
     if caption:
-        lines.append(f"    \\caption{{{escape_latex(caption)}}}")
+        buf.write(f"    \\caption{{{escape_latex(caption)}}}\n")
     if label:
-        lines.append(f"    \\label{{{label}}}")
+        buf.write(f"    \\label{{{label}}}\n")
 
-    # Tabular environment
-    lines.append(f"    \\begin{{tabular}}{{{align}}}")
+    # Tabular environment, optionally with vertical lines
+    if spec['vertical_lines']:
+        align = "|" + "|".join(align) + "|"
+    buf.write(f"    \\begin{{tabular}}{{{align}}}\n")
+    if spec['top_rule']:
+        buf.write(spec['top_rule'] + "\n")
 
     # Header row
-    headers = [escape_latex(col) for col in df.columns]
+    headers = escape_latex_series(pd.Series(df.columns)).tolist()
     if highlight_header:
         headers = [f"\\textbf{{{h}}}" for h in headers]
-    lines.append("        " + " & ".join(headers) + r" \\[0.5ex]")
-
-    # Data rows
-    for idx, row in df.iterrows():
-        escaped_row = [escape_latex(val) for val in row]
-        row_str = " & ".join(escaped_row) + r" \\"
-
-        if alternating_rows and idx % 2 == 1:
-            lines.append(f"        \\rowcolor{{gray!10}} {row_str}")
-        else:
-            lines.append(f"        {row_str}")
-
-    lines.append(r"    \end{tabular}")
-    lines.append(r"\end{table}")
-
-    return "\n".join(lines)
+    buf.write("        " + " & ".join(headers) + spec['header_end'] + "\n")
+    if spec['mid_rule']:
+        buf.write(spec['mid_rule'] + "\n")
+
+    # Data rows, written block by block as iter_body yields them
+    for block in iter_body(df, alternating_rows, row_sep=spec['row_rule']):
+        buf.write(block)
+        buf.write("\n")
+
+    if spec['bottom_rule']:
+        buf.write(spec['bottom_rule'] + "\n")
+    buf.write("    \\end{tabular}\n\\end{table}")
+
+def generate_table(df, caption, label, align, highlight_header, alternating_rows, spec):
+    """Generate a LaTeX table in the style described by spec (see STYLE_SPECS)."""
+    buf = io.StringIO()
+    write_table(buf, df, caption, label, align, highlight_header, alternating_rows, spec)
+    return buf.getvalue()
+
+generate_booktabs_table = partial(generate_table, spec=STYLE_SPECS['booktabs'])
+generate_grid_table = partial(generate_table, spec=STYLE_SPECS['grid'])
+generate_simple_table = partial(generate_table, spec=STYLE_SPECS['simple'])
+generate_plain_table = partial(generate_table, spec=STYLE_SPECS['plain'])
 
 STYLE_GENERATORS = {
     'booktabs': generate_booktabs_table,
@@ -256,7 +289,17 @@ STYLE_GENERATORS = {
     'plain': generate_plain_table,
 }
 
-def parse_args():
+def read_csv_file(csv_file, nrows=None):
+    """Read a CSV file into a DataFrame, stopping after nrows rows if given."""
+    return pd.read_csv(csv_file, nrows=nrows)
+
+def _umask():
+    """Return the process umask (reading it requires setting it)."""
+    umask = os.umask(0)
+    os.umask(umask)
+    return umask
+
+def parse_args(argv=None):
     parser = argparse.ArgumentParser(
         description='Convert CSV files to formatted LaTeX tabular code',
         formatter_class=argparse.RawDescriptionHelpFormatter,
@@ -285,10 +328,10 @@ def parse_args():
     parser.add_argument('--output', type=str, default=None,
                        help='Output file path (default: stdout)')
 
-    return parser.parse_args()
+    return parser.parse_args(argv)
 
-def main():
-    args = parse_args()
+def main(argv=None):
+    args = parse_args(argv)
 
     # Read CSV file
     try:
@@ -297,7 +340,10 @@ def main():
             print(f"Error: CSV file not found: {args.csv_file}", file=sys.stderr)
             sys.exit(1)
 
-        df = pd.read_csv(args.csv_file)
+        # Read one row past --max-rows so truncation can be detected
+        # without parsing the rest of the file
+        nrows = args.max_rows + 1 if args.max_rows else None
+        df = read_csv_file(args.csv_file, nrows=nrows)
 
         if df.empty:
             print("Error: CSV file is empty", file=sys.stderr)
@@ -323,21 +369,6 @@ def main():
     else:
         align = detect_alignment(df)
 
-    # Generate table
-    try:
-        generator = STYLE_GENERATORS[args.style]
-        latex_code = generator(
-            df,
-            args.caption,
-            args.label,
-            align,
-            args.highlight_header,
-            args.alternating_rows
-        )
-    except Exception as e:
-        print(f"Error: Failed to generate LaTeX table: {e}", file=sys.stderr)
-        sys.exit(1)
-
     # Add package requirements comment
     preamble = []
     preamble.append("% Required LaTeX packages:")
@@ -347,20 +378,58 @@ def main():
         preamble.append("% \\usepackage[table]{xcolor}")
     preamble.append("")
 
-    output = "\n".join(preamble) + latex_code
+    def write_output(out):
+        """Stream the preamble and table to out."""
+        out.write("\n".join(preamble))
+        write_table(
+            out,
+            df,
+            args.caption,
+            args.label,
+            align,
+            args.highlight_header,
+            args.alternating_rows,
+            STYLE_SPECS[args.style],
+        )
 
     # Write output
     if args.output:
+        output_path = Path(args.output)
         try:
-            output_path = Path(args.output)
             output_path.parent.mkdir(parents=True, exist_ok=True)
-            output_path.write_text(output)
-            print(f"Successfully created: {args.output}", file=sys.stderr)
-        except Exception as e:
+            # Stream into a temporary file next to the output and move it into
+            # place once the whole table is written, so a failure part way
+            # through never leaves a truncated .tex behind
+            tmp = tempfile.NamedTemporaryFile(
+                'w', dir=output_path.parent, prefix=f'.{output_path.name}.',
+                suffix='.tmp', delete=False, buffering=1 << 20,
+            )
+        except OSError as e:
+            print(f"Error: Failed to write output file: {e}", file=sys.stderr)
+            sys.exit(1)
+        try:
+            with tmp:
+                write_output(tmp)
+            # NamedTemporaryFile is created 0600; give the output the usual mode
+            os.chmod(tmp.name, 0o666 & ~_umask())
+            os.replace(tmp.name, output_path)
+        except OSError as e:
             print(f"Error: Failed to write output file: {e}", file=sys.stderr)
             sys.exit(1)
+        except Exception as e:
+            print(f"Error: Failed to generate LaTeX table: {e}", file=sys.stderr)
+            sys.exit(1)
+        finally:
+            Path(tmp.name).unlink(missing_ok=True)
+        print(f"Successfully created: {args.output}", file=sys.stderr)
     else:
-        print(output)
+        try:
+            write_output(sys.stdout)
+        except Exception as e:
+            print(f"Error: Failed to generate LaTeX table: {e}", file=sys.stderr)
+            sys.exit(1)
+        sys.stdout.write("\n")
+    return 0
 
 if __name__ == '__main__':
-    main()
+    sys.exit(main())
@@ -15,22 +15,33 @@ Examples:
 
     # Pie chart with custom colors
     ./generate_chart.py pie --data '{"labels":["A","B","C"],"values":[30,40,30]}' --colors "#FF6B6B,#4ECDC4,#45B7D1"
+
+    # Render many charts in one process (one JSON job per line on stdin)
+    ./generate_chart.py bar --batch < jobs.jsonl
 """
 
 import argparse
+import csv
+import importlib.util
 import json
+import os
 import subprocess
 import sys
+from itertools import cycle, islice
 from pathlib import Path
 
 
 def _ensure_package(pip_name, import_name=None):
-    """Try importing a package; auto-install via pip if missing."""
+    """Check that a package is importable; auto-install via pip if missing."""
     if import_name is None:
         import_name = pip_name
-    try:
-        __import__(import_name)
-    except ImportError:
+    # Probe with find_spec so an installed package isn't executed just to check
+    if importlib.util.find_spec(import_name) is None:
+        if os.environ.get("LATEX_SKILL_AUTOINSTALL") == "0":
+            print(f"Error: Package '{import_name}' not found and auto-install is disabled "
+                  f"(LATEX_SKILL_AUTOINSTALL=0)", file=sys.stderr)
+            print(f"Please install manually: pip install {pip_name}", file=sys.stderr)
+            sys.exit(1)
         print(f":: Package '{import_name}' not found. Installing {pip_name}...", file=sys.stderr)
         try:
             subprocess.check_call(
@@ -51,27 +62,86 @@ def _ensure_package(pip_name, import_name=None):
                 sys.exit(1)
 
 
-_ensure_package("numpy")
-_ensure_package("pandas")
-_ensure_package("matplotlib")
+# orjson is optional; it parses number-heavy --data and batch jobs several
+# times faster than the json module
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 
-import numpy as np
-import pandas as pd
-import matplotlib
-matplotlib.use('Agg')  # Use non-interactive backend
-import matplotlib.pyplot as plt
+def parse_json(text):
+    """Parse JSON text, with orjson when available.
+
+    orjson rejects NaN and Infinity, which the json module accepts (e.g. as
+    gaps in a line chart), so anything it refuses is re-parsed with json;
+    genuinely invalid input raises json.JSONDecodeError either way.
+    """
+    if orjson is not None:
+        try:
+            return orjson.loads(text)
+        except orjson.JSONDecodeError:
+            pass
+    return json.loads(text)
+
+
+# Heavy plotting libraries. When run as a script they are imported only
+# after argument parsing, so --help and usage errors don't pay for them.
+np = None
+matplotlib = None
+plt = None
+Figure = None
+FigureCanvasAgg = None
+
+
+def _import_plotting():
+    """Import numpy and matplotlib (Agg backend) into the module globals."""
+    global np, matplotlib, plt, Figure, FigureCanvasAgg
+    if plt is not None:
+        return
+    _ensure_package("numpy")
+    _ensure_package("matplotlib")
+
+    import numpy
+    import matplotlib as mpl
+    mpl.use('Agg')  # Use non-interactive backend
+    import matplotlib.pyplot as pyplot
+    from matplotlib.backends.backend_agg import FigureCanvasAgg as canvas_cls
+    from matplotlib.figure import Figure as figure_cls
+    np, matplotlib, plt = numpy, mpl, pyplot
+    Figure, FigureCanvasAgg = figure_cls, canvas_cls
+
+
+# Imported as a library, the plot functions are called directly
+if __name__ != '__main__':
+    _import_plotting()
+
+# Output formats that matplotlib writes as vector graphics
+VECTOR_FORMATS = {'.pdf', '.svg', '.eps', '.ps'}
+
+# Series with more points than this are rasterized, so vector outputs embed
+# a single image for the data instead of one drawing operation per point.
+# Scatter markers are already emitted as one reused PDF object, so they only
+# pay off rasterizing at much higher point counts.
+RASTERIZE_THRESHOLD = 2000
+SCATTER_RASTERIZE_THRESHOLD = 50000
+
+def _is_dense(series, threshold=RASTERIZE_THRESHOLD):
+    """Return True if a data series is large enough to rasterize."""
+    return len(series) > threshold
 
 # Chart type implementations
 def plot_bar(data, ax, **kwargs):
     """Create a bar chart."""
     if 'x' in data and 'y' in data:
-        x = data['x']
-        y = data['y']
+        # Convert once so matplotlib doesn't re-convert the lists per call
+        x = np.asarray(data['x'])
+        y = np.asarray(data['y'])
         legend_labels = kwargs.get('legend_labels', None)
         colors = kwargs.get('colors', None)
 
         # Check if y is multi-series (list of lists)
-        is_multi_series = isinstance(y[0], (list, tuple)) if len(y) > 0 else False
+        is_multi_series = y.ndim == 2
 
         if is_multi_series:
             # Multi-series grouped bar chart
@@ -82,14 +152,15 @@ def plot_bar(data, ax, **kwargs):
             if colors is None:
                 colors = get_colorblind_palette(n_series)
 
-            # Calculate bar positions and width
+            # Calculate bar positions and width; the series are centred
+            # on each group's tick
             bar_width = 0.8 / n_series
             x_positions = np.arange(n_groups)
+            offsets = (np.arange(n_series) - (n_series - 1) / 2) * bar_width
 
             for i, series in enumerate(y):
-                offset = (i - n_series/2 + 0.5) * bar_width
                 label = legend_labels[i] if legend_labels and i < len(legend_labels) else f"Series {i+1}"
-                ax.bar(x_positions + offset, series, bar_width,
+                ax.bar(x_positions + offsets[i], series, bar_width,
                       label=label, color=colors[i % len(colors)])
 
             ax.set_xticks(x_positions)
@@ -103,14 +174,15 @@ def plot_bar(data, ax, **kwargs):
 def plot_line(data, ax, **kwargs):
     """Create a line chart."""
     if 'x' in data and 'y' in data:
-        x = data['x']
-        y = data['y']
+        # Convert once so matplotlib doesn't re-convert the lists per call
+        x = np.asarray(data['x'])
+        y = np.asarray(data['y'])
         legend_labels = kwargs.get('legend_labels', None)
         colors = kwargs.get('colors', None)
         show_grid = kwargs.get('show_grid', False)
 
         # Check if y is multi-series (list of lists)
-        is_multi_series = isinstance(y[0], (list, tuple)) if len(y) > 0 else False
+        is_multi_series = y.ndim == 2
 
         if is_multi_series:
             # Multi-series line chart
@@ -125,10 +197,12 @@ def plot_line(data, ax, **kwargs):
                 label = legend_labels[i] if legend_labels and i < len(legend_labels) else f"Series {i+1}"
                 marker = markers[i % len(markers)]
                 ax.plot(x, series, marker=marker, linewidth=2,
-                       label=label, color=colors[i % len(colors)])
+                       label=label, color=colors[i % len(colors)],
+                       rasterized=_is_dense(series))
         else:
             # Single-series line chart (backward compatible)
-            ax.plot(x, y, marker='o', linewidth=2, color=colors[0] if colors else None)
+            ax.plot(x, y, marker='o', linewidth=2, color=colors[0] if colors else None,
+                   rasterized=_is_dense(y))
 
         if show_grid:
             ax.grid(True, alpha=0.3)
@@ -138,15 +212,16 @@ def plot_line(data, ax, **kwargs):
 def plot_scatter(data, ax, **kwargs):
     """Create a scatter plot."""
     if 'x' in data and 'y' in data:
-        x = data['x']
-        y = data['y']
+        # Convert once so matplotlib doesn't re-convert the lists per call
+        x = np.asarray(data['x'])
+        y = np.asarray(data['y'])
         sizes = data.get('sizes', 50)
         legend_labels = kwargs.get('legend_labels', None)
         colors = kwargs.get('colors', None)
         show_grid = kwargs.get('show_grid', False)
 
         # Check if y is multi-series (list of lists)
-        is_multi_series = isinstance(y[0], (list, tuple)) if len(y) > 0 else False
+        is_multi_series = y.ndim == 2
 
         if is_multi_series:
             # Multi-series scatter plot
@@ -166,10 +241,12 @@ def plot_scatter(data, ax, **kwargs):
                 marker = markers[i % len(markers)]
                 size = sizes[i] if isinstance(sizes, list) and i < len(sizes) else 50
                 ax.scatter(x, series, s=size, alpha=0.6,
-                          label=label, color=colors[i % len(colors)], marker=marker)
+                          label=label, color=colors[i % len(colors)], marker=marker,
+                          rasterized=_is_dense(series, SCATTER_RASTERIZE_THRESHOLD))
         else:
             # Single-series scatter plot (backward compatible)
-            ax.scatter(x, y, s=sizes, alpha=0.6, color=colors[0] if colors else None)
+            ax.scatter(x, y, s=sizes, alpha=0.6, color=colors[0] if colors else None,
+                      rasterized=_is_dense(y, SCATTER_RASTERIZE_THRESHOLD))
 
         if show_grid:
             ax.grid(True, alpha=0.3)
@@ -192,7 +269,7 @@ def plot_heatmap(data, ax, **kwargs):
     if 'matrix' in data:
         matrix = np.array(data['matrix'])
         im = ax.imshow(matrix, cmap='viridis', aspect='auto')
-        plt.colorbar(im, ax=ax)
+        ax.get_figure().colorbar(im, ax=ax)
 
         # Add row/column labels if provided
         if 'xlabels' in data:
@@ -232,14 +309,15 @@ def plot_histogram(data, ax, **kwargs):
 def plot_area(data, ax, **kwargs):
     """Create an area chart."""
     if 'x' in data and 'y' in data:
-        x = data['x']
-        y = data['y']
+        # Convert once so matplotlib doesn't re-convert the lists per call
+        x = np.asarray(data['x'])
+        y = np.asarray(data['y'])
         legend_labels = kwargs.get('legend_labels', None)
         colors = kwargs.get('colors', None)
         show_grid = kwargs.get('show_grid', False)
 
         # Check if y is multi-series (list of lists)
-        is_multi_series = isinstance(y[0], (list, tuple)) if len(y) > 0 else False
+        is_multi_series = y.ndim == 2
 
         if is_multi_series:
             # Multi-series area chart (stacked)
@@ -249,20 +327,25 @@ def plot_area(data, ax, **kwargs):
             if colors is None:
                 colors = get_colorblind_palette(n_series)
 
-            # Convert to numpy array for stacking
-            y_array = np.array(y)
-            y_stack = np.zeros(len(x))
+            labels = [legend_labels[i] if legend_labels and i < len(legend_labels) else f"Series {i+1}"
+                      for i in range(n_series)]
+            series_colors = [colors[i % len(colors)] for i in range(n_series)]
+            rasterized = _is_dense(x)
 
-            for i in range(n_series):
-                label = legend_labels[i] if legend_labels and i < len(legend_labels) else f"Series {i+1}"
-                ax.fill_between(x, y_stack, y_stack + y_array[i],
-                               alpha=0.7, label=label, color=colors[i % len(colors)])
-                ax.plot(x, y_stack + y_array[i], linewidth=2, color=colors[i % len(colors)])
-                y_stack += y_array[i]
+            # stackplot stacks the layers itself and draws one polygon each
+            ax.stackplot(x, y, labels=labels, colors=series_colors, alpha=0.7,
+                         rasterized=rasterized)
+
+            # Outline the top edge of every layer
+            outlines = ax.plot(x, np.cumsum(y, axis=0).T, linewidth=2, rasterized=rasterized)
+            for line, color in zip(outlines, series_colors):
+                line.set_color(color)
         else:
             # Single-series area chart (backward compatible)
-            ax.fill_between(x, y, alpha=0.7, color=colors[0] if colors else None)
-            ax.plot(x, y, linewidth=2)
+            rasterized = _is_dense(y)
+            ax.fill_between(x, y, alpha=0.7, color=colors[0] if colors else None,
+                           rasterized=rasterized)
+            ax.plot(x, y, linewidth=2, rasterized=rasterized)
 
         if show_grid:
             ax.grid(True, alpha=0.3)
@@ -276,21 +359,24 @@ def plot_radar(data, ax, **kwargs):
         values = data['values']
 
         num_vars = len(labels)
-        angles = np.linspace(0, 2 * np.pi, num_vars, endpoint=False).tolist()
-        values = values + [values[0]]  # Complete the circle
-        angles += angles[:1]
-
-        # Use the figure from the passed-in ax (or current figure) to create polar subplot
-        fig = ax.get_figure() if ax is not None else plt.gcf()
-        if ax is not None:
-            ax.remove()  # Remove the non-polar axes created by caller
-        ax = fig.add_subplot(111, projection='polar')
+        angles = np.linspace(0, 2 * np.pi, num_vars, endpoint=False)
+        values = np.asarray(values)
+        # Complete the circle
+        closed_angles = np.concatenate([angles, angles[:1]])
+        closed_values = np.concatenate([values, values[:1]])
+
+        # render_chart passes a polar axes; anything else is swapped for one
+        if ax is None or ax.name != 'polar':
+            fig = ax.get_figure() if ax is not None else plt.gcf()
+            if ax is not None:
+                ax.remove()
+            ax = fig.add_subplot(111, projection='polar')
         color = kwargs.get('colors', [None])[0] if kwargs.get('colors') else None
-        ax.plot(angles, values, 'o-', linewidth=2, color=color)
-        ax.fill(angles, values, alpha=0.25, color=color)
-        ax.set_xticks(angles[:-1])
+        ax.plot(closed_angles, closed_values, 'o-', linewidth=2, color=color)
+        ax.fill(closed_angles, closed_values, alpha=0.25, color=color)
+        ax.set_xticks(angles)
         ax.set_xticklabels(labels)
-        ax.set_ylim(0, max(values) * 1.1)
+        ax.set_ylim(0, values.max() * 1.1)
         ax.grid(True)
         return ax
     else:
@@ -308,7 +394,7 @@ CHART_TYPES = {
     'radar': plot_radar,
 }
 
-def parse_args():
+def parse_args(argv=None):
     parser = argparse.ArgumentParser(
         description='Generate publication-quality charts for LaTeX inclusion',
         formatter_class=argparse.RawDescriptionHelpFormatter,
@@ -323,6 +409,9 @@ def parse_args():
                            help='Chart data as JSON string')
     data_group.add_argument('--csv', type=str,
                            help='Path to CSV file with chart data')
+    data_group.add_argument('--batch', action='store_true',
+                           help='Read one JSON chart job per line from stdin and render them '
+                                'all in this process; job keys override the options above')
 
     parser.add_argument('--output', type=str, default='chart.png',
                        help='Output file path (default: chart.png)')
@@ -338,6 +427,10 @@ def parse_args():
                        help='Figure size as WxH in inches (default: 8x5)')
     parser.add_argument('--dpi', type=int, default=300,
                        help='DPI for output image (default: 300)')
+    parser.add_argument('--png-compress', type=int, default=None, choices=range(10),
+                       metavar='0-9',
+                       help='zlib level for PNG output; 1 saves faster but writes larger '
+                            'files, e.g. for drafts (default: matplotlib\'s level 6)')
     parser.add_argument('--colors', type=str, default=None,
                        help='Comma-separated hex color codes (e.g., #FF6B6B,#4ECDC4)')
     parser.add_argument('--legend', type=str, default=None,
@@ -347,25 +440,91 @@ def parse_args():
     parser.add_argument('--grid', action='store_true',
                        help='Enable grid lines (default: off)')
 
-    return parser.parse_args()
+    return parser.parse_args(argv)
 
 def load_data(args):
     """Load data from JSON string or CSV file."""
     if args.data:
         try:
-            return json.loads(args.data)
+            return parse_json(args.data)
         except json.JSONDecodeError as e:
             print(f"Error: Invalid JSON data: {e}", file=sys.stderr)
             sys.exit(1)
     elif args.csv:
         try:
-            df = pd.read_csv(args.csv)
-            # Convert DataFrame to dict format
-            return {col: df[col].tolist() for col in df.columns}
+            return read_csv_columns(args.csv)
         except Exception as e:
             print(f"Error: Failed to read CSV file: {e}", file=sys.stderr)
             sys.exit(1)
 
+# pandas' default NA tokens (pandas._libs.parsers.STR_NA_VALUES); read as NaN
+CSV_NA_VALUES = frozenset({
+    '', '#N/A', '#N/A N/A', '#NA', '-1.#IND', '-1.#QNAN', '-NaN', '-nan',
+    '1.#IND', '1.#QNAN', '<NA>', 'N/A', 'NA', 'NULL', 'NaN', 'None', 'n/a',
+    'nan', 'null',
+})
+CSV_BOOL_VALUES = {'True': True, 'TRUE': True, 'true': True,
+                   'False': False, 'FALSE': False, 'false': False}
+
+def _auto_cast(value):
+    """Convert a CSV cell to int, float or bool where possible, as pd.read_csv would.
+
+    Empty cells and pandas' default NA tokens become NaN.
+    """
+    if value in CSV_NA_VALUES:
+        return float('nan')
+    if value in CSV_BOOL_VALUES:
+        return CSV_BOOL_VALUES[value]
+    # int() and float() accept digit separators ("1_000"); CSV numbers don't
+    if '_' in value:
+        return value
+    for cast in (int, float):
+        try:
+            return cast(value)
+        except ValueError:
+            pass
+    return value
+
+def _dedupe_header(header):
+    """Rename repeated column names as pandas does: a, a.1, a.2, ...
+
+    A generated name that is already a header is skipped, so a,a,a.1
+    becomes a, a.2, a.1.
+    """
+    names = list(header)
+    counts = {}
+    for i, col in enumerate(names):
+        base = col
+        count = counts.get(col, 0)
+        while count > 0:
+            counts[base] = count + 1
+            col = f"{base}.{count}"
+            count = count + 1 if col in names else counts.get(col, 0)
+        names[i] = col
+        counts[col] = count + 1
+    return names
+
+def read_csv_columns(path):
+    """Read a CSV file into a dict mapping each header to its column values.
+
+    Chart CSVs are small, so the stdlib csv module is used instead of paying
+    for a pandas import and DataFrame construction.
+    """
+    with open(path, newline='', encoding='utf-8-sig') as f:
+        reader = csv.reader(f)
+        header = next(reader, None)
+        if header is None:
+            raise ValueError("CSV file is empty")
+        header = _dedupe_header(header)
+        columns = {col: [] for col in header}
+        for row in reader:
+            if not row:
+                continue
+            row += [''] * (len(header) - len(row))
+            for col, value in zip(header, row):
+                columns[col].append(_auto_cast(value))
+    return columns
+
 def parse_figsize(figsize_str):
     """Parse figsize string like '8x5' into tuple (8, 5)."""
     try:
@@ -387,74 +546,128 @@ def parse_legend(legend_str):
         return None
     return [label.strip() for label in legend_str.split(',')]
 
+# Paul Tol's colorblind-friendly palette
+TOL_BRIGHT = ('#4477AA', '#EE6677', '#228833', '#CCBB44', '#66CCEE', '#AA3377', '#BBBBBB')
+
 def get_colorblind_palette(n_colors):
     """Return a colorblind-friendly palette with n colors using Tol color scheme."""
-    # Paul Tol's colorblind-friendly palette
-    tol_bright = ['#4477AA', '#EE6677', '#228833', '#CCBB44', '#66CCEE', '#AA3377', '#BBBBBB']
-    if n_colors <= len(tol_bright):
-        return tol_bright[:n_colors]
-    # If more colors needed, cycle through the palette
-    return [tol_bright[i % len(tol_bright)] for i in range(n_colors)]
-
-def main():
-    args = parse_args()
-
-    # Load data
-    data = load_data(args)
+    # If more colors are needed than the palette has, cycle through it
+    return list(islice(cycle(TOL_BRIGHT), n_colors))
+
+def render_chart(args, data):
+    """Render one chart from parsed options and data, and save it to args.output."""
+    # Restore rcParams afterwards so a style set for one batch job does not
+    # carry over into the jobs rendered after it
+    with matplotlib.rc_context():
+        # Parse figsize, colors, and legend
+        figsize = parse_figsize(args.figsize)
+        colors = parse_colors(args.colors)
+        legend_labels = parse_legend(args.legend)
+
+        # Set style
+        try:
+            plt.style.use(args.style)
+        except:
+            print(f"Warning: Style '{args.style}' not found, using default", file=sys.stderr)
+
+        # Create figure. Vector output is resolution independent, so only raster
+        # formats get a high-DPI canvas; savefig's dpi still sets the resolution
+        # of any rasterized artists embedded in a vector file. The figure is
+        # attached to an Agg canvas directly, bypassing pyplot's figure manager.
+        is_vector = Path(args.output).suffix.lower() in VECTOR_FORMATS
+        fig = Figure(figsize=figsize, dpi=None if is_vector else args.dpi)
+        FigureCanvasAgg(fig)
+        if args.chart_type == 'radar':
+            ax = fig.add_subplot(111, projection='polar')
+        else:
+            ax = fig.subplots()
 
-    # Parse figsize, colors, and legend
-    figsize = parse_figsize(args.figsize)
-    colors = parse_colors(args.colors)
-    legend_labels = parse_legend(args.legend)
+        # Generate chart
+        try:
+            plot_func = CHART_TYPES[args.chart_type]
+            result_ax = plot_func(data, ax, colors=colors, legend_labels=legend_labels, show_grid=args.grid)
+            if result_ax is not None:
+                ax = result_ax
+        except Exception as e:
+            print(f"Error: Failed to generate chart: {e}", file=sys.stderr)
+            sys.exit(1)
 
-    # Set style
-    try:
-        plt.style.use(args.style)
-    except:
-        print(f"Warning: Style '{args.style}' not found, using default", file=sys.stderr)
+        # Set labels and title
+        if args.title:
+            ax.set_title(args.title, fontsize=14, fontweight='bold')
+        if args.xlabel and ax is not None:
+            ax.set_xlabel(args.xlabel, fontsize=11)
+        if args.ylabel and ax is not None:
+            ax.set_ylabel(args.ylabel, fontsize=11)
+
+        # Add legend if legend_labels were provided or if multi-series data exists
+        if ax is not None and legend_labels is not None:
+            # Handle legend location
+            legend_loc = args.legend_loc
+            if legend_loc == 'outside':
+                ax.legend(bbox_to_anchor=(1.05, 1), loc='upper left', borderaxespad=0.)
+            else:
+                ax.legend(loc=legend_loc)
+
+        # Tight layout for better spacing
+        fig.tight_layout()
+
+        # Save figure
+        try:
+            output_path = Path(args.output)
+            output_path.parent.mkdir(parents=True, exist_ok=True)
+            save_kwargs = {}
+            if args.png_compress is not None and output_path.suffix.lower() == '.png':
+                save_kwargs['pil_kwargs'] = {'compress_level': args.png_compress}
+            fig.savefig(args.output, dpi=args.dpi, bbox_inches='tight', **save_kwargs)
+            print(f"Successfully created: {args.output}", file=sys.stderr)
+        except Exception as e:
+            print(f"Error: Failed to save output: {e}", file=sys.stderr)
+            sys.exit(1)
 
-    # Create figure
-    fig, ax = plt.subplots(figsize=figsize, dpi=args.dpi)
+def run_batch(args):
+    """Render one chart per JSON line on stdin, amortizing startup across charts.
+
+    Each line is an object whose keys override the command-line option of the
+    same name, e.g. {"data": {"x": [1, 2], "y": [3, 4]}, "output": "a.png"}.
+    "chart_type" selects the chart type, and "data" may be given as an object.
+    """
+    for line_no, line in enumerate(sys.stdin, start=1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            job = parse_json(line)
+        except json.JSONDecodeError as e:
+            print(f"Error: Invalid JSON on batch line {line_no}: {e}", file=sys.stderr)
+            sys.exit(1)
 
-    # Generate chart
-    try:
-        plot_func = CHART_TYPES[args.chart_type]
-        result_ax = plot_func(data, ax, colors=colors, legend_labels=legend_labels, show_grid=args.grid)
-        if result_ax is not None:
-            ax = result_ax
-    except Exception as e:
-        print(f"Error: Failed to generate chart: {e}", file=sys.stderr)
-        sys.exit(1)
+        options = {**vars(args), 'data': None, 'csv': None}
+        options.update((key.replace('-', '_'), value) for key, value in job.items())
+        job_args = argparse.Namespace(**options)
+        if job_args.chart_type not in CHART_TYPES:
+            print(f"Error: Unknown chart type on batch line {line_no}: {job_args.chart_type}",
+                  file=sys.stderr)
+            sys.exit(1)
 
-    # Set labels and title
-    if args.title:
-        plt.title(args.title, fontsize=14, fontweight='bold')
-    if args.xlabel and ax is not None:
-        ax.set_xlabel(args.xlabel, fontsize=11)
-    if args.ylabel and ax is not None:
-        ax.set_ylabel(args.ylabel, fontsize=11)
-
-    # Add legend if legend_labels were provided or if multi-series data exists
-    if ax is not None and legend_labels is not None:
-        # Handle legend location
-        legend_loc = args.legend_loc
-        if legend_loc == 'outside':
-            ax.legend(bbox_to_anchor=(1.05, 1), loc='upper left', borderaxespad=0.)
+        if isinstance(job_args.data, (dict, list)):
+            data = job_args.data
         else:
-            ax.legend(loc=legend_loc)
+            data = load_data(job_args)
+        render_chart(job_args, data)
 
-    # Tight layout for better spacing
-    plt.tight_layout()
+def main(argv=None):
+    args = parse_args(argv)
 
-    # Save figure
-    try:
-        output_path = Path(args.output)
-        output_path.parent.mkdir(parents=True, exist_ok=True)
-        plt.savefig(args.output, dpi=args.dpi, bbox_inches='tight')
-        print(f"Successfully created: {args.output}", file=sys.stderr)
-    except Exception as e:
-        print(f"Error: Failed to save output: {e}", file=sys.stderr)
-        sys.exit(1)
+    if args.batch:
+        _import_plotting()
+        run_batch(args)
+    else:
+        # Load the data first so invalid JSON or CSV fails before matplotlib loads
+        data = load_data(args)
+        _import_plotting()
+        render_chart(args, data)
+    return 0
 
 if __name__ == '__main__':
-    main()
+    sys.exit(main())
@@ -35,13 +35,16 @@ Examples:
 Dependencies:
     - Python 3.7+
     - jinja2 (pip install jinja2)
-    - pandas (pip install pandas) -- for CSV reading
     - pdflatex/xelatex/lualatex -- for compilation
-    - pdfunite (from poppler-utils) -- for PDF merging (optional)
+    - pypdf (pip install pypdf) -- for in-process PDF merging (optional)
+    - pdfunite (from poppler-utils) -- for PDF merging without pypdf (optional)
 """
 
 import argparse
+import asyncio
 import csv
+import hashlib
+import importlib.util
 import json
 import os
 import re
@@ -49,21 +52,30 @@ import shutil
 import subprocess
 import sys
 import tempfile
-from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from functools import lru_cache, partial
+from itertools import chain, islice
 from pathlib import Path
 
-# Try importing optional dependencies
+# orjson is optional; it parses JSON and JSON Lines records several times faster
 try:
-    import jinja2
-    HAS_JINJA2 = True
+    import orjson
 except ImportError:
-    HAS_JINJA2 = False
+    orjson = None
 
-try:
-    import pandas as pd
-    HAS_PANDAS = True
-except ImportError:
-    HAS_PANDAS = False
+# jinja2 is optional and only imported, by _import_jinja2(), once a template
+# actually needs it; simple templates, --help and --dry-run never load it
+HAS_JINJA2 = importlib.util.find_spec('jinja2') is not None
+jinja2 = None
+
+
+def _import_jinja2():
+    """Import jinja2 into the module globals and return it."""
+    global jinja2
+    if jinja2 is None:
+        import jinja2 as module
+        jinja2 = module
+    return jinja2
 
 
 # --- LaTeX escaping ---
@@ -80,17 +92,33 @@ LATEX_SPECIAL_CHARS = {
     '^': r'\textasciicircum{}',
 }
 
+# translate() substitutes every character in a single pass, so the braces
+# of \textbackslash{} are never escaped a second time
+_LATEX_TABLE = str.maketrans({'\\': r'\textbackslash{}', **LATEX_SPECIAL_CHARS})
+_LATEX_SPECIAL_RE = re.compile(r'[\\&%$#_{}~^]')
+
+# Values longer than this are escaped without going through the cache
+_ESCAPE_CACHE_MAX_LEN = 256
+
+def _escape_str(s):
+    """Escape special LaTeX characters in a str."""
+    # Most fields contain no specials; return them without copying
+    if not _LATEX_SPECIAL_RE.search(s):
+        return s
+    return s.translate(_LATEX_TABLE)
+
+# Merge data repeats values across records (company, city, course title),
+# so short values are memoized
+_escape_str_cached = lru_cache(maxsize=8192)(_escape_str)
+
 def escape_latex(value):
     """Escape special LaTeX characters in a string value."""
     if value is None:
         return ''
     s = str(value)
-    # First escape backslashes (must be first to avoid double-escaping)
-    s = s.replace('\\', r'\textbackslash{}')
-    # Then escape other special chars
-    for char, replacement in LATEX_SPECIAL_CHARS.items():
-        s = s.replace(char, replacement)
-    return s
+    if len(s) > _ESCAPE_CACHE_MAX_LEN:
+        return _escape_str(s)
+    return _escape_str_cached(s)
 
 
 def escape_latex_preserve_commands(value):
@@ -109,21 +137,44 @@ def escape_latex_preserve_commands(value):
 
 # --- Data loading ---
 
+_NUMBER_RE = re.compile(r'[+-]?(?:\d+\.?\d*|\.\d+)(?:[eE][+-]?\d+)?')
+_BOOL_VALUES = {'True': True, 'TRUE': True, 'true': True,
+                'False': False, 'FALSE': False, 'false': False}
+
+
+def _cast_value(value):
+    """Convert a CSV cell to int, float or bool where it looks like one.
+
+    Keeps numeric comparisons such as <% if score > 90 %> working on CSV
+    data. Empty cells stay empty strings.
+    """
+    if _NUMBER_RE.fullmatch(value):
+        if value.lstrip('+-').isdigit():
+            return int(value)
+        return float(value)
+    return _BOOL_VALUES.get(value, value)
+
+
+def iter_csv(path):
+    """Yield records from a CSV file as dicts, one row at a time."""
+    with open(path, 'r', newline='', encoding='utf-8-sig') as f:
+        for row in csv.DictReader(f):
+            yield {key: _cast_value(value) if isinstance(value, str) else value
+                   for key, value in row.items()}
+
+
 def load_csv(path):
     """Load records from a CSV file. Returns list of dicts."""
-    if HAS_PANDAS:
-        df = pd.read_csv(path, keep_default_na=False)
-        return df.to_dict('records')
-    else:
-        with open(path, 'r', newline='', encoding='utf-8') as f:
-            reader = csv.DictReader(f)
-            return list(reader)
+    return list(iter_csv(path))
 
 
 def load_json(path):
     """Load records from a JSON file. Supports array of objects or {records: [...]}."""
-    with open(path, 'r', encoding='utf-8') as f:
-        data = json.load(f)
+    if orjson is not None:
+        data = orjson.loads(Path(path).read_bytes())
+    else:
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
 
     if isinstance(data, list):
         return data
@@ -138,32 +189,134 @@ def load_json(path):
         raise ValueError(f"Unsupported JSON structure in {path}")
 
 
-def load_data(path):
-    """Auto-detect format and load data records."""
+def iter_jsonl(path):
+    """Yield records from a JSON Lines file, one line at a time."""
+    if orjson is not None:
+        with open(path, 'rb') as f:
+            for line in f:
+                if not line.isspace():
+                    yield orjson.loads(line)
+        return
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                yield json.loads(line)
+
+
+def iter_records(path):
+    """Auto-detect format and return an iterator over data records.
+
+    CSV and JSON Lines files are streamed; a plain JSON document has to be
+    parsed whole. Raises ValueError for unsupported formats immediately.
+    """
     path = Path(path)
     ext = path.suffix.lower()
 
     if ext == '.csv':
-        return load_csv(path)
-    elif ext in ('.json', '.jsonl'):
-        if ext == '.jsonl':
-            records = []
-            with open(path, 'r', encoding='utf-8') as f:
-                for line in f:
-                    line = line.strip()
-                    if line:
-                        records.append(json.loads(line))
-            return records
-        return load_json(path)
+        return iter_csv(path)
+    elif ext == '.jsonl':
+        return iter_jsonl(path)
+    elif ext == '.json':
+        return iter(load_json(path))
     else:
         raise ValueError(f"Unsupported data format: {ext}. Use .csv or .json")
 
 
+def load_data(path):
+    """Auto-detect format and load data records."""
+    return list(iter_records(path))
+
+
 # --- Template rendering ---
 
-def setup_jinja_env():
-    """Create a Jinja2 environment configured for LaTeX templates."""
+JINJA_CACHE_DIR = os.path.join(
+    os.environ.get('XDG_CACHE_HOME') or os.path.expanduser('~/.cache'),
+    'mail_merge_jinja',
+)
+
+
+@lru_cache(maxsize=None)
+def jinja_cache_version():
+    """Return a key for compiled templates that changes with this script or Jinja2.
+
+    Compiled bytecode depends on the options in setup_jinja_env, which
+    Jinja2's own cache key does not cover, so the key hashes this file's
+    source together with the Jinja2 version.
+    """
+    _import_jinja2()
+    digest = hashlib.sha256(Path(__file__).read_bytes())
+    digest.update(jinja2.__version__.encode())
+    return digest.hexdigest()[:16]
+
+
+def get_bytecode_cache(directory=None):
+    """Return an on-disk Jinja2 bytecode cache, or None if directory is unusable.
+
+    Compiled templates are stored keyed on the template name and checked
+    against a hash of its source, so repeat runs skip recompilation until
+    the template changes. directory defaults to JINJA_CACHE_DIR.
+    """
+    directory = directory or JINJA_CACHE_DIR
+    _import_jinja2()
+    try:
+        os.makedirs(directory, exist_ok=True)
+    except OSError:
+        return None
+    if not os.access(directory, os.W_OK):
+        return None
+    return jinja2.FileSystemBytecodeCache(
+        directory=directory,
+        pattern=f'__jinja2_{jinja_cache_version()}_%s.cache',
+    )
+
+
+class LatexEscaped(str):
+    """A LaTeX-escaped record value that keeps its original text for |raw."""
+
+    def __new__(cls, escaped, raw):
+        obj = super().__new__(cls, escaped)
+        obj.raw = raw
+        return obj
+
+
+def _escape_context_value(value):
+    """Escape the strings in a record value, recursing into lists and dicts."""
+    if isinstance(value, str):
+        escaped = escape_latex(value)
+        # Values without specials are already valid LaTeX as they are
+        return value if escaped == value else LatexEscaped(escaped, value)
+    if isinstance(value, list):
+        return [_escape_context_value(item) for item in value]
+    if isinstance(value, dict):
+        return {k: _escape_context_value(v) for k, v in value.items()}
+    return value
+
+
+def _escape_filter(value):
+    """|e and |escape_latex: escape, unless the value is an escaped record field."""
+    if isinstance(value, LatexEscaped):
+        return value
+    return escape_latex(value)
+
+
+def _raw_filter(value):
+    """|raw: the original text of an escaped record field."""
+    return getattr(value, 'raw', value)
+
+
+def setup_jinja_env(loader=None, bytecode_cache=None):
+    """Create a Jinja2 environment configured for LaTeX templates.
+
+    Record values are escaped when the render context is built (see
+    render_jinja), so template literals and macro output are printed as
+    written. |raw returns a field's unescaped text, and |e and
+    |escape_latex leave already escaped fields alone.
+    """
+    _import_jinja2()
     env = jinja2.Environment(
+        loader=loader,
+        bytecode_cache=bytecode_cache,
         # Use block/variable/comment strings that don't conflict with LaTeX
         block_start_string='<%',
         block_end_string='%>',
@@ -179,54 +332,104 @@ def setup_jinja_env():
         undefined=jinja2.StrictUndefined,
     )
     # Add LaTeX escape filter
-    env.filters['e'] = escape_latex
-    env.filters['escape_latex'] = escape_latex
-    env.filters['raw'] = lambda x: x  # Pass through without escaping
+    env.filters['e'] = _escape_filter
+    env.filters['escape_latex'] = _escape_filter
+    env.filters['raw'] = _raw_filter  # Pass through without escaping
     return env
 
 
+@lru_cache(maxsize=None)
+def compile_jinja_template(template_str):
+    """Parse and compile a Jinja2 template once per distinct template source."""
+    return setup_jinja_env().from_string(template_str)
+
+
+def load_jinja_template(template_path):
+    """Load a template file through a FileSystemLoader with the bytecode cache.
+
+    Unlike compile_jinja_template, this lets Jinja2 reuse the compiled
+    template across runs of the script. Without a writable cache directory
+    the template is simply compiled in memory.
+    """
+    template_path = Path(template_path)
+    _import_jinja2()
+    env = setup_jinja_env(
+        loader=jinja2.FileSystemLoader(str(template_path.parent), encoding='utf-8'),
+        bytecode_cache=get_bytecode_cache(),
+    )
+    return env.get_template(template_path.name)
+
+
+# A Jinja2 delimiter on any line that is not a LaTeX comment line; scans
+# the template in place instead of rebuilding it without comment lines
+_JINJA_SYNTAX_RE = re.compile(r'^(?!\s*%).*?(?:<%|<<|<#)', re.MULTILINE)
+
+
+def uses_jinja_syntax(template_str):
+    """Return True if the template contains Jinja2 block/variable/comment syntax.
+
+    LaTeX comment lines (lines starting with %) are ignored, so a commented
+    out <% ... %> does not switch the template to Jinja2.
+    """
+    return _JINJA_SYNTAX_RE.search(template_str) is not None
+
+
+# Matches {{variable_name}} patterns
+_PLACEHOLDER_RE = re.compile(r'\{\{(\s*\w+\s*)\}\}')
+
+
+@lru_cache(maxsize=None)
+def _split_simple_template(template_str):
+    """Split a template into literal text and placeholders, once per template.
+
+    Returns (parts, names): parts alternates literal text (even indices)
+    with the inner text of each {{...}} placeholder (odd indices), and
+    names holds the stripped variable name of each placeholder.
+    """
+    parts = tuple(_PLACEHOLDER_RE.split(template_str))
+    names = tuple(raw.strip() for raw in parts[1::2])
+    return parts, names
+
+
+def _missing_placeholder(name, raw):
+    """Warn about an unknown variable and return its placeholder unchanged."""
+    print(f"  Warning: Variable '{name}' not found in record", file=sys.stderr)
+    return '{{' + raw + '}}'
+
+
 def render_simple(template_str, record):
     """Simple {{variable}} replacement without Jinja2.
 
     Supports only basic variable substitution (no conditionals or loops).
-    Variables are auto-escaped for LaTeX.
+    Variables are auto-escaped for LaTeX. The template is scanned for
+    placeholders only the first time it is rendered; each record just
+    fills the placeholder slots and joins the parts.
     """
-    def replace_var(match):
-        var_name = match.group(1).strip()
-        if var_name in record:
-            return escape_latex(record[var_name])
-        else:
-            print(f"  Warning: Variable '{var_name}' not found in record", file=sys.stderr)
-            return match.group(0)  # Leave placeholder as-is
+    template_parts, names = _split_simple_template(template_str)
+    parts = list(template_parts)
+    parts[1::2] = [
+        escape_latex(record[name]) if name in record else _missing_placeholder(name, raw)
+        for name, raw in zip(names, template_parts[1::2])
+    ]
+    return ''.join(parts)
 
-    # Match {{variable_name}} patterns
-    return re.sub(r'\{\{(\s*\w+\s*)\}\}', replace_var, template_str)
 
-
-def render_jinja(template_str, record, env):
+def render_jinja(template, record, env=None):
     """Render template using Jinja2 with LaTeX-safe delimiters.
 
     Uses << >> for variables and <% %> for blocks to avoid LaTeX conflicts.
-    Data values are auto-escaped unless |raw filter is used.
+    Data values are auto-escaped unless |raw filter is used. template is
+    either a compiled jinja2.Template (see compile_jinja_template), which
+    is the fast path when rendering many records, or a template string
+    that is compiled with env.
     """
-    template = env.from_string(template_str)
-
-    # Auto-escape all string values in record
-    escaped_record = {}
-    for key, value in record.items():
-        if isinstance(value, str):
-            escaped_record[key] = escape_latex(value)
-        elif isinstance(value, list):
-            escaped_record[key] = [
-                {k: escape_latex(v) if isinstance(v, str) else v for k, v in item.items()}
-                if isinstance(item, dict) else
-                escape_latex(item) if isinstance(item, str) else item
-                for item in value
-            ]
+    if isinstance(template, str):
+        if env is None:
+            template = compile_jinja_template(template)
         else:
-            escaped_record[key] = value
+            template = env.from_string(template)
 
-    return template.render(**escaped_record)
+    return template.render(**{key: _escape_context_value(value) for key, value in record.items()})
 
 
 def render_template(template_str, record, use_jinja=None):
@@ -237,56 +440,176 @@ def render_template(template_str, record, use_jinja=None):
     """
     if use_jinja is None:
         # Auto-detect: use Jinja2 if template contains block/advanced syntax
-        # Strip LaTeX comment lines (lines starting with %) before checking
-        non_comment_lines = '\n'.join(
-            line for line in template_str.split('\n')
-            if not line.lstrip().startswith('%')
-        )
-        use_jinja = bool(re.search(r'<%|<<|<#', non_comment_lines))
+        use_jinja = uses_jinja_syntax(template_str)
 
     if use_jinja:
         if not HAS_JINJA2:
             print("Error: Jinja2 required for advanced templates. Install with: pip install jinja2",
                   file=sys.stderr)
             sys.exit(1)
-        env = setup_jinja_env()
-        return render_jinja(template_str, record, env)
+        return render_jinja(compile_jinja_template(template_str), record)
     else:
         return render_simple(template_str, record)
 
 
+# Two or more consecutive blank lines; lines holding only spaces count as blank
+_BLANK_LINE_RUN_RE = re.compile(r'\n(?:[ \t]*\n){2,}')
+# Environments whose blank lines are content, not paragraph breaks
+_VERBATIM_ENV_RE = re.compile(
+    r'\\begin\{(verbatim\*?|Verbatim|lstlisting|minted)\}.*?\\end\{\1\}', re.DOTALL)
+
+
+def condense_blank_lines(text):
+    """Collapse runs of two or more blank lines into a single blank line.
+
+    Jinja block tags on lines of their own leave empty lines behind; in
+    LaTeX one blank line already ends a paragraph, so the rest are noise.
+    Verbatim-like environments are copied unchanged.
+    """
+    parts = []
+    pos = 0
+    for match in _VERBATIM_ENV_RE.finditer(text):
+        parts.append(_BLANK_LINE_RUN_RE.sub('\n\n', text[pos:match.start()]))
+        parts.append(match.group())
+        pos = match.end()
+    parts.append(_BLANK_LINE_RUN_RE.sub('\n\n', text[pos:]))
+    return ''.join(parts)
+
+
+@lru_cache(maxsize=None)
+def _cached_jinja_template(template_path):
+    """load_jinja_template, once per process and template file."""
+    return load_jinja_template(template_path)
+
+
+def render_record(settings, numbered_record):
+    """Render one (index, record) pair; returns (index, name, tex_path, encoded, error).
+
+    settings is (template_str, template_path, use_jinja, condense,
+    name_field, prefix, output_dir). Everything involved is picklable, so
+    records can also be rendered in worker processes, each of which
+    compiles the Jinja2 template once.
+    """
+    template_str, template_path, use_jinja, condense, name_field, prefix, output_dir = settings
+    i, record = numbered_record
+    name = generate_output_name(record, name_field, i, prefix)
+    tex_path = output_dir / f"{name}.tex"
+    try:
+        if use_jinja:
+            rendered = render_jinja(_cached_jinja_template(template_path), record)
+        else:
+            rendered = render_simple(template_str, record)
+        if condense:
+            rendered = condense_blank_lines(rendered)
+    except Exception as e:
+        return (i, name, tex_path, None, e)
+    return (i, name, tex_path, rendered.encode('utf-8'), None)
+
+
 # --- Compilation ---
 
-def compile_tex(tex_path, compile_script=None, engine=None):
-    """Compile a .tex file to PDF. Returns (success, pdf_path, error_msg)."""
-    tex_path = Path(tex_path)
-    pdf_path = tex_path.with_suffix('.pdf')
+COMPILE_TIMEOUT = 120  # seconds
+
 
+def compile_command(tex_path, compile_script=None, engine=None, fmt=None):
+    """Return the command line that compiles tex_path.
+
+    fmt names a precompiled format (see build_format) in the directory of
+    tex_path; it only applies to direct engine compilation.
+    """
     if compile_script:
-        cmd = ['bash', compile_script, str(tex_path)]
-    else:
-        # Direct compilation
-        eng = engine or 'pdflatex'
-        cmd = [eng, '-interaction=nonstopmode', '-output-directory',
-               str(tex_path.parent), str(tex_path)]
+        return ['bash', compile_script, str(tex_path)]
+    # Direct compilation
+    eng = engine or 'pdflatex'
+    cmd = [eng, '-interaction=nonstopmode']
+    if fmt:
+        cmd.append(f'-fmt={fmt}')
+    return cmd + ['-output-directory', str(tex_path.parent), str(tex_path)]
+
+
+def template_preamble_is_static(template_str):
+    """Return True if nothing before \\begin{document} depends on record data."""
+    preamble, found, _ = template_str.partition('\\begin{document}')
+    return bool(found) and not re.search(r'\{\{|<<|<%', preamble)
+
+
+FORMAT_NAME = 'mailmerge'
 
+
+def build_format(tex_path, engine=None):
+    """Dump the preamble of tex_path into a precompiled format file.
+
+    Uses the mylatexformat package so that every later compile with
+    -fmt=FORMAT_NAME starts with the document class and packages already
+    loaded instead of re-reading them. The format is written next to
+    tex_path. Returns (success, error_msg).
+    """
+    tex_path = Path(tex_path)
+    eng = engine or 'pdflatex'
+    cmd = [eng, '-ini', f'-jobname={FORMAT_NAME}', '-interaction=nonstopmode',
+           f'&{eng}', 'mylatexformat.ltx', tex_path.name]
     try:
         result = subprocess.run(
             cmd,
             capture_output=True,
             text=True,
-            timeout=120,
+            timeout=COMPILE_TIMEOUT,
             cwd=str(tex_path.parent)
         )
+    except subprocess.TimeoutExpired:
+        return (False, f"Format build timed out ({COMPILE_TIMEOUT}s)")
+    except FileNotFoundError as e:
+        return (False, f"Command not found: {e}")
 
-        if pdf_path.exists():
-            return (True, str(pdf_path), None)
-        else:
-            error_lines = result.stderr[-500:] if result.stderr else result.stdout[-500:]
-            return (False, None, f"No PDF produced. Output:\n{error_lines}")
+    if (tex_path.parent / f'{FORMAT_NAME}.fmt').exists():
+        return (True, None)
+    return (False, result.stdout[-500:])
+
+
+def _log_tail(log_path, size=500):
+    """Return the last size bytes of a compile log, decoded for display."""
+    with open(log_path, 'rb') as f:
+        f.seek(0, os.SEEK_END)
+        f.seek(max(0, f.tell() - size))
+        return f.read().decode('utf-8', 'replace')
+
+
+def _compile_result(pdf_path, log_path):
+    """Build compile_tex's result tuple once the compiler has exited.
+
+    The compile log is deleted on success and kept for inspection when no
+    PDF was produced.
+    """
+    if pdf_path.exists():
+        log_path.unlink(missing_ok=True)
+        return (True, str(pdf_path), None)
+    return (False, None, f"No PDF produced. Output:\n{_log_tail(log_path)}")
+
+
+def compile_tex(tex_path, compile_script=None, engine=None, fmt=None):
+    """Compile a .tex file to PDF. Returns (success, pdf_path, error_msg).
+
+    Compiler output goes straight to a .compilelog file next to tex_path
+    rather than into memory; only its tail is read, and only on failure.
+    """
+    tex_path = Path(tex_path)
+    pdf_path = tex_path.with_suffix('.pdf')
+    log_path = tex_path.with_suffix('.compilelog')
+    cmd = compile_command(tex_path, compile_script, engine, fmt)
+
+    try:
+        with open(log_path, 'wb') as log:
+            subprocess.run(
+                cmd,
+                stdout=log,
+                stderr=subprocess.STDOUT,
+                timeout=COMPILE_TIMEOUT,
+                cwd=str(tex_path.parent)
+            )
+        return _compile_result(pdf_path, log_path)
 
     except subprocess.TimeoutExpired:
-        return (False, None, "Compilation timed out (120s)")
+        return (False, None, f"Compilation timed out ({COMPILE_TIMEOUT}s)")
     except FileNotFoundError as e:
         return (False, None, f"Command not found: {e}")
     except Exception as e:
@@ -294,22 +617,130 @@ def compile_tex(tex_path, compile_script=None, engine=None):
 
 
 def compile_record(args_tuple):
-    """Wrapper for parallel compilation. Takes (tex_path, compile_script, engine, index)."""
-    tex_path, compile_script, engine, index = args_tuple
-    success, pdf_path, error = compile_tex(tex_path, compile_script, engine)
+    """Wrapper for parallel compilation. Takes (tex_path, compile_script, engine, index, fmt)."""
+    tex_path, compile_script, engine, index, fmt = args_tuple
+    success, pdf_path, error = compile_tex(tex_path, compile_script, engine, fmt)
     return (index, success, pdf_path, error)
 
 
+async def compile_tex_async(tex_path, compile_script=None, engine=None, fmt=None):
+    """Asyncio counterpart of compile_tex(); returns the same tuple."""
+    tex_path = Path(tex_path)
+    pdf_path = tex_path.with_suffix('.pdf')
+    log_path = tex_path.with_suffix('.compilelog')
+    cmd = compile_command(tex_path, compile_script, engine, fmt)
+
+    with open(log_path, 'wb') as log:
+        try:
+            proc = await asyncio.create_subprocess_exec(
+                *cmd,
+                stdout=log,
+                stderr=asyncio.subprocess.STDOUT,
+                cwd=str(tex_path.parent)
+            )
+        except FileNotFoundError as e:
+            return (False, None, f"Command not found: {e}")
+        except Exception as e:
+            return (False, None, str(e))
+
+        try:
+            await asyncio.wait_for(proc.wait(), COMPILE_TIMEOUT)
+        except asyncio.TimeoutError:
+            proc.kill()
+            await proc.wait()
+            return (False, None, f"Compilation timed out ({COMPILE_TIMEOUT}s)")
+
+    return _compile_result(pdf_path, log_path)
+
+
+def compile_all_async(tasks, workers):
+    """Compile (tex_path, compile_script, engine, index, fmt) tasks from one event loop.
+
+    All child processes are awaited by a single thread instead of parking
+    one pool thread per running compile; at most workers run at once.
+    Returns (index, success, pdf_path, error) tuples in task order.
+    """
+    async def run_all():
+        semaphore = asyncio.Semaphore(workers)
+
+        async def run_one(tex_path, compile_script, engine, index, fmt):
+            async with semaphore:
+                result = await compile_tex_async(tex_path, compile_script, engine, fmt)
+            return (index, *result)
+
+        return await asyncio.gather(*(run_one(*task) for task in tasks))
+
+    return asyncio.run(run_all())
+
+
 # --- PDF merging ---
 
+@lru_cache(maxsize=32)
+def _which(name):
+    """Cached shutil.which(); clear the cache after installing anything."""
+    return shutil.which(name)
+
+
+HAS_PYPDF = importlib.util.find_spec('pypdf') is not None
+
+# Above this total input size pypdf's pure-Python object model gets slow, so
+# pdfunite is preferred when it is installed
+PYPDF_MERGE_MAX_BYTES = 200 * 1024 * 1024
+
+# Maximum number of input files per pdfunite command line
+PDFUNITE_BATCH_SIZE = 500
+
+
 def merge_pdfs(pdf_paths, output_path):
-    """Merge multiple PDFs into one using pdfunite (poppler-utils)."""
+    """Merge multiple PDFs into one.
+
+    Merges in-process with pypdf when it is installed, avoiding a pdfunite
+    subprocess. Falls back to pdfunite (poppler-utils) without pypdf, for
+    very large inputs, or if the pypdf merge fails.
+    """
     if not pdf_paths:
         print("Warning: No PDFs to merge", file=sys.stderr)
         return False
 
+    if HAS_PYPDF:
+        total_size = sum(os.path.getsize(p) for p in pdf_paths)
+        if total_size <= PYPDF_MERGE_MAX_BYTES or not _which('pdfunite'):
+            try:
+                _merge_pdfs_pypdf(pdf_paths, output_path)
+                return True
+            except Exception as e:
+                print(f"Warning: pypdf merge failed ({e}), trying pdfunite", file=sys.stderr)
+
+    return _merge_pdfs_pdfunite(pdf_paths, output_path)
+
+
+def _merge_pdfs_pypdf(pdf_paths, output_path):
+    """Merge PDFs in-process with pypdf."""
+    from pypdf import PdfWriter
+
+    writer = PdfWriter()
+    for pdf_path in pdf_paths:
+        writer.append(str(pdf_path))
+    with open(output_path, 'wb') as f:
+        writer.write(f)
+
+
+def _run_pdfunite(pdf_paths, output_path):
+    """Run one pdfunite command; returns True on success."""
+    cmd = ['pdfunite'] + [str(p) for p in pdf_paths] + [str(output_path)]
+    result = subprocess.run(cmd, capture_output=True, text=True)
+
+    if result.returncode == 0 and Path(output_path).exists():
+        return True
+    else:
+        print(f"Error merging PDFs: {result.stderr}", file=sys.stderr)
+        return False
+
+
+def _merge_pdfs_pdfunite(pdf_paths, output_path):
+    """Merge multiple PDFs into one using pdfunite (poppler-utils)."""
     # Check for pdfunite
-    if not shutil.which('pdfunite'):
+    if not _which('pdfunite'):
         print("Installing poppler-utils for PDF merging...", file=sys.stderr)
         # Cross-platform package installation
         install_cmds = [
@@ -321,38 +752,65 @@ def merge_pdfs(pdf_paths, output_path):
         ]
         installed = False
         for cmd, mgr in install_cmds:
-            if shutil.which(mgr):
+            if _which(mgr):
                 # Prepend sudo for non-brew package managers if available
-                if mgr != 'brew' and shutil.which('sudo'):
+                if mgr != 'brew' and _which('sudo'):
                     cmd = ['sudo'] + cmd
                 result = subprocess.run(cmd, capture_output=True)
                 if result.returncode == 0:
                     installed = True
                 break
-        if not installed and not shutil.which('pdfunite'):
+        _which.cache_clear()  # PATH contents may have changed
+        if not installed and not _which('pdfunite'):
             print("Error: pdfunite not available. Install poppler-utils.", file=sys.stderr)
             return False
 
-    cmd = ['pdfunite'] + [str(p) for p in pdf_paths] + [str(output_path)]
-    result = subprocess.run(cmd, capture_output=True, text=True)
+    if len(pdf_paths) <= PDFUNITE_BATCH_SIZE:
+        return _run_pdfunite(pdf_paths, output_path)
+
+    # Keep each command line well under ARG_MAX: merge in batches, then
+    # merge the batch results
+    with tempfile.TemporaryDirectory() as tmpdir:
+        parts = []
+        for start in range(0, len(pdf_paths), PDFUNITE_BATCH_SIZE):
+            part = Path(tmpdir) / f"part_{len(parts):05d}.pdf"
+            if not _run_pdfunite(pdf_paths[start:start + PDFUNITE_BATCH_SIZE], part):
+                return False
+            parts.append(part)
+        return _merge_pdfs_pdfunite(parts, output_path)
+
+
+# --- Output writing ---
+
+_WRITE_FLAGS = os.O_WRONLY | os.O_CREAT | os.O_TRUNC | getattr(os, 'O_BINARY', 0)
 
-    if result.returncode == 0 and Path(output_path).exists():
-        return True
-    else:
-        print(f"Error merging PDFs: {result.stderr}", file=sys.stderr)
-        return False
+
+def write_file_bytes(path, data):
+    """Write already-encoded data to path with raw os.open/os.write calls.
+
+    Skips the buffered text-file object that Path.write_text builds and
+    tears down for every file.
+    """
+    fd = os.open(path, _WRITE_FLAGS, 0o644)
+    try:
+        view = memoryview(data)
+        while view:
+            view = view[os.write(fd, view):]
+    finally:
+        os.close(fd)
 
 
 # --- Output naming ---
 
+# A run of characters that are unsafe in filenames, together with any
+# underscores mixed in, so each run collapses to a single underscore
+_UNSAFE_FILENAME_RE = re.compile(r'(?:[^\w\-.]|_)+')
+
 def sanitize_filename(name):
     """Make a string safe for use as a filename."""
-    # Replace spaces and special chars with underscores
-    name = re.sub(r'[^\w\-.]', '_', str(name))
-    # Collapse multiple underscores
-    name = re.sub(r'_+', '_', name)
-    # Remove leading/trailing underscores
-    name = name.strip('_')
+    # Replace runs of spaces, special chars and underscores with one
+    # underscore, then remove leading/trailing underscores
+    name = _UNSAFE_FILENAME_RE.sub('_', str(name)).strip('_')
     return name or 'document'
 
 
@@ -375,7 +833,16 @@ def generate_output_name(record, name_field=None, index=0, prefix=''):
 
 # --- Main workflow ---
 
-def main():
+def _exit_on_load_error(records):
+    """Yield from a record stream, exiting cleanly if reading it fails."""
+    try:
+        yield from records
+    except Exception as e:
+        print(f"Error loading data: {e}", file=sys.stderr)
+        sys.exit(1)
+
+
+def main(argv=None):
     parser = argparse.ArgumentParser(
         description='Generate personalized LaTeX documents from templates + data sources',
         formatter_class=argparse.RawDescriptionHelpFormatter,
@@ -397,6 +864,18 @@ def main():
                         help='LaTeX engine (default: pdflatex)')
     parser.add_argument('--workers', '-w', type=int, default=1,
                         help='Number of parallel compilation workers (default: 1)')
+    parser.add_argument('--render-workers', type=int, default=1,
+                        help='Number of threads rendering templates (default: 1)')
+    parser.add_argument('--render-processes', action='store_true',
+                        help='Run --render-workers as processes instead of threads; '
+                             'Jinja2 rendering is CPU-bound and threads share the GIL')
+    parser.add_argument('--condense-whitespace', action='store_true',
+                        help='Collapse runs of blank lines (e.g. left by <% %> tags) to one')
+    parser.add_argument('--precompile-format', action='store_true',
+                        help='Dump the template preamble into a format file once and '
+                             'compile every record against it (needs mylatexformat)')
+    parser.add_argument('--async-compile', action='store_true',
+                        help='Run parallel compiles from one asyncio event loop instead of a thread pool')
     parser.add_argument('--merge', action='store_true',
                         help='Merge all PDFs into a single file')
     parser.add_argument('--merge-name', default='merged_output.pdf',
@@ -418,7 +897,7 @@ def main():
     parser.add_argument('--verbose', '-v', action='store_true',
                         help='Verbose output')
 
-    args = parser.parse_args()
+    args = parser.parse_args(argv)
 
     # --- Validate inputs ---
     template_path = Path(args.template)
@@ -437,20 +916,24 @@ def main():
     print(f":: Loaded template: {template_path}")
 
     # --- Load data ---
+    # Records are streamed, so .tex files are written as rows are read
+    # rather than after the whole data file is in memory
     try:
-        records = load_data(data_path)
+        records = iter_records(data_path)
+        first = next(records, None)
     except Exception as e:
         print(f"Error loading data: {e}", file=sys.stderr)
         sys.exit(1)
 
-    if not records:
+    if first is None:
         print("Error: No records found in data file", file=sys.stderr)
         sys.exit(1)
 
+    records = _exit_on_load_error(chain([first], records))
     if args.limit:
-        records = records[:args.limit]
+        records = islice(records, args.limit)
 
-    print(f":: Loaded {len(records)} records from {data_path}")
+    print(f":: Reading records from {data_path}")
 
     # Detect rendering mode
     if args.simple:
@@ -458,19 +941,33 @@ def main():
     elif args.jinja:
         use_jinja = True
     else:
-        use_jinja = None  # Auto-detect
+        use_jinja = uses_jinja_syntax(template_str)
 
     # --- Dry run ---
     if args.dry_run:
         print("\n:: DRY RUN -- would generate:")
+        total = 0
         for i, record in enumerate(records):
             name = generate_output_name(record, args.name_field, i, args.prefix)
             print(f"   [{i+1}] {name}.tex → {name}.pdf")
             if args.verbose:
                 for key, val in record.items():
                     print(f"       {key}: {val}")
-        print(f"\n:: Total: {len(records)} documents")
-        return
+            total += 1
+        print(f"\n:: Total: {total} documents")
+        return 0
+
+    # Compile the template once rather than once per record
+    if use_jinja:
+        if not HAS_JINJA2:
+            print("Error: Jinja2 required for advanced templates. Install with: pip install jinja2",
+                  file=sys.stderr)
+            sys.exit(1)
+        try:
+            _cached_jinja_template(template_path)
+        except jinja2.TemplateSyntaxError as e:
+            print(f"Error: Invalid template syntax (line {e.lineno}): {e.message}", file=sys.stderr)
+            sys.exit(1)
 
     # --- Create output directory ---
     output_dir = Path(args.output_dir)
@@ -480,24 +977,44 @@ def main():
     tex_files = []
     errors = []
 
-    print(f"\n:: Generating {len(records)} documents...")
+    print("\n:: Generating documents...")
 
-    for i, record in enumerate(records):
-        name = generate_output_name(record, args.name_field, i, args.prefix)
-        tex_path = output_dir / f"{name}.tex"
+    render_one = partial(render_record, (
+        template_str, template_path, use_jinja, args.condense_whitespace,
+        args.name_field, args.prefix, output_dir,
+    ))
 
-        try:
-            rendered = render_template(template_str, record, use_jinja=use_jinja)
-            tex_path.write_text(rendered, encoding='utf-8')
-            tex_files.append((str(tex_path), i, name))
-
-            if args.verbose:
-                print(f"   [{i+1}/{len(records)}] Generated: {tex_path}")
+    # Records may be rendered on worker threads or processes, but files are
+    # written here, in record order, by a single writer
+    render_executor = None
+    if args.render_workers > 1:
+        if args.render_processes:
+            render_executor = ProcessPoolExecutor(max_workers=args.render_workers)
+            rendered_records = render_executor.map(render_one, enumerate(records), chunksize=16)
+        else:
+            render_executor = ThreadPoolExecutor(max_workers=args.render_workers)
+            rendered_records = render_executor.map(render_one, enumerate(records))
+    else:
+        rendered_records = map(render_one, enumerate(records))
 
-        except Exception as e:
-            error_msg = f"Record {i+1}: {e}"
-            errors.append(error_msg)
-            print(f"   Error generating {name}: {e}", file=sys.stderr)
+    try:
+        for i, name, tex_path, encoded, error in rendered_records:
+            if error is None:
+                try:
+                    write_file_bytes(tex_path, encoded)
+                except Exception as e:
+                    error = e
+
+            if error is None:
+                tex_files.append((str(tex_path), i, name))
+                if args.verbose:
+                    print(f"   [{i+1}] Generated: {tex_path}")
+            else:
+                errors.append(f"Record {i+1}: {error}")
+                print(f"   Error generating {name}: {error}", file=sys.stderr)
+    finally:
+        if render_executor is not None:
+            render_executor.shutdown()
 
     print(f":: Generated {len(tex_files)} .tex files ({len(errors)} errors)")
 
@@ -516,34 +1033,56 @@ def main():
     if args.no_compile:
         print(":: Skipping compilation (--no-compile)")
         print(f"\n:: Done. {len(tex_files)} .tex files in {output_dir}/")
-        return
+        return 0
 
     print(f"\n:: Compiling {len(tex_files)} documents (workers: {args.workers})...")
 
+    # --- Precompile the shared preamble ---
+    fmt = None
+    if args.precompile_format and tex_files:
+        if args.compile_script:
+            print("   Warning: --precompile-format is ignored with --compile-script", file=sys.stderr)
+        elif not template_preamble_is_static(template_str):
+            print("   Warning: template preamble uses record data; not precompiling a format",
+                  file=sys.stderr)
+        else:
+            built, error = build_format(tex_files[0][0], args.engine)
+            if built:
+                fmt = FORMAT_NAME
+                print(f":: Precompiled preamble into {FORMAT_NAME}.fmt")
+            else:
+                print(f"   Warning: format build failed, compiling normally: {error}",
+                      file=sys.stderr)
+
     pdf_files = []
     compile_errors = []
 
+    def record_parallel_result(idx, success, pdf_path, error):
+        if success:
+            pdf_files.append((idx, pdf_path))
+            if args.verbose:
+                print(f"   Compiled: {Path(pdf_path).name}")
+        else:
+            compile_errors.append(f"Record {idx+1}: {error}")
+            print(f"   Error compiling record {idx+1}: {error}", file=sys.stderr)
+
     if args.workers > 1:
-        # Parallel compilation
-        tasks = [(tex_path, args.compile_script, args.engine, idx)
+        tasks = [(tex_path, args.compile_script, args.engine, idx, fmt)
                  for tex_path, idx, name in tex_files]
 
-        with ProcessPoolExecutor(max_workers=args.workers) as executor:
-            futures = {executor.submit(compile_record, task): task for task in tasks}
-
-            for future in as_completed(futures):
-                idx, success, pdf_path, error = future.result()
-                if success:
-                    pdf_files.append((idx, pdf_path))
-                    if args.verbose:
-                        print(f"   Compiled: {Path(pdf_path).name}")
-                else:
-                    compile_errors.append(f"Record {idx+1}: {error}")
-                    print(f"   Error compiling record {idx+1}: {error}", file=sys.stderr)
+        if args.async_compile:
+            for result in compile_all_async(tasks, args.workers):
+                record_parallel_result(*result)
+        else:
+            # Parallel compilation. Threads are enough: each worker only
+            # waits on a LaTeX subprocess, which runs outside the GIL
+            with ThreadPoolExecutor(max_workers=args.workers) as executor:
+                for result in executor.map(compile_record, tasks):
+                    record_parallel_result(*result)
     else:
         # Sequential compilation
         for tex_path, idx, name in tex_files:
-            success, pdf_path, error = compile_tex(tex_path, args.compile_script, args.engine)
+            success, pdf_path, error = compile_tex(tex_path, args.compile_script, args.engine, fmt)
             if success:
                 pdf_files.append((idx, pdf_path))
                 if args.verbose:
@@ -552,8 +1091,7 @@ def main():
                 compile_errors.append(f"Record {idx+1}: {error}")
                 print(f"   Error compiling record {idx+1}: {error}", file=sys.stderr)
 
-    # Sort PDFs by original index
-    pdf_files.sort(key=lambda x: x[0])
+    # Every compile path reports results in record order
     pdf_paths = [p for _, p in pdf_files]
 
     print(f":: Compiled {len(pdf_paths)} PDFs ({len(compile_errors)} errors)")
@@ -582,9 +1120,8 @@ def main():
             print(f"   - {err}")
 
     # Exit with error if any failures
-    if errors or compile_errors:
-        sys.exit(1)
+    return 1 if errors or compile_errors else 0
 
 
 if __name__ == '__main__':
-    main()
+    sys.exit(main())
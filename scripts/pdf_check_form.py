@@ -11,17 +11,27 @@ Examples:
     python3 pdf_check_form.py /path/to/form.pdf
 """
 
+import importlib.util
+import os
 import subprocess
 import sys
 
 
 def _ensure_package(pip_name, import_name=None):
-    """Try importing a package; auto-install via pip if missing."""
+    """Check a package is importable; auto-install via pip if missing.
+
+    The check uses find_spec, so nothing is imported here.
+    """
     if import_name is None:
         import_name = pip_name
-    try:
-        __import__(import_name)
-    except ImportError:
+    if import_name in sys.modules:
+        return
+    if importlib.util.find_spec(import_name) is None:
+        if os.environ.get("LATEX_SKILL_AUTOINSTALL") == "0":
+            print(f"Error: Package '{import_name}' not found and auto-install is disabled "
+                  f"(LATEX_SKILL_AUTOINSTALL=0)", file=sys.stderr)
+            print(f"Please install manually: pip install {pip_name}", file=sys.stderr)
+            sys.exit(1)
         print(f":: Package '{import_name}' not found. Installing {pip_name}...", file=sys.stderr)
         try:
             subprocess.check_call(
@@ -41,11 +51,28 @@ def _ensure_package(pip_name, import_name=None):
                 sys.exit(1)
 
 
-_ensure_package("pypdf")
-
 import argparse
 from pathlib import Path
-from pypdf import PdfReader
+
+# pypdf is imported by _import_pypdf(): when run as a script, only after the
+# arguments and input path check out, so --help and usage errors stay instant
+# and never trigger a pip install.
+PdfReader = None
+
+
+def _import_pypdf():
+    """Import pypdf's PdfReader into the module globals."""
+    global PdfReader
+    if PdfReader is not None:
+        return
+    _ensure_package("pypdf")
+    from pypdf import PdfReader as reader_cls
+    PdfReader = reader_cls
+
+
+# Imported as a library, check_form is called directly
+if __name__ != "__main__":
+    _import_pypdf()
 
 
 def check_form(pdf_path: str) -> bool:
@@ -88,6 +115,8 @@ def main():
         print(f"Error: File not found: {pdf_path}", file=sys.stderr)
         sys.exit(1)
 
+    _import_pypdf()
+
     try:
         has_fields = check_form(str(pdf_path))
         if has_fields:
@@ -6,22 +6,37 @@ Extract fillable form field metadata from a PDF to JSON.
 Extracts field IDs, types (text, checkbox, radio_group, choice), page numbers,
 bounding rectangles, and option values. Output is used by pdf_fill_form.py.
 
+The default backend is pypdf. Pass --backend pymupdf to parse the PDF with
+MuPDF instead, which is much faster on forms with hundreds of fields. Both
+backends write the same JSON schema.
+
 Examples:
     python3 pdf_extract_fields.py form.pdf field_info.json
     python3 pdf_extract_fields.py /path/to/form.pdf /tmp/fields.json
+    python3 pdf_extract_fields.py --backend pymupdf large_form.pdf /tmp/fields.json
 """
 
+import importlib.util
+import os
 import subprocess
 import sys
 
 
 def _ensure_package(pip_name, import_name=None):
-    """Try importing a package; auto-install via pip if missing."""
+    """Check a package is importable; auto-install via pip if missing.
+
+    The check uses find_spec, so nothing is imported here.
+    """
     if import_name is None:
         import_name = pip_name
-    try:
-        __import__(import_name)
-    except ImportError:
+    if import_name in sys.modules:
+        return
+    if importlib.util.find_spec(import_name) is None:
+        if os.environ.get("LATEX_SKILL_AUTOINSTALL") == "0":
+            print(f"Error: Package '{import_name}' not found and auto-install is disabled "
+                  f"(LATEX_SKILL_AUTOINSTALL=0)", file=sys.stderr)
+            print(f"Please install manually: pip install {pip_name}", file=sys.stderr)
+            sys.exit(1)
         print(f":: Package '{import_name}' not found. Installing {pip_name}...", file=sys.stderr)
         try:
             subprocess.check_call(
@@ -41,60 +56,365 @@ def _ensure_package(pip_name, import_name=None):
                 sys.exit(1)
 
 
-_ensure_package("pypdf")
+# Imported as a library, the caller is responsible for its dependencies
+if __name__ == "__main__":
+    _ensure_package("pypdf")
 
 import argparse
+import glob
 import json
+import mmap
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from io import BytesIO
 from pathlib import Path
+import pypdf
 from pypdf import PdfReader
 
+# orjson is optional; it parses and writes field JSON several times faster
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def _orjson_default(obj):
+    """Serialize pypdf's FloatObject, a float subclass orjson does not accept."""
+    if isinstance(obj, float):
+        return float(obj)
+    raise TypeError
+
 
-def get_full_annotation_field_id(annotation):
-    """Build the full hierarchical field ID by walking parent chain.
+def load_json(path):
+    """Load a JSON file, with orjson when it is installed."""
+    if orjson is not None:
+        return orjson.loads(Path(path).read_bytes())
+    with open(path) as f:
+        return json.load(f)
 
-    This matches the format used by PdfReader's get_fields() and
-    update_page_form_field_values() methods.
+
+def write_json(data, path):
+    """Write data as 2-space indented JSON, with orjson when it is installed.
+
+    orjson writes non-ASCII characters as UTF-8 rather than ASCII escapes; the
+    parsed content is the same either way.
     """
-    components = []
-    while annotation:
-        field_name = annotation.get('/T')
-        if field_name:
-            components.append(field_name)
-        annotation = annotation.get('/Parent')
-    return ".".join(reversed(components)) if components else None
+    if orjson is not None:
+        Path(path).write_bytes(
+            orjson.dumps(data, option=orjson.OPT_INDENT_2, default=_orjson_default)
+        )
+    else:
+        with open(path, "w") as f:
+            json.dump(data, f, indent=2)
 
 
-def make_field_dict(field, field_id):
-    """Create a field info dictionary from a PDF form field."""
-    field_dict = {"field_id": field_id}
-    ft = field.get('/FT')
-    if ft == "/Tx":
-        field_dict["type"] = "text"
-    elif ft == "/Btn":
-        field_dict["type"] = "checkbox"  # radio groups handled separately
-        states = field.get("/_States_", [])
-        if len(states) == 2:
-            # "/Off" is always the unchecked value per PDF spec
-            # https://opensource.adobe.com/dc-acrobat-sdk-docs/standards/pdfstandards/pdf/PDF32000_2008.pdf#page=448
-            if "/Off" in states:
-                field_dict["checked_value"] = states[0] if states[0] != "/Off" else states[1]
-                field_dict["unchecked_value"] = "/Off"
-            else:
-                print(f"Warning: Unexpected state values for checkbox `{field_id}`. "
-                      "Its checked/unchecked values may not be correct; visually verify results.",
-                      file=sys.stderr)
-                field_dict["checked_value"] = states[0]
-                field_dict["unchecked_value"] = states[1]
-    elif ft == "/Ch":
-        field_dict["type"] = "choice"
-        states = field.get("/_States_", [])
-        field_dict["choice_options"] = [{
+def _read_object_stream(reader, stmnum):
+    """Parse every object in an /ObjStm in one pass.
+
+    Returns {object number: object} for the objects this stream is the
+    authoritative source of (incremental updates may have replaced others).
+    """
+    from pypdf.generic import IndirectObject, read_object
+
+    obj_stm = reader.get_object(stmnum)
+    data = obj_stm.get_data()
+    first = int(obj_stm["/First"])
+    header = data[:first].split()
+    n = min(int(obj_stm["/N"]), len(header) // 2)
+
+    stream = BytesIO(data)
+    objects = {}
+    for i in range(n):
+        obj_num = int(header[2 * i])
+        pos = first + int(header[2 * i + 1])
+        while data[pos:pos + 1].isspace():
+            pos += 1
+        if reader.xref_objStm.get(obj_num, (None,))[0] != stmnum:
+            continue
+        stream.seek(pos)
+        obj = read_object(stream, reader)
+        obj.indirect_reference = IndirectObject(obj_num, 0, reader)
+        objects[obj_num] = obj
+    return objects
+
+
+# pypdf releases the ObjStm cache is tested against: [3.17, 6.9). From 6.9.0
+# pypdf parses each object stream once by itself, and the cache relies on
+# the private _get_object_from_stream, so other releases are left alone.
+_OBJSTM_CACHE_PYPDF_RANGE = ((3, 17), (6, 9))
+
+
+def _pypdf_version():
+    """Return the installed pypdf release as a (major, minor) tuple."""
+    return tuple(int(part) for part in pypdf.__version__.split(".")[:2])
+
+
+_OBJSTM_CACHE_SUPPORTED = (
+    _OBJSTM_CACHE_PYPDF_RANGE[0] <= _pypdf_version() < _OBJSTM_CACHE_PYPDF_RANGE[1]
+)
+
+
+def _cache_object_streams(reader):
+    """Make reader parse each object stream once instead of once per object.
+
+    pypdf before 6.9 re-read the whole ObjStm header on every
+    _get_object_from_stream() call, which is O(N^2) on forms that pack
+    thousands of objects into a single stream. The method is wrapped on
+    this reader only, so PdfReaders created elsewhere in the process are
+    unaffected; it parses a stream on first touch and answers later lookups
+    from a dict. Anything it cannot handle falls through to pypdf. Outside
+    the tested pypdf range the reader is returned unchanged.
+    """
+    if not _OBJSTM_CACHE_SUPPORTED:
+        return reader
+    original = reader._get_object_from_stream
+    objects_by_stream = {}
+
+    def _get_object_from_stream(indirect_reference):
+        stmnum, _idx = reader.xref_objStm[indirect_reference.idnum]
+        objects = objects_by_stream.get(stmnum)
+        if objects is None:
+            try:
+                objects = _read_object_stream(reader, stmnum)
+            except Exception:
+                objects = {}
+            objects_by_stream[stmnum] = objects
+        obj = objects.get(indirect_reference.idnum)
+        if obj is None:
+            return original(indirect_reference)
+        return obj
+
+    reader._get_object_from_stream = _get_object_from_stream
+    return reader
+
+
+@contextmanager
+def open_pdf_reader(pdf_path):
+    """Open a PdfReader over a read-only mmap of the file.
+
+    pypdf only touches the pages of the file it actually parses, and the
+    bytes are never copied into a Python buffer, so peak memory on large
+    forms stays close to the parsed objects alone. Files that cannot be
+    mapped (empty files, some pipes and network mounts) are read into memory
+    instead. The mapping is closed on exit, so finish all work that reads
+    from the PDF, including PdfWriter(clone_from=reader), inside the block.
+    The reader parses object streams once (see _cache_object_streams).
+    """
+    with open(pdf_path, "rb") as fh:
+        try:
+            mm = mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ)
+        except (ValueError, OSError):
+            yield _cache_object_streams(PdfReader(BytesIO(fh.read())))
+            return
+        with mm:
+            yield _cache_object_streams(PdfReader(mm))
+
+
+def _make_text(field, field_id):
+    """Type keys for a /Tx field."""
+    return {"type": "text"}
+
+
+def _make_btn(field, field_id):
+    """Type keys for a /Btn field: checkbox with its checked/unchecked values."""
+    info = {"type": "checkbox"}  # radio groups handled separately
+    info.update(_checkbox_values(field.get("/_States_", []), field_id))
+    return info
+
+
+def _checkbox_values(states, field_id):
+    """checked_value/unchecked_value keys for a checkbox's appearance states."""
+    info = {}
+    if len(states) == 2:
+        # "/Off" is always the unchecked value per PDF spec
+        # https://opensource.adobe.com/dc-acrobat-sdk-docs/standards/pdfstandards/pdf/PDF32000_2008.pdf#page=448
+        try:
+            info["checked_value"] = states[1 - states.index("/Off")]
+            info["unchecked_value"] = "/Off"
+        except ValueError:
+            print(f"Warning: Unexpected state values for checkbox `{field_id}`. "
+                  "Its checked/unchecked values may not be correct; visually verify results.",
+                  file=sys.stderr)
+            info["checked_value"] = states[0]
+            info["unchecked_value"] = states[1]
+    return info
+
+
+def _make_choice(field, field_id):
+    """Type keys for a /Ch field: choice with its (value, text) options."""
+    return {
+        "type": "choice",
+        "choice_options": [{
             "value": state[0],
             "text": state[1],
-        } for state in states]
+        } for state in field.get("/_States_", [])],
+    }
+
+
+def _make_unknown(field, field_id):
+    """Type keys for a field with an unsupported /FT."""
+    return {"type": f"unknown ({field.get('/FT')})"}
+
+
+# Type-specific keys of a field's info dict, by /FT
+_FT_HANDLERS = {
+    "/Tx": _make_text,
+    "/Btn": _make_btn,
+    "/Ch": _make_choice,
+}
+
+
+def make_field_dict(field, field_id):
+    """Create a field info dictionary from a PDF form field."""
+    handler = _FT_HANDLERS.get(field.get('/FT'), _make_unknown)
+    return {"field_id": field_id, **handler(field, field_id)}
+
+
+def _iter_field_widgets(reader):
+    """Yield (field_id, widget_ref, widget) for each terminal node of /AcroForm /Fields.
+
+    Walks the field tree with an explicit stack. field_id joins the /T names
+    of the node and its ancestors with dots, which is the format used by
+    PdfReader.get_fields() and update_page_form_field_values(); widget_ref
+    is the widget's IndirectObject, or None when it is stored inline.
+    """
+    acroform = reader.trailer["/Root"].get("/AcroForm")
+    if not acroform:
+        return
+    stack = [(ref, None) for ref in reversed(acroform.get("/Fields", []))]
+    seen = set()
+    while stack:
+        ref, parent_id = stack.pop()
+        idnum = getattr(ref, "idnum", None)
+        if idnum is not None:
+            if idnum in seen:
+                continue
+            seen.add(idnum)
+        node = ref.get_object()
+        name = node.get("/T")
+        field_id = f"{parent_id}.{name}" if parent_id and name else (name or parent_id)
+        kids = node.get("/Kids")
+        if kids:
+            stack.extend((kid, field_id) for kid in reversed(kids))
+        else:
+            yield field_id, ref if idnum is not None else None, node
+
+
+def _page_indices(reader, wanted):
+    """Map the page object numbers in wanted to 0-based page indexes.
+
+    Walks the page tree in document order, as pypdf's page flattening does,
+    but stops once every wanted page has been seen, so pages after the last
+    one holding a widget are never resolved.
+    """
+    indices = {}
+    remaining = set(wanted)
+    stack = [reader.trailer["/Root"].raw_get("/Pages")]
+    seen = set()
+    index = 0
+    while stack and remaining:
+        ref = stack.pop()
+        idnum = getattr(ref, "idnum", None)
+        if idnum is not None:
+            if idnum in seen:
+                continue
+            seen.add(idnum)
+        node = ref.get_object()
+        if "/Type" in node:
+            node_type = node["/Type"]
+        else:
+            node_type = "/Pages" if "/Kids" in node else "/Page"
+        if node_type == "/Pages":
+            stack.extend(reversed(node.get("/Kids", [])))
+        elif node_type == "/Page":
+            if idnum in remaining:
+                indices[idnum] = index
+                remaining.discard(idnum)
+            index += 1
+    return indices
+
+
+def _annot_positions(page):
+    """Map the object number of each annotation in page's /Annots to its index."""
+    return {annot_ref.idnum: position
+            for position, annot_ref in enumerate(page.get("/Annots", []))
+            if hasattr(annot_ref, "idnum")}
+
+
+def _locate_widgets(reader, field_ids=None):
+    """Return (page_index, field_id, widget) for every widget that has a page.
+
+    If field_ids is given, widgets of other fields are skipped before any
+    page lookup.
+
+    The page comes from the widget's /P back-reference, resolved by a page
+    tree walk that ends at the last referenced page and never dereferences
+    an annotation. Widgets without a usable /P are matched against the raw
+    /Annots references of every page instead, which is also how orphaned
+    field definitions are detected. The result is in page order and, within
+    a page, in /Annots order (not /Kids order), so radio options come out in
+    the order the page lists them.
+    """
+    candidates = []
+    for field_id, ref, widget in _iter_field_widgets(reader):
+        if field_ids is not None and field_id not in field_ids:
+            continue
+        page_ref = widget.raw_get("/P") if "/P" in widget else None
+        candidates.append((field_id, ref, widget, getattr(page_ref, "idnum", None)))
+
+    page_index_by_idnum = _page_indices(
+        reader, {page_idnum for *_, page_idnum in candidates if page_idnum is not None}
+    )
+    positions_by_page_idnum = {}
+    annot_location_by_idnum = None
+
+    located = []
+    for field_id, ref, widget, page_idnum in candidates:
+        page_index = page_index_by_idnum.get(page_idnum)
+        position = None
+        if page_index is not None:
+            if ref is not None:
+                if page_idnum not in positions_by_page_idnum:
+                    positions_by_page_idnum[page_idnum] = _annot_positions(
+                        reader.get_object(page_idnum))
+                position = positions_by_page_idnum[page_idnum].get(ref.idnum)
+        elif ref is not None:
+            if annot_location_by_idnum is None:
+                annot_location_by_idnum = {}
+                for i, page in enumerate(reader.pages):
+                    for annot_idnum, annot_position in _annot_positions(page).items():
+                        annot_location_by_idnum[annot_idnum] = (i, annot_position)
+            page_index, position = annot_location_by_idnum.get(ref.idnum, (None, None))
+        if page_index is not None:
+            # Widgets missing from their page's /Annots sort after the listed ones
+            located.append((page_index, float("inf") if position is None else position,
+                            field_id, widget))
+    located.sort(key=lambda item: item[:2])
+    return [(page_index, field_id, widget) for page_index, _, field_id, widget in located]
+
+
+def _single_on_state(states):
+    """Return the only appearance state other than /Off, or None if there are none or several."""
+    on_value = None
+    for state in states:
+        if state == "/Off":
+            continue
+        if on_value is not None:
+            return None
+        on_value = state
+    return on_value
+
+
+_NO_RECT = (0, 0, 0, 0)
+
+
+def _field_sort_key(f):
+    """Sort by page number, then Y position (flipped), then X."""
+    if "radio_options" in f:
+        rect = f["radio_options"][0]["rect"] or _NO_RECT
     else:
-        field_dict["type"] = f"unknown ({ft})"
-    return field_dict
+        rect = f.get("rect") or _NO_RECT
+    return (f.get("page"), -rect[1], rect[0])
 
 
 def get_field_info(reader: PdfReader):
@@ -110,7 +430,18 @@ def get_field_info(reader: PdfReader):
         // type-specific fields (checked_value, radio_options, choice_options)
       }
     ]
+
+    The result is cached on the reader, so validating and then filling the
+    same form walks its field tree only once. Treat the list as read-only.
     """
+    cached = getattr(reader, "_field_info_cache", None)
+    if cached is None:
+        cached = reader._field_info_cache = _collect_field_info(reader)
+    return cached
+
+
+def _collect_field_info(reader):
+    """Walk the AcroForm and page annotations for get_field_info()."""
     fields = reader.get_fields()
     if not fields:
         return []
@@ -126,35 +457,33 @@ def get_field_info(reader: PdfReader):
             continue
         field_info_by_id[field_id] = make_field_dict(field, field_id)
 
-    # Bounding rects are stored in annotations on page objects
+    # Bounding rects are stored in the widget annotations of each field
     # Radio button options have a separate annotation for each choice
     radio_fields_by_id = {}
 
-    for page_index, page in enumerate(reader.pages):
-        annotations = page.get('/Annots', [])
-        for ann in annotations:
-            field_id = get_full_annotation_field_id(ann)
-            if field_id in field_info_by_id:
-                field_info_by_id[field_id]["page"] = page_index + 1
-                field_info_by_id[field_id]["rect"] = ann.get('/Rect')
-            elif field_id in possible_radio_names:
-                try:
-                    on_values = [v for v in ann["/AP"]["/N"] if v != "/Off"]
-                except KeyError:
-                    continue
-                if len(on_values) == 1:
-                    rect = ann.get("/Rect")
-                    if field_id not in radio_fields_by_id:
-                        radio_fields_by_id[field_id] = {
-                            "field_id": field_id,
-                            "type": "radio_group",
-                            "page": page_index + 1,
-                            "radio_options": [],
-                        }
-                    radio_fields_by_id[field_id]["radio_options"].append({
-                        "value": on_values[0],
-                        "rect": rect,
-                    })
+    wanted_ids = field_info_by_id.keys() | possible_radio_names
+    for page_index, field_id, ann in _locate_widgets(reader, wanted_ids):
+        if field_id in field_info_by_id:
+            field_info_by_id[field_id]["page"] = page_index + 1
+            field_info_by_id[field_id]["rect"] = ann.get('/Rect')
+        elif field_id in possible_radio_names:
+            try:
+                on_value = _single_on_state(ann["/AP"]["/N"])
+            except KeyError:
+                continue
+            if on_value is not None:
+                rect = ann.get("/Rect")
+                if field_id not in radio_fields_by_id:
+                    radio_fields_by_id[field_id] = {
+                        "field_id": field_id,
+                        "type": "radio_group",
+                        "page": page_index + 1,
+                        "radio_options": [],
+                    }
+                radio_fields_by_id[field_id]["radio_options"].append({
+                    "value": on_value,
+                    "rect": rect,
+                })
 
     # Filter out fields without location data (orphaned definitions)
     fields_with_location = []
@@ -165,21 +494,180 @@ def get_field_info(reader: PdfReader):
             print(f"Warning: Unable to determine location for field: {field_info.get('field_id')}, ignoring",
                   file=sys.stderr)
 
-    # Sort by page number, then Y position (flipped), then X
-    def sort_key(f):
-        if "radio_options" in f:
-            rect = f["radio_options"][0]["rect"] or [0, 0, 0, 0]
-        else:
-            rect = f.get("rect") or [0, 0, 0, 0]
-        adjusted_position = [-rect[1], rect[0]]
-        return [f.get("page"), adjusted_position]
-
     sorted_fields = fields_with_location + list(radio_fields_by_id.values())
-    sorted_fields.sort(key=sort_key)
+    sorted_fields.sort(key=_field_sort_key)
+
+    return sorted_fields
+
+
+def _parse_pdf_number(token):
+    """Parse a PDF number token the way pypdf does (int unless it has a dot)."""
+    return float(token) if "." in token else int(token)
+
+
+def _pymupdf_rect(doc, page, widget):
+    """Return the widget's raw /Rect in PDF user space, as pypdf reports it.
+
+    ``widget.rect`` is in MuPDF's top-left coordinate system, so the array is
+    read straight from the annotation dictionary instead.
+    """
+    kind, value = doc.xref_get_key(widget.xref, "Rect")
+    if kind == "array":
+        return [_parse_pdf_number(t) for t in value.strip("[]").split()]
+    rect = widget.rect * ~page.transformation_matrix
+    return [rect.x0, rect.y0, rect.x1, rect.y1]
+
+
+def _pymupdf_states(widget):
+    """Return a button's appearance states as PDF names, like pypdf's /_States_.
+
+    /Off is appended when the widget has no /Off appearance.
+    """
+    states = [f"/{s}" for s in (widget.button_states().get("normal") or [])]
+    if "/Off" not in states:
+        states.append("/Off")
+    return states
+
+
+def get_field_info_pymupdf(doc):
+    """Extract fillable field metadata with PyMuPDF.
+
+    Produces the same list of dicts as get_field_info(), but walks
+    ``page.widgets()`` so that object and xref parsing happens in MuPDF's C
+    code rather than in Python. Fields without a widget on any page are not
+    visible to MuPDF and are skipped silently.
+    """
+    import pymupdf
+
+    checkbox_types = (pymupdf.PDF_WIDGET_TYPE_CHECKBOX, pymupdf.PDF_WIDGET_TYPE_BUTTON)
+    choice_types = (pymupdf.PDF_WIDGET_TYPE_COMBOBOX, pymupdf.PDF_WIDGET_TYPE_LISTBOX)
+
+    field_info_by_id = {}
+    radio_fields_by_id = {}
+
+    for page_index, page in enumerate(doc):
+        for widget in page.widgets():
+            field_id = widget.field_name
+            ft = widget.field_type
+            rect = _pymupdf_rect(doc, page, widget)
+
+            if ft == pymupdf.PDF_WIDGET_TYPE_RADIOBUTTON:
+                on_value = _single_on_state(_pymupdf_states(widget))
+                if on_value is None:
+                    continue
+                if field_id not in radio_fields_by_id:
+                    radio_fields_by_id[field_id] = {
+                        "field_id": field_id,
+                        "type": "radio_group",
+                        "page": page_index + 1,
+                        "radio_options": [],
+                    }
+                radio_fields_by_id[field_id]["radio_options"].append({
+                    "value": on_value,
+                    "rect": rect,
+                })
+                continue
+
+            field_dict = {"field_id": field_id}
+            if ft == pymupdf.PDF_WIDGET_TYPE_TEXT:
+                field_dict["type"] = "text"
+            elif ft in checkbox_types:
+                field_dict["type"] = "checkbox"
+                field_dict.update(_checkbox_values(_pymupdf_states(widget), field_id))
+            elif ft in choice_types:
+                field_dict["type"] = "choice"
+                field_dict["choice_options"] = [
+                    {"value": v[0], "text": v[1]} if isinstance(v, (list, tuple))
+                    else {"value": v, "text": v}
+                    for v in widget.choice_values or []
+                ]
+            else:
+                field_dict["type"] = f"unknown (/{widget.field_type_string})"
+            field_dict["page"] = page_index + 1
+            field_dict["rect"] = rect
+            field_info_by_id[field_id] = field_dict
+
+    sorted_fields = list(field_info_by_id.values()) + list(radio_fields_by_id.values())
+    sorted_fields.sort(key=_field_sort_key)
 
     return sorted_fields
 
 
+def extract(pdf_path):
+    """Parse a PDF once and return (reader, field_info).
+
+    For in-process pipelines: pass the reader on to
+    pdf_fill_form.fill_pdf_fields(..., reader=reader) to fill the same form
+    without parsing it again (get_field_info is cached on the reader). The
+    reader holds an in-memory copy of the file, so it stays usable after this
+    returns.
+    """
+    reader = _cache_object_streams(PdfReader(BytesIO(Path(pdf_path).read_bytes())))
+    return reader, get_field_info(reader)
+
+
+def extract_to_json(pdf_path, output_path, backend="pypdf"):
+    """Run the single-file pipeline: extract fields and write them as JSON.
+
+    Returns the number of fields written.
+    """
+    if backend == "pymupdf":
+        _ensure_package("PyMuPDF", "pymupdf")
+        import pymupdf
+        with pymupdf.open(str(pdf_path)) as doc:
+            field_info = get_field_info_pymupdf(doc)
+    else:
+        with open_pdf_reader(pdf_path) as reader:
+            field_info = get_field_info(reader)
+    write_json(field_info, output_path)
+    return len(field_info)
+
+
+def _init_batch_worker(backend):
+    """ProcessPoolExecutor initializer: check dependencies once per worker."""
+    if backend == "pymupdf":
+        _ensure_package("PyMuPDF", "pymupdf")
+    else:
+        _ensure_package("pypdf")
+
+
+def _process_one(task):
+    """Extract one PDF of a batch. Returns (pdf_path, output_path, count, error)."""
+    pdf_path, output_path, backend = task
+    try:
+        return pdf_path, output_path, extract_to_json(pdf_path, output_path, backend), None
+    except Exception as e:
+        return pdf_path, output_path, 0, str(e)
+
+
+def find_batch_pdfs(batch):
+    """Return the PDFs in a directory, or the paths matching a glob pattern."""
+    batch_path = Path(batch)
+    if batch_path.is_dir():
+        return sorted(batch_path.glob("*.pdf"))
+    return sorted(Path(p) for p in glob.glob(batch))
+
+
+def run_batch(pdf_paths, output_dir, backend="pypdf", jobs=None):
+    """Extract many PDFs in parallel, one process per core.
+
+    Each form is written to <output_dir>/<stem>.json. Returns the number of
+    PDFs that failed.
+    """
+    output_dir.mkdir(parents=True, exist_ok=True)
+    tasks = [(pdf_path, output_dir / f"{pdf_path.stem}.json", backend) for pdf_path in pdf_paths]
+    failures = 0
+    with ProcessPoolExecutor(max_workers=jobs, initializer=_init_batch_worker,
+                             initargs=(backend,)) as executor:
+        for pdf_path, output_path, count, error in executor.map(_process_one, tasks):
+            if error:
+                failures += 1
+                print(f"Error: {pdf_path}: {error}", file=sys.stderr)
+            else:
+                print(f"Wrote {count} fields to {output_path}")
+    return failures
+
+
 def parse_args():
     parser = argparse.ArgumentParser(
         description="Extract fillable form field metadata from a PDF to JSON.",
@@ -188,6 +676,9 @@ def parse_args():
 Examples:
   %(prog)s form.pdf field_info.json
   %(prog)s /path/to/form.pdf /tmp/fields.json
+  %(prog)s --backend pymupdf large_form.pdf /tmp/fields.json
+  %(prog)s --batch-dir forms/ --output-dir fields/ --jobs 8
+  %(prog)s --batch-dir "scans/*_form.pdf" --output-dir fields/
 
 Output JSON format:
   [
@@ -198,13 +689,39 @@ Output JSON format:
   ]
         """
     )
-    parser.add_argument("pdf_file", help="Path to the PDF file")
-    parser.add_argument("output_json", help="Path for the output JSON file")
-    return parser.parse_args()
+    parser.add_argument("pdf_file", nargs="?", help="Path to the PDF file")
+    parser.add_argument("output_json", nargs="?", help="Path for the output JSON file")
+    parser.add_argument("--backend", choices=["pypdf", "pymupdf"], default="pypdf",
+                        help="PDF parser to use (default: pypdf). pymupdf is much "
+                             "faster on large forms and is installed on demand")
+    parser.add_argument("--batch-dir", metavar="DIR_OR_GLOB",
+                        help="Extract every PDF in a directory (or matching a glob) "
+                             "instead of a single file")
+    parser.add_argument("--output-dir", default=".",
+                        help="Where --batch-dir writes <name>.json files (default: .)")
+    parser.add_argument("--jobs", "-j", type=int, default=None,
+                        help="Worker processes for --batch-dir (default: CPU count)")
+    args = parser.parse_args()
+    if args.batch_dir:
+        if args.pdf_file:
+            parser.error("pdf_file and output_json are not used with --batch-dir")
+    elif not args.output_json:
+        parser.error("pdf_file and output_json are required")
+    return args
 
 
 def main():
     args = parse_args()
+
+    if args.batch_dir:
+        pdf_paths = find_batch_pdfs(args.batch_dir)
+        if not pdf_paths:
+            print(f"Error: No PDF files found: {args.batch_dir}", file=sys.stderr)
+            sys.exit(1)
+        if run_batch(pdf_paths, Path(args.output_dir), args.backend, args.jobs):
+            sys.exit(1)
+        return
+
     pdf_path = Path(args.pdf_file)
     output_path = Path(args.output_json)
 
@@ -213,11 +730,8 @@ def main():
         sys.exit(1)
 
     try:
-        reader = PdfReader(str(pdf_path))
-        field_info = get_field_info(reader)
-        with open(output_path, "w") as f:
-            json.dump(field_info, f, indent=2)
-        print(f"Wrote {len(field_info)} fields to {output_path}")
+        count = extract_to_json(pdf_path, output_path, args.backend)
+        print(f"Wrote {count} fields to {output_path}")
     except Exception as e:
         print(f"Error: {e}", file=sys.stderr)
         sys.exit(1)
@@ -11,17 +11,27 @@ Examples:
     python3 pdf_fill_annotations.py form.pdf fields.json filled_form.pdf
 """
 
+import importlib.util
+import os
 import subprocess
 import sys
 
 
 def _ensure_package(pip_name, import_name=None):
-    """Try importing a package; auto-install via pip if missing."""
+    """Check a package is importable; auto-install via pip if missing.
+
+    The check uses find_spec, so nothing is imported here.
+    """
     if import_name is None:
         import_name = pip_name
-    try:
-        __import__(import_name)
-    except ImportError:
+    if import_name in sys.modules:
+        return
+    if importlib.util.find_spec(import_name) is None:
+        if os.environ.get("LATEX_SKILL_AUTOINSTALL") == "0":
+            print(f"Error: Package '{import_name}' not found and auto-install is disabled "
+                  f"(LATEX_SKILL_AUTOINSTALL=0)", file=sys.stderr)
+            print(f"Please install manually: pip install {pip_name}", file=sys.stderr)
+            sys.exit(1)
         print(f":: Package '{import_name}' not found. Installing {pip_name}...", file=sys.stderr)
         try:
             subprocess.check_call(
@@ -41,42 +51,56 @@ def _ensure_package(pip_name, import_name=None):
                 sys.exit(1)
 
 
-_ensure_package("pypdf")
+# Imported as a library, the caller is responsible for its dependencies
+if __name__ == "__main__":
+    _ensure_package("pypdf")
+    _ensure_package("numpy")
 
 import argparse
 import json
+from io import BytesIO
 from pathlib import Path
+import numpy as np
 from pypdf import PdfReader, PdfWriter
 from pypdf.annotations import FreeText
 
+# orjson is optional; it parses and writes field JSON several times faster
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
-def transform_coordinates(bbox, image_width, image_height, pdf_width, pdf_height):
-    """Transform bounding box from image coordinates to PDF coordinates.
+
+def transform_boxes(bboxes, image_width, image_height, pdf_width, pdf_height):
+    """Transform bounding boxes from image coordinates to PDF coordinates.
 
     Image coordinates: origin at top-left, y increases downward.
     PDF coordinates: origin at bottom-left, y increases upward.
 
+    All boxes on a page are converted in one vectorized NumPy expression.
+
     Args:
-        bbox: [left, top, right, bottom] in image coordinates.
+        bboxes: Sequence of [left, top, right, bottom] in image coordinates.
         image_width: Width of the source image in pixels.
         image_height: Height of the source image in pixels.
         pdf_width: Width of the PDF page in points.
         pdf_height: Height of the PDF page in points.
 
     Returns:
-        Tuple of (left, bottom, right, top) in PDF coordinates.
+        List of [left, bottom, right, top] in PDF coordinates.
     """
+    bbox = np.asarray(bboxes, dtype=np.float64).reshape(-1, 4)
     x_scale = pdf_width / image_width
     y_scale = pdf_height / image_height
 
-    left = bbox[0] * x_scale
-    right = bbox[2] * x_scale
+    left = bbox[:, 0] * x_scale
+    right = bbox[:, 2] * x_scale
 
     # Flip Y coordinates for PDF
-    top = pdf_height - (bbox[1] * y_scale)
-    bottom = pdf_height - (bbox[3] * y_scale)
+    top = pdf_height - bbox[:, 1] * y_scale
+    bottom = pdf_height - bbox[:, 3] * y_scale
 
-    return left, bottom, right, top
+    return np.stack([left, bottom, right, top], axis=1).tolist()
 
 
 def fill_pdf_form(input_pdf_path, fields_json_path, output_pdf_path):
@@ -87,10 +111,13 @@ def fill_pdf_form(input_pdf_path, fields_json_path, output_pdf_path):
         fields_json_path: Path to fields.json with bounding box data.
         output_pdf_path: Path for the output filled PDF.
     """
-    with open(fields_json_path, "r") as f:
-        fields_data = json.load(f)
+    if orjson is not None:
+        fields_data = orjson.loads(Path(fields_json_path).read_bytes())
+    else:
+        with open(fields_json_path, "r") as f:
+            fields_data = json.load(f)
 
-    reader = PdfReader(input_pdf_path)
+    reader = PdfReader(BytesIO(Path(input_pdf_path).read_bytes()))
     writer = PdfWriter()
     writer.append(reader)
 
@@ -100,22 +127,27 @@ def fill_pdf_form(input_pdf_path, fields_json_path, output_pdf_path):
         mediabox = page.mediabox
         pdf_dimensions[i + 1] = [float(mediabox.width), float(mediabox.height)]
 
+    # Transform every entry box of a page in one batch (the first "pages"
+    # entry for a page number wins, as with a linear search)
+    pages_by_num = {p["page_number"]: p for p in reversed(fields_data["pages"])}
+    fields_by_page = {}
+    for field in fields_data["form_fields"]:
+        fields_by_page.setdefault(field["page_number"], []).append(field)
+    entry_boxes_by_page = {}
+    for page_num, page_fields in fields_by_page.items():
+        page_info = pages_by_num[page_num]
+        pdf_width, pdf_height = pdf_dimensions[page_num]
+        entry_boxes_by_page[page_num] = iter(transform_boxes(
+            [f["entry_bounding_box"] for f in page_fields],
+            page_info["image_width"], page_info["image_height"],
+            pdf_width, pdf_height,
+        ))
+
     # Process each form field
     annotations = []
     for field in fields_data["form_fields"]:
         page_num = field["page_number"]
-
-        # Get page dimensions and transform coordinates
-        page_info = next(p for p in fields_data["pages"] if p["page_number"] == page_num)
-        image_width = page_info["image_width"]
-        image_height = page_info["image_height"]
-        pdf_width, pdf_height = pdf_dimensions[page_num]
-
-        transformed_entry_box = transform_coordinates(
-            field["entry_bounding_box"],
-            image_width, image_height,
-            pdf_width, pdf_height
-        )
+        transformed_entry_box = next(entry_boxes_by_page[page_num])
 
         # Skip empty fields
         if "entry_text" not in field or "text" not in field["entry_text"]:
@@ -12,17 +12,27 @@ Examples:
     python3 pdf_fill_form.py /path/to/form.pdf /tmp/values.json /tmp/output.pdf
 """
 
+import importlib.util
+import os
 import subprocess
 import sys
 
 
 def _ensure_package(pip_name, import_name=None):
-    """Try importing a package; auto-install via pip if missing."""
+    """Check a package is importable; auto-install via pip if missing.
+
+    The check uses find_spec, so nothing is imported here.
+    """
     if import_name is None:
         import_name = pip_name
-    try:
-        __import__(import_name)
-    except ImportError:
+    if import_name in sys.modules:
+        return
+    if importlib.util.find_spec(import_name) is None:
+        if os.environ.get("LATEX_SKILL_AUTOINSTALL") == "0":
+            print(f"Error: Package '{import_name}' not found and auto-install is disabled "
+                  f"(LATEX_SKILL_AUTOINSTALL=0)", file=sys.stderr)
+            print(f"Please install manually: pip install {pip_name}", file=sys.stderr)
+            sys.exit(1)
         print(f":: Package '{import_name}' not found. Installing {pip_name}...", file=sys.stderr)
         try:
             subprocess.check_call(
@@ -42,13 +52,16 @@ def _ensure_package(pip_name, import_name=None):
                 sys.exit(1)
 
 
-_ensure_package("pypdf")
+# Imported as a library, the caller is responsible for its dependencies
+if __name__ == "__main__":
+    _ensure_package("pypdf")
 
 import argparse
-import json
+from collections import defaultdict
+from contextlib import nullcontext
 from pathlib import Path
-from pypdf import PdfReader, PdfWriter
-from pdf_extract_fields import get_field_info
+from pypdf import PdfWriter
+from pdf_extract_fields import get_field_info, load_json, open_pdf_reader
 
 
 def validation_error_for_field_value(field_info, field_value):
@@ -100,13 +113,16 @@ def monkeypatch_pypdf_method():
     DictionaryObject.get_inherited = patched_get_inherited
 
 
-def fill_pdf_fields(input_pdf_path: str, fields_json_path: str, output_pdf_path: str):
+def fill_pdf_fields(input_pdf_path: str, fields_json_path: str, output_pdf_path: str,
+                    reader=None):
     """Fill fillable form fields in a PDF.
 
     Args:
         input_pdf_path: Path to the input PDF with fillable fields.
         fields_json_path: Path to JSON file with field values.
         output_pdf_path: Path for the output filled PDF.
+        reader: Optional PdfReader already opened on input_pdf_path, e.g. from
+            pdf_extract_fields.extract(), so the form is not parsed again.
 
     The field_values.json format:
     [
@@ -115,56 +131,56 @@ def fill_pdf_fields(input_pdf_path: str, fields_json_path: str, output_pdf_path:
       ...
     ]
     """
-    with open(fields_json_path) as f:
-        fields = json.load(f)
-
-    # Group by page number
-    fields_by_page = {}
-    for field in fields:
-        if "value" in field:
-            field_id = field["field_id"]
-            page = field["page"]
-            if page not in fields_by_page:
-                fields_by_page[page] = {}
-            fields_by_page[page][field_id] = field["value"]
-
-    reader = PdfReader(input_pdf_path)
-
-    # Pre-validate all fields before writing
-    has_error = False
-    field_info = get_field_info(reader)
-    fields_by_ids = {f["field_id"]: f for f in field_info}
-
-    for field in fields:
-        existing_field = fields_by_ids.get(field["field_id"])
-        if not existing_field:
-            has_error = True
-            print(f"ERROR: `{field['field_id']}` is not a valid field ID")
-        elif field["page"] != existing_field["page"]:
-            has_error = True
-            print(f"ERROR: Incorrect page number for `{field['field_id']}` "
-                  f"(got {field['page']}, expected {existing_field['page']})")
-        else:
-            if "value" in field:
-                err = validation_error_for_field_value(existing_field, field["value"])
-                if err:
-                    print(err)
-                    has_error = True
-
-    if has_error:
-        sys.exit(1)
-
-    writer = PdfWriter(clone_from=reader)
-    for page, field_values in fields_by_page.items():
-        writer.update_page_form_field_values(
-            writer.pages[page - 1], field_values, auto_regenerate=False
-        )
+    fields = load_json(fields_json_path)
+
+    values_by_id = {f["field_id"]: f["value"] for f in fields if "value" in f}
+
+    reader_context = nullcontext(reader) if reader is not None else open_pdf_reader(input_pdf_path)
+    with reader_context as reader:
+        # Pre-validate all fields before writing
+        has_error = False
+        field_info = get_field_info(reader)
+        fields_by_ids = {f["field_id"]: f for f in field_info}
+
+        for field in fields:
+            existing_field = fields_by_ids.get(field["field_id"])
+            if not existing_field:
+                has_error = True
+                print(f"ERROR: `{field['field_id']}` is not a valid field ID")
+            elif field["page"] != existing_field["page"]:
+                has_error = True
+                print(f"ERROR: Incorrect page number for `{field['field_id']}` "
+                      f"(got {field['page']}, expected {existing_field['page']})")
+            else:
+                if "value" in field:
+                    err = validation_error_for_field_value(existing_field, field["value"])
+                    if err:
+                        print(err)
+                        has_error = True
+
+        if has_error:
+            sys.exit(1)
+
+        # pypdf compares every annotation on a page against every key of the
+        # values dict, so give each page only the fields that live on it
+        page_to_fieldids = defaultdict(list)
+        for info in field_info:
+            if info["field_id"] in values_by_id:
+                page_to_fieldids[info["page"]].append(info["field_id"])
+
+        writer = PdfWriter(clone_from=reader)
+        for page, field_ids in sorted(page_to_fieldids.items()):
+            writer.update_page_form_field_values(
+                writer.pages[page - 1],
+                {field_id: values_by_id[field_id] for field_id in field_ids},
+                auto_regenerate=None,  # flag is set once below
+            )
 
-    # Necessary for many PDF viewers to format the form values correctly
-    writer.set_need_appearances_writer(True)
+        # Necessary for many PDF viewers to format the form values correctly
+        writer.set_need_appearances_writer(True)
 
-    with open(output_pdf_path, "wb") as f:
-        writer.write(f)
+        with open(output_pdf_path, "wb") as f:
+            writer.write(f)
 
     print(f"Successfully filled PDF form and saved to {output_pdf_path}")
 
@@ -17,11 +17,16 @@ Usage:
   python3 validate_latex.py tmp/batch_*.tex --preamble tmp/preamble.tex
   python3 validate_latex.py tmp/batch_001_007.tex
   python3 validate_latex.py tmp/batch_*.tex --json
+  python3 validate_latex.py tmp/batch_*.tex --jobs 4
 """
 
 import argparse
+import functools
+import io
+import os
 import re
 import sys
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 
 
@@ -47,6 +52,43 @@ TIKZ_COMMANDS_RE = re.compile(
     r"^[^%]*\\(node|draw|fill|path|coordinate|filldraw|shade|clip)\s*[\[({]",
 )
 
+# Tokens scanned on every body line
+COMMENT_RE = re.compile(r"(?<!\\)%.*$")
+BEGIN_ENV_RE = re.compile(r"\\begin\{([^}]+)\}")
+END_ENV_RE = re.compile(r"\\end\{([^}]+)\}")
+NODE_RE = re.compile(r"\\node\b")
+AMPERSAND_RE = re.compile(r"(?<!\\)&")
+
+
+# Preamble definitions
+NEWCOMMAND_RE = re.compile(r"\\(?:re)?newcommand\*?\{(\\[a-zA-Z]+)\}")
+MATHOP_RE = re.compile(r"\\DeclareMathOperator\*?\{(\\[a-zA-Z]+)\}")
+TCBTHEOREM_RE = re.compile(r"\\newtcbtheorem[^{]*\{([^}]+)\}")
+TCOLORBOX_RE = re.compile(r"\\newtcolorbox\{([^}]+)\}")
+USEPACKAGE_RE = re.compile(r"\\usepackage(?:\[[^\]]*\])?\{([^}]+)\}")
+TIKZLIBRARY_RE = re.compile(r"\\usetikzlibrary\{([^}]+)\}")
+
+
+@functools.lru_cache(maxsize=8)
+def _read_preamble_text(path: str, mtime_ns: int, size: int) -> str:
+    """Read a preamble; the stat fields are only part of the cache key."""
+    return Path(path).read_text(encoding="utf-8", errors="replace")
+
+
+def read_preamble(preamble_path: str):
+    """Return the preamble's text, or None if no path was given or it is missing.
+
+    The text is cached per (path, mtime, size), so the extract_* helpers
+    share one read of an unchanged file.
+    """
+    if not preamble_path:
+        return None
+    try:
+        st = os.stat(preamble_path)
+    except OSError:
+        return None
+    return _read_preamble_text(str(preamble_path), st.st_mtime_ns, st.st_size)
+
 
 def extract_preamble_commands(preamble_path: str) -> set:
     """Extract \\newcommand and \\renewcommand names from a preamble file."""
@@ -54,31 +96,24 @@ def extract_preamble_commands(preamble_path: str) -> set:
     if not preamble_path:
         return commands
 
-    path = Path(preamble_path)
-    if not path.exists():
+    text = read_preamble(preamble_path)
+    if text is None:
         print(f"WARNING: Preamble file not found: {preamble_path}", file=sys.stderr)
         return commands
 
-    text = path.read_text(encoding="utf-8", errors="replace")
-
     # Match \newcommand{\foo}, \renewcommand{\foo}, \DeclareMathOperator{\foo}
-    for m in re.finditer(
-        r"\\(?:re)?newcommand\*?\{(\\[a-zA-Z]+)\}", text
-    ):
+    for m in NEWCOMMAND_RE.finditer(text):
         commands.add(m.group(1))
 
-    for m in re.finditer(
-        r"\\DeclareMathOperator\*?\{(\\[a-zA-Z]+)\}", text
-    ):
+    for m in MATHOP_RE.finditer(text):
         commands.add(m.group(1))
 
     # newtcbtheorem defines environment names, not commands
     # newtcolorbox defines environment names
-    # Extract \usepackage names for reference
-    for m in re.finditer(r"\\newtcbtheorem[^{]*\{([^}]+)\}", text):
+    for m in TCBTHEOREM_RE.finditer(text):
         commands.add(f"\\begin{{{m.group(1)}}}")
 
-    for m in re.finditer(r"\\newtcolorbox\{([^}]+)\}", text):
+    for m in TCOLORBOX_RE.finditer(text):
         commands.add(f"\\begin{{{m.group(1)}}}")
 
     return commands
@@ -87,16 +122,11 @@ def extract_preamble_commands(preamble_path: str) -> set:
 def extract_preamble_packages(preamble_path: str) -> set:
     """Extract loaded package names from a preamble file."""
     packages = set()
-    if not preamble_path:
-        return packages
-
-    path = Path(preamble_path)
-    if not path.exists():
+    text = read_preamble(preamble_path)
+    if text is None:
         return packages
 
-    text = path.read_text(encoding="utf-8", errors="replace")
-
-    for m in re.finditer(r"\\usepackage(?:\[[^\]]*\])?\{([^}]+)\}", text):
+    for m in USEPACKAGE_RE.finditer(text):
         # Handle comma-separated packages
         for pkg in m.group(1).split(","):
             packages.add(pkg.strip())
@@ -107,16 +137,11 @@ def extract_preamble_packages(preamble_path: str) -> set:
 def extract_tikz_libraries(preamble_path: str) -> set:
     """Extract loaded TikZ library names from a preamble file."""
     libraries = set()
-    if not preamble_path:
-        return libraries
-
-    path = Path(preamble_path)
-    if not path.exists():
+    text = read_preamble(preamble_path)
+    if text is None:
         return libraries
 
-    text = path.read_text(encoding="utf-8", errors="replace")
-
-    for m in re.finditer(r"\\usetikzlibrary\{([^}]+)\}", text):
+    for m in TIKZLIBRARY_RE.finditer(text):
         for lib in m.group(1).split(","):
             lib = lib.strip().strip("\n")
             if lib:
@@ -128,6 +153,8 @@ def extract_tikz_libraries(preamble_path: str) -> set:
 class ValidationError:
     """A single validation error."""
 
+    __slots__ = ("file", "line", "category", "message")
+
     def __init__(self, file: str, line: int, category: str, message: str):
         self.file = file
         self.line = line
@@ -153,48 +180,88 @@ def is_comment_line(line: str) -> bool:
 
 def validate_file(filepath: str, preamble_commands: set) -> list:
     """Validate a single batch .tex file. Returns list of ValidationError."""
-    errors = []
     path = Path(filepath)
     if not path.exists():
-        errors.append(ValidationError(filepath, 0, "FILE", f"File not found: {filepath}"))
-        return errors
+        return [ValidationError(filepath, 0, "FILE", f"File not found: {filepath}")]
+
+    with path.open(encoding="utf-8", errors="replace") as fh:
+        return _validate_lines(fh, path.name)
+
+
+def validate_string(source: str, preamble_commands: set, name: str = "<string>") -> list:
+    """Validate batch LaTeX held in memory; errors are reported against name."""
+    # newline=None translates line endings the same way reading a file does
+    return _validate_lines(io.StringIO(source, newline=None), name)
+
+
+# Line boundaries str.splitlines() recognises besides \n and \r, which file
+# iteration does not split on
+EXTRA_LINE_BREAKS_RE = re.compile("[\v\f\x1c\x1d\x1e\x85\u2028\u2029]")
+
+
+def _split_lines(lines):
+    """Re-split newline-terminated lines at every boundary str.splitlines() uses.
+
+    Keeps line numbers identical to numbering source.splitlines().
+    """
+    for line in lines:
+        if EXTRA_LINE_BREAKS_RE.search(line):
+            yield from line.splitlines()
+        else:
+            yield line
+
 
-    lines = path.read_text(encoding="utf-8", errors="replace").splitlines()
-    filename = path.name
+def _validate_lines(lines, filename: str) -> list:
+    """Run all checks over an iterable of lines. Returns list of ValidationError."""
+    # All checks run in one pass over the lines; each keeps its own error
+    # list so errors are still reported check by check.
+    env_errors = []
+    float_errors = []
+    tikz_errors = []
+    node_errors = []
+    ampersand_errors = []
 
-    # --- Check 1: Balanced environments ---
     env_stack = []  # [(env_name, line_number), ...]
+    tcolorbox_depth = 0
+    tcolorbox_stack = []
+    in_tikzpicture = 0
+    ampersand_depth = 0
 
-    for i, line in enumerate(lines, start=1):
+    for i, line in enumerate(_split_lines(lines), start=1):
+        # Every token the checks look for starts with a backslash or is an
+        # ampersand, so plain prose lines cannot change any state
+        if "\\" not in line and "&" not in line:
+            continue
         if is_comment_line(line):
             continue
+        line = line.rstrip("\n")
 
         # Remove inline comments (but not escaped %)
-        clean = re.sub(r"(?<!\\)%.*$", "", line)
+        clean = COMMENT_RE.sub("", line) if "%" in line else line
+        begins = BEGIN_ENV_RE.findall(clean) if "\\begin" in clean else ()
+        ends = END_ENV_RE.findall(clean) if "\\end" in clean else ()
 
-        # Find \begin{env} and \end{env}
-        for m in re.finditer(r"\\begin\{([^}]+)\}", clean):
-            env_name = m.group(1)
+        # --- Check 1: Balanced environments ---
+        for env_name in begins:
             # Skip document-level envs (shouldn't appear in batch files)
             if env_name in ("document",):
-                errors.append(ValidationError(
+                env_errors.append(ValidationError(
                     filename, i, "STRUCTURE",
                     f"\\begin{{{env_name}}} should not appear in batch files (body only)"
                 ))
                 continue
             env_stack.append((env_name, i))
 
-        for m in re.finditer(r"\\end\{([^}]+)\}", clean):
-            env_name = m.group(1)
+        for env_name in ends:
             if env_name in ("document",):
-                errors.append(ValidationError(
+                env_errors.append(ValidationError(
                     filename, i, "STRUCTURE",
                     f"\\end{{{env_name}}} should not appear in batch files (body only)"
                 ))
                 continue
 
             if not env_stack:
-                errors.append(ValidationError(
+                env_errors.append(ValidationError(
                     filename, i, "ENV_MISMATCH",
                     f"\\end{{{env_name}}} without matching \\begin{{{env_name}}}"
                 ))
@@ -203,7 +270,7 @@ def validate_file(filepath: str, preamble_commands: set) -> list:
                 if top_env == env_name:
                     env_stack.pop()
                 else:
-                    errors.append(ValidationError(
+                    env_errors.append(ValidationError(
                         filename, i, "ENV_MISMATCH",
                         f"\\end{{{env_name}}} does not match \\begin{{{top_env}}} at line {top_line}"
                     ))
@@ -214,7 +281,7 @@ def validate_file(filepath: str, preamble_commands: set) -> list:
                         if env_stack[j][0] == env_name:
                             # Report unclosed environments between
                             for k in range(len(env_stack) - 1, j, -1):
-                                errors.append(ValidationError(
+                                env_errors.append(ValidationError(
                                     filename, env_stack[k][1], "ENV_UNCLOSED",
                                     f"\\begin{{{env_stack[k][0]}}} opened but never closed "
                                     f"(interrupted by \\end{{{env_name}}} at line {i})"
@@ -226,110 +293,73 @@ def validate_file(filepath: str, preamble_commands: set) -> list:
                         # No match found in stack; leave stack as is
                         pass
 
-    # Report remaining unclosed environments
-    for env_name, line_num in env_stack:
-        errors.append(ValidationError(
-            filename, line_num, "ENV_UNCLOSED",
-            f"\\begin{{{env_name}}} opened but never closed (reached end of file)"
-        ))
-
-    # --- Check 2: Float inside tcolorbox ---
-    tcolorbox_depth = 0
-    tcolorbox_stack = []
-
-    for i, line in enumerate(lines, start=1):
-        if is_comment_line(line):
-            continue
-        clean = re.sub(r"(?<!\\)%.*$", "", line)
-
-        for m in re.finditer(r"\\begin\{([^}]+)\}", clean):
-            env_name = m.group(1)
+        # --- Check 2: Float inside tcolorbox ---
+        for env_name in begins:
             if env_name in TCOLORBOX_ENVS:
                 tcolorbox_depth += 1
                 tcolorbox_stack.append((env_name, i))
 
         # Check for floats while inside tcolorbox
         if tcolorbox_depth > 0:
-            if re.search(r"\\begin\{table\}", clean):
+            if r"\begin{table}" in clean:
                 parent = tcolorbox_stack[-1][0] if tcolorbox_stack else "unknown"
-                errors.append(ValidationError(
+                float_errors.append(ValidationError(
                     filename, i, "FLOAT_IN_TCOLORBOX",
                     f"\\begin{{table}} inside \\begin{{{parent}}} "
                     f"(opened at line {tcolorbox_stack[-1][1]}). "
                     f"Use \\begin{{tabular}} directly instead."
                 ))
-            if re.search(r"\\begin\{figure\}", clean):
+            if r"\begin{figure}" in clean:
                 parent = tcolorbox_stack[-1][0] if tcolorbox_stack else "unknown"
-                errors.append(ValidationError(
+                float_errors.append(ValidationError(
                     filename, i, "FLOAT_IN_TCOLORBOX",
                     f"\\begin{{figure}} inside \\begin{{{parent}}} "
                     f"(opened at line {tcolorbox_stack[-1][1]}). "
                     f"Remove the figure wrapper."
                 ))
 
-        for m in re.finditer(r"\\end\{([^}]+)\}", clean):
-            env_name = m.group(1)
+        for env_name in ends:
             if env_name in TCOLORBOX_ENVS and tcolorbox_depth > 0:
                 tcolorbox_depth -= 1
                 if tcolorbox_stack:
                     tcolorbox_stack.pop()
 
-    # --- Check 3: TikZ commands outside tikzpicture ---
-    in_tikzpicture = 0
-
-    for i, line in enumerate(lines, start=1):
-        if is_comment_line(line):
-            continue
-        clean = re.sub(r"(?<!\\)%.*$", "", line)
-
+        # --- Check 3: TikZ commands outside tikzpicture ---
         if r"\begin{tikzpicture}" in clean:
             in_tikzpicture += 1
         if r"\end{tikzpicture}" in clean:
             in_tikzpicture = max(0, in_tikzpicture - 1)
 
-        if in_tikzpicture == 0 and TIKZ_COMMANDS_RE.search(clean):
-            errors.append(ValidationError(
+        if in_tikzpicture == 0 and "\\" in clean and TIKZ_COMMANDS_RE.search(clean):
+            tikz_errors.append(ValidationError(
                 filename, i, "TIKZ_OUTSIDE",
                 f"TikZ command outside \\begin{{tikzpicture}}: {clean.strip()[:80]}"
             ))
 
-    # --- Check 4: Missing TikZ node labels ---
-    for i, line in enumerate(lines, start=1):
-        if is_comment_line(line):
-            continue
-        clean = re.sub(r"(?<!\\)%.*$", "", line)
-
+        # --- Check 4: Missing TikZ node labels ---
         # Find \node that doesn't end with {something};
         # Pattern: \node followed by options/name/at but no {} before ;
-        node_matches = list(re.finditer(r"\\node\b", clean))
-        for m in node_matches:
-            after = clean[m.end():]
-            # Check if there's a {}, even empty, before the semicolon
-            # Simple heuristic: there should be { ... } somewhere after \node before ;
-            semi_pos = after.find(";")
-            if semi_pos == -1:
-                # No semicolon on this line -- might continue on next line, skip
-                continue
-            segment = after[:semi_pos]
-            if "{" not in segment:
-                errors.append(ValidationError(
-                    filename, i, "TIKZ_NODE_LABEL",
-                    f"\\node without label braces {{}}. Add {{}} even if empty: "
-                    f"{clean.strip()[:80]}"
-                ))
-
-    # --- Check 5: Stray & outside valid environments ---
-    ampersand_depth = 0
-
-    for i, line in enumerate(lines, start=1):
-        if is_comment_line(line):
-            continue
-        clean = re.sub(r"(?<!\\)%.*$", "", line)
+        if "\\node" in clean:
+            for m in NODE_RE.finditer(clean):
+                after = clean[m.end():]
+                # Check if there's a {}, even empty, before the semicolon
+                # Simple heuristic: there should be { ... } somewhere after \node before ;
+                semi_pos = after.find(";")
+                if semi_pos == -1:
+                    # No semicolon on this line -- might continue on next line, skip
+                    continue
+                segment = after[:semi_pos]
+                if "{" not in segment:
+                    node_errors.append(ValidationError(
+                        filename, i, "TIKZ_NODE_LABEL",
+                        f"\\node without label braces {{}}. Add {{}} even if empty: "
+                        f"{clean.strip()[:80]}"
+                    ))
 
+        # --- Check 5: Stray & outside valid environments ---
         # Track whether this line opens an ampersand-valid environment
         line_opens_amp_env = False
-        for m in re.finditer(r"\\begin\{([^}]+)\}", clean):
-            env_name = m.group(1)
+        for env_name in begins:
             if env_name in AMPERSAND_ENVS:
                 ampersand_depth += 1
                 line_opens_amp_env = True
@@ -337,24 +367,73 @@ def validate_file(filepath: str, preamble_commands: set) -> list:
         # Only check for stray & if we're outside ampersand environments
         # AND this line didn't open one (handles single-line envs like
         # \begin{aligned}...&...\end{aligned} all on one line)
-        if ampersand_depth == 0 and not line_opens_amp_env:
-            stray = re.findall(r"(?<!\\)&", clean)
-            if stray:
-                errors.append(ValidationError(
+        if ampersand_depth == 0 and not line_opens_amp_env and "&" in clean:
+            if AMPERSAND_RE.search(clean):
+                ampersand_errors.append(ValidationError(
                     filename, i, "STRAY_AMPERSAND",
                     f"Unescaped '&' outside tabular/align environment. "
                     f"Use '\\&' in text mode: {clean.strip()[:80]}"
                 ))
 
-        for m in re.finditer(r"\\end\{([^}]+)\}", clean):
-            env_name = m.group(1)
+        for env_name in ends:
             if env_name in AMPERSAND_ENVS:
                 ampersand_depth = max(0, ampersand_depth - 1)
 
-    return errors
+    # Report remaining unclosed environments
+    for env_name, line_num in env_stack:
+        env_errors.append(ValidationError(
+            filename, line_num, "ENV_UNCLOSED",
+            f"\\begin{{{env_name}}} opened but never closed (reached end of file)"
+        ))
+
+    return env_errors + float_errors + tikz_errors + node_errors + ampersand_errors
+
+
+# With jobs=None, inputs smaller than this in total are validated in this
+# process: sequential checking runs at roughly 8 MB/s, so below a few MB
+# worker start-up and pickling the errors back cost more than they save
+PARALLEL_SIZE_THRESHOLD = 4 * 1024 * 1024
+
+
+def _total_size(filepaths):
+    """Return the combined size of the files that exist, in bytes."""
+    total = 0
+    for filepath in filepaths:
+        try:
+            total += os.path.getsize(filepath)
+        except OSError:
+            pass  # validate_file reports missing files
+    return total
+
+
+def validate_files(filepaths, preamble_commands: set, jobs=None) -> list:
+    """Validate batch files. Returns all errors, in filepaths order.
+
+    Files are independent, so they can be checked in worker processes.
+    jobs sets the number of workers (jobs=1 runs everything in this
+    process); jobs=None stays in this process unless the files together
+    exceed PARALLEL_SIZE_THRESHOLD, and then uses one worker per CPU.
+    """
+    filepaths = list(filepaths)
+    check = functools.partial(validate_file, preamble_commands=preamble_commands)
+    if jobs is None:
+        jobs = 1
+        if _total_size(filepaths) > PARALLEL_SIZE_THRESHOLD:
+            jobs = os.cpu_count() or 1
+    workers = min(jobs, len(filepaths))
+    if workers <= 1:
+        results = map(check, filepaths)
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(check, filepaths))
+
+    all_errors = []
+    for file_errors in results:
+        all_errors.extend(file_errors)
+    return all_errors
 
 
-def main():
+def main(argv=None):
     parser = argparse.ArgumentParser(
         description="Validate LaTeX batch files before assembly.",
         epilog="Example: python3 validate_latex.py tmp/batch_*.tex --preamble tmp/preamble.tex",
@@ -374,16 +453,20 @@ def main():
         action="store_true",
         help="Output errors as JSON instead of plain text",
     )
-    args = parser.parse_args()
+    parser.add_argument(
+        "--jobs", "-j",
+        type=int,
+        default=None,
+        help="Worker processes for validating files (default: 1, or the CPU "
+             "count when the files total more than 4 MB)",
+    )
+    args = parser.parse_args(argv)
 
     # Load preamble info
     preamble_commands = extract_preamble_commands(args.preamble)
 
     # Validate each file
-    all_errors = []
-    for filepath in sorted(args.files):
-        file_errors = validate_file(filepath, preamble_commands)
-        all_errors.extend(file_errors)
+    all_errors = validate_files(sorted(args.files), preamble_commands, args.jobs)
 
     # Output
     if args.json:
@@ -8,9 +8,12 @@ Tests cover:
 - Font size handling
 - Validation image creation
 - Edge cases (touching boxes, multiple errors, different pages)
+- Form field extraction (pypdf and PyMuPDF backends) and filling
 """
 
 import json
+import os
+import subprocess
 import sys
 import tempfile
 from pathlib import Path
@@ -21,7 +24,12 @@ import pytest
 SCRIPTS_DIR = Path(__file__).parent.parent / "scripts"
 sys.path.insert(0, str(SCRIPTS_DIR))
 
-from pdf_validate_boxes import get_bounding_box_messages, create_validation_image, rects_intersect
+import pdf_extract_fields
+import pdf_fill_form
+from pdf_validate_boxes import (
+    get_bounding_box_messages, create_validation_image, rects_intersect, rects_intersect_batch,
+    KernelPairIndex, PageRectIndex, RectAndField, RectGrid,
+)
 
 
 # ============================================================================
@@ -72,6 +80,107 @@ def test_image(temp_dir):
     return test_image_path
 
 
+def write_form_pdf(path, pages=1):
+    """Write a form with a text field and a checkbox on each page."""
+    from pypdf import PdfWriter
+    from pypdf.generic import (
+        ArrayObject, DictionaryObject, FloatObject, NameObject, NumberObject,
+        StreamObject, TextStringObject,
+    )
+
+    def rect(*values):
+        return ArrayObject(FloatObject(v) if isinstance(v, float) else NumberObject(v)
+                           for v in values)
+
+    def appearance():
+        stream = StreamObject()
+        stream.set_data(b"")
+        stream[NameObject("/Type")] = NameObject("/XObject")
+        stream[NameObject("/Subtype")] = NameObject("/Form")
+        stream[NameObject("/BBox")] = rect(0, 0, 12, 12)
+        return writer._add_object(stream)
+
+    writer = PdfWriter()
+    fields = ArrayObject()
+    for n in range(pages):
+        page = writer.add_blank_page(612, 792)
+        widget = {
+            NameObject("/Type"): NameObject("/Annot"),
+            NameObject("/Subtype"): NameObject("/Widget"),
+            NameObject("/P"): page.indirect_reference,
+        }
+        text = DictionaryObject({
+            **widget,
+            NameObject("/FT"): NameObject("/Tx"),
+            NameObject("/T"): TextStringObject(f"name{n}"),
+            NameObject("/Rect"): rect(72, 700, 272, 720.5),
+        })
+        # /Off listed first, as many form editors write it
+        checkbox = DictionaryObject({
+            **widget,
+            NameObject("/FT"): NameObject("/Btn"),
+            NameObject("/T"): TextStringObject(f"agree{n}"),
+            NameObject("/Rect"): rect(72, 650, 84, 662),
+            NameObject("/V"): NameObject("/Off"),
+            NameObject("/AS"): NameObject("/Off"),
+            NameObject("/AP"): DictionaryObject({NameObject("/N"): DictionaryObject({
+                NameObject("/Off"): appearance(),
+                NameObject("/Yes"): appearance(),
+            })}),
+        })
+        refs = [writer._add_object(text), writer._add_object(checkbox)]
+        page[NameObject("/Annots")] = ArrayObject(refs)
+        fields.extend(refs)
+    writer._root_object[NameObject("/AcroForm")] = DictionaryObject({NameObject("/Fields"): fields})
+    with open(path, "wb") as f:
+        writer.write(f)
+    return path
+
+
+def write_radio_pdf(path):
+    """Write a form with one radio group whose /Kids order differs from /Annots order."""
+    from pypdf import PdfWriter
+    from pypdf.generic import (
+        ArrayObject, DictionaryObject, NameObject, NumberObject, StreamObject,
+        TextStringObject,
+    )
+
+    writer = PdfWriter()
+    page = writer.add_blank_page(612, 792)
+    group = DictionaryObject({
+        NameObject("/FT"): NameObject("/Btn"),
+        NameObject("/Ff"): NumberObject(1 << 15),
+        NameObject("/T"): TextStringObject("size"),
+        NameObject("/V"): NameObject("/Off"),
+    })
+    group_ref = writer._add_object(group)
+    widgets = {}
+    for x, value in ((72, "/Small"), (144, "/Medium"), (216, "/Large")):
+        stream = StreamObject()
+        stream.set_data(b"")
+        widgets[value] = writer._add_object(DictionaryObject({
+            NameObject("/Type"): NameObject("/Annot"),
+            NameObject("/Subtype"): NameObject("/Widget"),
+            NameObject("/P"): page.indirect_reference,
+            NameObject("/Parent"): group_ref,
+            NameObject("/Rect"): ArrayObject(NumberObject(v) for v in (x, 600, x + 12, 612)),
+            NameObject("/AS"): NameObject("/Off"),
+            NameObject("/AP"): DictionaryObject({NameObject("/N"): DictionaryObject({
+                NameObject("/Off"): writer._add_object(stream),
+                NameObject(value): writer._add_object(stream),
+            })}),
+        }))
+    group[NameObject("/Kids")] = ArrayObject(
+        widgets[v] for v in ("/Large", "/Small", "/Medium"))
+    page[NameObject("/Annots")] = ArrayObject(
+        widgets[v] for v in ("/Small", "/Medium", "/Large"))
+    writer._root_object[NameObject("/AcroForm")] = DictionaryObject(
+        {NameObject("/Fields"): ArrayObject([group_ref])})
+    with open(path, "wb") as f:
+        writer.write(f)
+    return path
+
+
 # ============================================================================
 # BOUNDING BOX VALIDATION TESTS
 # ============================================================================
@@ -277,6 +386,30 @@ class TestBoundingBoxValidation:
         assert any("SUCCESS" in msg for msg in messages)
         assert not any("FAILURE" in msg for msg in messages)
 
+    def test_intersections_reported_in_field_order(self):
+        """Test that a box spanning many grid cells reports its overlaps in field order."""
+        fields = [{
+            "description": "Wide",
+            "page_number": 1,
+            "label_bounding_box": [0, 0, 1000, 20],
+            "entry_bounding_box": [0, 500, 1000, 520],
+        }]
+        for i in range(3):
+            x = 900 - 300 * i  # Later fields sit further left
+            fields.append({
+                "description": f"Small{i}",
+                "page_number": 1,
+                "label_bounding_box": [x, 5, x + 10, 15],
+                "entry_bounding_box": [x, 100, x + 10, 115],
+            })
+
+        messages = get_bounding_box_messages({"form_fields": fields})
+
+        failures = [msg for msg in messages if msg.startswith("FAILURE")]
+        assert len(failures) == 3
+        for i, msg in enumerate(failures):
+            assert "`Wide`" in msg and f"`Small{i}`" in msg
+
 
 # ============================================================================
 # VALIDATION IMAGE CREATION TESTS
@@ -380,6 +513,181 @@ class TestHelperFunctions:
         r2 = [60, 30, 100, 70]  # Overlaps vertically but not horizontally
         assert rects_intersect(r1, r2) is False
 
+    def test_rects_intersect_batch_matches_scalar(self):
+        """Test that the vectorized intersection test agrees with rects_intersect."""
+        np = pytest.importorskip("numpy")
+        rects = [[10, 10, 50, 50], [30, 30, 70, 70], [50, 10, 90, 50], [60, 60, 40, 40]]
+        arr = np.asarray(rects, dtype=np.float64)
+        matrix = rects_intersect_batch(arr[:, None], arr[None, :])
+        assert matrix.tolist() == [[rects_intersect(a, b) for b in rects] for a in rects]
+
+    def test_rect_indexes_match_pairwise_scan(self):
+        """Test that the grid, NumPy and numba indexes find the same pairs as a full scan."""
+        pytest.importorskip("numpy")
+        rects = [
+            [10, 10, 50, 50], [30, 30, 70, 70], [50, 10, 90, 50], [0, 0, 500, 20],
+            [200, 5, 210, 15], [60, 60, 40, 40], [5, 5, 6, 6], [100, 0, 100, 100],
+        ]
+        rects_and_fields = [
+            RectAndField(rect, "label", {"page_number": 1 + (k % 3 == 2)})
+            for k, rect in enumerate(rects)
+        ]
+        expected = [
+            [j for j in range(i + 1, len(rects))
+             if rects_and_fields[i].field["page_number"] == rects_and_fields[j].field["page_number"]
+             and rects_intersect(rects[i], rects[j])]
+            for i in range(len(rects))
+        ]
+
+        for index in (RectGrid(rects_and_fields), PageRectIndex(rects_and_fields)):
+            assert [index.later_intersections(i) for i in range(len(rects))] == expected
+
+        pytest.importorskip("numba")
+        index = KernelPairIndex(rects_and_fields, limit=len(rects) ** 2)
+        assert [index.later_intersections(i) for i in range(len(rects))] == expected
+
+
+# ============================================================================
+# FIELD EXTRACTION TESTS
+# ============================================================================
+
+class TestExtractFields:
+    """Tests for pdf_extract_fields.py"""
+
+    def test_extract_text_and_checkbox(self, temp_dir):
+        """Test field types, pages, rects and checkbox values from the pypdf backend."""
+        pdf_path = write_form_pdf(temp_dir / "form.pdf")
+        _reader, fields = pdf_extract_fields.extract(pdf_path)
+        assert fields == [
+            {"field_id": "name0", "type": "text", "page": 1, "rect": [72, 700, 272, 720.5]},
+            {"field_id": "agree0", "type": "checkbox", "checked_value": "/Yes",
+             "unchecked_value": "/Off", "page": 1, "rect": [72, 650, 84, 662]},
+        ]
+
+    def test_radio_options_in_annots_order(self, temp_dir):
+        """Test radio options follow the page's /Annots order, not the group's /Kids."""
+        pdf_path = write_radio_pdf(temp_dir / "radio.pdf")
+        _reader, fields = pdf_extract_fields.extract(pdf_path)
+        assert [f["field_id"] for f in fields] == ["size"]
+        assert [o["value"] for o in fields[0]["radio_options"]] == ["/Small", "/Medium", "/Large"]
+
+        pytest.importorskip("pymupdf")
+        output_paths = {backend: temp_dir / f"{backend}.json" for backend in ("pypdf", "pymupdf")}
+        for backend, output_path in output_paths.items():
+            pdf_extract_fields.extract_to_json(pdf_path, output_path, backend)
+        assert output_paths["pymupdf"].read_bytes() == output_paths["pypdf"].read_bytes()
+
+    def test_pymupdf_backend_matches_pypdf(self, temp_dir):
+        """Test that --backend pymupdf writes the same JSON as the pypdf backend."""
+        pytest.importorskip("pymupdf")
+        pdf_path = write_form_pdf(temp_dir / "form.pdf", pages=2)
+        outputs = {}
+        for backend in ("pypdf", "pymupdf"):
+            output_path = temp_dir / f"{backend}.json"
+            assert pdf_extract_fields.extract_to_json(pdf_path, output_path, backend) == 4
+            outputs[backend] = output_path.read_bytes()
+        assert outputs["pymupdf"] == outputs["pypdf"]
+        assert b'"checked_value": "/Yes"' in outputs["pymupdf"]
+
+    def test_fill_sets_need_appearances(self, temp_dir, monkeypatch):
+        """Test filling sets /NeedAppearances once on the AcroForm and writes the values."""
+        from pypdf import PdfReader
+        from pypdf.generic import BooleanObject
+
+        pdf_path = write_form_pdf(temp_dir / "form.pdf")
+        values_path = temp_dir / "values.json"
+        values_path.write_text(json.dumps([
+            {"field_id": "name0", "page": 1, "value": "Ada"},
+            {"field_id": "agree0", "page": 1, "value": "/Yes"},
+        ]))
+        output_path = temp_dir / "filled.pdf"
+        writers = []
+
+        class RecordingWriter(pdf_fill_form.PdfWriter):
+            def __init__(self, *args, **kwargs):
+                super().__init__(*args, **kwargs)
+                writers.append(self)
+
+        monkeypatch.setattr(pdf_fill_form, "PdfWriter", RecordingWriter)
+        pdf_fill_form.fill_pdf_fields(str(pdf_path), str(values_path), str(output_path))
+
+        [writer] = writers
+        assert writer._root_object["/AcroForm"]["/NeedAppearances"] == BooleanObject(True)
+        filled = PdfReader(output_path)
+        assert filled.trailer["/Root"]["/AcroForm"]["/NeedAppearances"] == BooleanObject(True)
+        fields = filled.get_fields()
+        assert fields["name0"]["/V"] == "Ada"
+        assert fields["agree0"]["/V"] == "/Yes"
+
+    def test_objstm_cache_matches_pypdf(self, temp_dir, monkeypatch):
+        """Test the per-reader ObjStm cache returns the same fields as plain pypdf."""
+        pymupdf = pytest.importorskip("pymupdf")
+        from pypdf import PdfReader
+
+        pdf_path = temp_dir / "objstm.pdf"
+        with pymupdf.open(write_form_pdf(temp_dir / "form.pdf", pages=3)) as doc:
+            doc.save(pdf_path, use_objstms=1, garbage=1)
+
+        plain = PdfReader(pdf_path)
+        assert plain.xref_objStm
+        unpatched = pdf_extract_fields.get_field_info(plain)
+
+        # Exercise the cache even when the installed pypdf is outside its range
+        monkeypatch.setattr(pdf_extract_fields, "_OBJSTM_CACHE_SUPPORTED", True)
+        parsed_streams = []
+        read_object_stream = pdf_extract_fields._read_object_stream
+
+        def recording_read_object_stream(reader, stmnum):
+            objects = read_object_stream(reader, stmnum)
+            parsed_streams.append(len(objects))
+            return objects
+
+        monkeypatch.setattr(pdf_extract_fields, "_read_object_stream", recording_read_object_stream)
+        with pdf_extract_fields.open_pdf_reader(pdf_path) as reader:
+            patched = pdf_extract_fields.get_field_info(reader)
+        assert patched == unpatched
+        assert len(patched) == 6
+        assert parsed_streams and all(parsed_streams)
+        # Only readers opened through this module are wrapped
+        assert "_get_object_from_stream" not in vars(PdfReader(pdf_path))
+
+        monkeypatch.setattr(pdf_extract_fields, "_OBJSTM_CACHE_SUPPORTED", False)
+        with pdf_extract_fields.open_pdf_reader(pdf_path) as reader:
+            assert "_get_object_from_stream" not in vars(reader)
+
+    def test_ensure_package_leaves_environment_alone(self, monkeypatch):
+        """Test that the dependency check exports nothing to child processes."""
+        monkeypatch.delitem(sys.modules, "json")
+        before = dict(os.environ)
+        pdf_extract_fields._ensure_package("json")
+        assert dict(os.environ) == before
+
+    def test_batch_dir(self, temp_dir):
+        """Test --batch-dir writes one JSON per PDF and exits non-zero on a failure."""
+        batch_dir = temp_dir / "forms"
+        batch_dir.mkdir()
+        write_form_pdf(batch_dir / "a.pdf")
+        write_form_pdf(batch_dir / "b.pdf", pages=2)
+        output_dir = temp_dir / "fields"
+        command = [
+            sys.executable, str(SCRIPTS_DIR / "pdf_extract_fields.py"),
+            "--batch-dir", str(batch_dir), "--output-dir", str(output_dir), "--jobs", "2",
+        ]
+        env = {**os.environ, "LATEX_SKILL_AUTOINSTALL": "0"}
+
+        result = subprocess.run(command, capture_output=True, text=True, env=env)
+        assert result.returncode == 0, result.stderr
+        _reader, fields_a = pdf_extract_fields.extract(batch_dir / "a.pdf")
+        assert json.loads((output_dir / "a.json").read_text()) == fields_a
+        fields_b = json.loads((output_dir / "b.json").read_text())
+        assert [f["field_id"] for f in fields_b] == ["name0", "agree0", "name1", "agree1"]
+
+        (batch_dir / "c.pdf").write_bytes(b"not a pdf")
+        result = subprocess.run(command, capture_output=True, text=True, env=env)
+        assert result.returncode == 1
+        assert "c.pdf" in result.stderr
+        assert (output_dir / "b.json").exists()
+
 
 if __name__ == "__main__":
     pytest.main([__file__, "-v"])
@@ -9,6 +9,7 @@ Tests cover:
 - validate_latex.py: All 6 validation checks, environment tracking, error detection
 """
 
+import io
 import json
 import os
 import subprocess
@@ -28,6 +29,10 @@ import generate_chart
 import csv_to_latex
 import validate_latex
 
+# generate_chart has already selected the Agg backend
+import matplotlib.pyplot as plt
+import pandas as pd
+
 
 # ============================================================================
 # FIXTURES
@@ -40,6 +45,24 @@ def temp_dir():
         yield Path(tmpdir)
 
 
+@pytest.fixture(autouse=True)
+def jinja_cache_dir(tmp_path, monkeypatch):
+    """Keep mail_merge's Jinja2 bytecode cache out of the real ~/.cache."""
+    cache_dir = tmp_path / "jinja_cache"
+    monkeypatch.setattr(mail_merge, "JINJA_CACHE_DIR", str(cache_dir))
+    # Spawned render processes re-import mail_merge and read the environment
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path))
+    return cache_dir
+
+
+@pytest.fixture
+def ax():
+    """Create matplotlib axes whose figure is closed even if the test fails."""
+    fig, ax = plt.subplots()
+    yield ax
+    plt.close(fig)
+
+
 @pytest.fixture
 def sample_csv(temp_dir):
     """Create a sample CSV file."""
@@ -128,7 +151,7 @@ class TestMailMerge:
         records = mail_merge.load_csv(sample_csv)
         assert len(records) == 3
         assert records[0]["name"] == "Alice"
-        assert records[0]["age"] == "25" if not mail_merge.HAS_PANDAS else 25
+        assert records[0]["age"] == 25
 
     def test_load_csv_empty(self, temp_dir):
         """Test loading empty CSV (only headers)."""
@@ -249,6 +272,51 @@ class TestMailMerge:
         result = mail_merge.render_jinja(template, record, env)
         assert r"Alice \& Bob" in result
 
+    @pytest.mark.skipif(not mail_merge.HAS_JINJA2, reason="Jinja2 not installed")
+    def test_render_jinja_raw_filter(self):
+        """Test |raw opts out of escaping and |e does not escape twice."""
+        template = "<<formula|raw>> <<formula>> <<formula|e>>"
+        record = {"formula": "$x_1$"}
+        env = mail_merge.setup_jinja_env()
+        result = mail_merge.render_jinja(template, record, env)
+        assert result == r"$x_1$ \$x\_1\$ \$x\_1\$"
+
+    @pytest.mark.skipif(not mail_merge.HAS_JINJA2, reason="Jinja2 not installed")
+    def test_render_jinja_macro_output_not_escaped(self):
+        """Test macro output is printed as LaTeX; only the record value is escaped."""
+        template = r"<% macro bold(x) %>\textbf{<< x >>}<% endmacro %><< bold(name) >>"
+        record = {"name": "A&B"}
+        env = mail_merge.setup_jinja_env()
+        assert mail_merge.render_jinja(template, record, env) == r"\textbf{A\&B}"
+
+    @pytest.mark.skipif(not mail_merge.HAS_JINJA2, reason="Jinja2 not installed")
+    def test_render_jinja_literals_not_escaped(self):
+        """Test string literals and <% set %> values are printed as written."""
+        template = r'<< "50\\%" >> <% set unit = "\\,kg" %><< weight >><< unit >>'
+        record = {"weight": 5}
+        env = mail_merge.setup_jinja_env()
+        assert mail_merge.render_jinja(template, record, env) == r"50\% 5\,kg"
+
+    @pytest.mark.skipif(not mail_merge.HAS_JINJA2, reason="Jinja2 not installed")
+    def test_render_jinja_nested_values_escaped(self):
+        """Test strings inside lists of records are escaped too."""
+        template = "<% for row in rows %><< row.item >>;<% endfor %>"
+        record = {"rows": [{"item": "R&D"}, {"item": "50%"}]}
+        env = mail_merge.setup_jinja_env()
+        assert mail_merge.render_jinja(template, record, env) == r"R\&D;50\%;"
+
+    def test_load_jinja_template_bytecode_cache(self, temp_dir, jinja_cache_dir):
+        """Test file templates render and populate the bytecode cache."""
+        template_path = temp_dir / "letter.tex"
+        template_path.write_text("Dear << name >>\n")
+
+        template = mail_merge.load_jinja_template(template_path)
+        assert template.render(name="Alice") == "Dear Alice\n"
+        # Cache entries are keyed on this script's source and the Jinja2 version
+        version = mail_merge.jinja_cache_version()
+        assert len(version) == 16
+        assert [p.name.split("_")[3] for p in jinja_cache_dir.glob("*.cache")] == [version]
+
     def test_sanitize_filename(self):
         """Test filename sanitization."""
         assert mail_merge.sanitize_filename("Alice Smith") == "Alice_Smith"
@@ -273,26 +341,142 @@ class TestMailMerge:
         name3 = mail_merge.generate_output_name(record3, name_field=None, index=2)
         assert name3 == "document_0003"  # Fallback to index
 
+    def test_template_preamble_is_static(self):
+        """Test detection of preambles that can be precompiled into a format."""
+        static = "\\documentclass{article}\n\\begin{document}\nHi {{name}}\n\\end{document}\n"
+        dynamic = "\\documentclass{article}\n\\title{<<name>>}\n\\begin{document}\n\\end{document}\n"
+        assert mail_merge.template_preamble_is_static(static)
+        assert not mail_merge.template_preamble_is_static(dynamic)
+        assert not mail_merge.template_preamble_is_static("Hi {{name}}")
+
+    @pytest.mark.skipif(not mail_merge.HAS_PYPDF, reason="pypdf not installed")
+    def test_merge_pdfs_pypdf(self, temp_dir):
+        """Test in-process PDF merging keeps every page in order."""
+        from pypdf import PdfReader, PdfWriter
+
+        pdf_paths = []
+        for i in range(3):
+            writer = PdfWriter()
+            writer.add_blank_page(width=100 + i, height=100)
+            pdf_path = temp_dir / f"doc_{i}.pdf"
+            writer.write(pdf_path)
+            pdf_paths.append(str(pdf_path))
+
+        merged = temp_dir / "merged.pdf"
+        assert mail_merge.merge_pdfs(pdf_paths, merged)
+        pages = PdfReader(merged).pages
+        assert [round(float(p.mediabox.width)) for p in pages] == [100, 101, 102]
+
     def test_mail_merge_integration(self, sample_csv, sample_template, temp_dir):
         """Integration test: Generate .tex files from CSV."""
         output_dir = temp_dir / "output"
 
-        # Simulate command line
-        sys.argv = [
-            "mail_merge.py",
+        rc = mail_merge.main([
             str(sample_template),
             str(sample_csv),
             "--output-dir", str(output_dir),
             "--no-compile"
-        ]
-
-        # Run main function (does not raise SystemExit on success)
-        mail_merge.main()
+        ])
+        assert rc == 0
 
         # Check generated files
         tex_files = list(output_dir.glob("*.tex"))
         assert len(tex_files) == 3  # Should generate 3 files
 
+    def test_mail_merge_render_processes(self, sample_csv, sample_template, temp_dir):
+        """Test that rendering in worker processes writes the same files as in-process."""
+        outputs = {}
+        for mode, extra in (("serial", []), ("processes", ["--render-workers", "2", "--render-processes"])):
+            output_dir = temp_dir / mode
+            assert mail_merge.main([
+                str(sample_template),
+                str(sample_csv),
+                "--output-dir", str(output_dir),
+                "--no-compile",
+                *extra,
+            ]) == 0
+            outputs[mode] = {p.name: p.read_text() for p in output_dir.glob("*.tex")}
+
+        assert len(outputs["serial"]) == 3
+        assert outputs["processes"] == outputs["serial"]
+
+
+    def test_condense_blank_lines(self):
+        """Test blank-line runs collapse to one paragraph break outside verbatim."""
+        text = (
+            "First paragraph.\n\nSecond paragraph.\n\n  \n\t\n\nThird.\n"
+            "\\begin{verbatim}\nline 1\n\n\n\nline 2\n\\end{verbatim}\n\n\n\nEnd.\n"
+        )
+        assert mail_merge.condense_blank_lines(text) == (
+            "First paragraph.\n\nSecond paragraph.\n\nThird.\n"
+            "\\begin{verbatim}\nline 1\n\n\n\nline 2\n\\end{verbatim}\n\nEnd.\n"
+        )
+
+    @pytest.mark.skipif(not mail_merge.HAS_JINJA2, reason="Jinja2 not installed")
+    def test_mail_merge_condense_whitespace(self, temp_dir):
+        """Test --condense-whitespace keeps paragraph breaks between rendered blocks."""
+        template_path = temp_dir / "template.tex"
+        template_path.write_text(
+            "Dear <<name>>,\n\n"
+            "<% if vip %>\n\n"
+            "Thank you for your loyalty.\n\n"
+            "<% endif %>\n\n"
+            "Regards\n"
+        )
+        data_path = temp_dir / "data.json"
+        data_path.write_text(json.dumps([{"name": "Ann", "vip": True}]))
+        output_dir = temp_dir / "output"
+
+        rc = mail_merge.main([
+            str(template_path), str(data_path),
+            "--output-dir", str(output_dir),
+            "--no-compile", "--condense-whitespace",
+        ])
+        assert rc == 0
+        [tex_file] = output_dir.glob("*.tex")
+        assert tex_file.read_text() == "Dear Ann,\n\nThank you for your loyalty.\n\nRegards\n"
+
+    def test_compile_all_async_stub_compiler(self, temp_dir):
+        """Test async compilation returns results in record order with a stub compiler."""
+        stub = temp_dir / "fake_latex.sh"
+        stub.write_text(
+            'case "$1" in\n'
+            '  *slow.tex) sleep 0.3 ;;\n'
+            '  *broken.tex) echo "! Undefined control sequence."; exit 1 ;;\n'
+            'esac\n'
+            'touch "${1%.tex}.pdf"\n'
+        )
+        tasks = []
+        for idx, name in enumerate(["slow", "broken"]):
+            tex_path = temp_dir / f"{name}.tex"
+            tex_path.write_text("\\documentclass{article}\n")
+            tasks.append((tex_path, str(stub), None, idx, None))
+
+        # The slow record finishes last but is still reported first
+        results = mail_merge.compile_all_async(tasks, workers=2)
+        assert [r[0] for r in results] == [0, 1]
+        assert results[0] == (0, True, str(temp_dir / "slow.pdf"), None)
+        assert results[1][1:3] == (False, None)
+        assert "Undefined control sequence" in results[1][3]
+        assert not (temp_dir / "slow.compilelog").exists()
+        assert (temp_dir / "broken.compilelog").exists()
+
+    def test_mail_merge_async_compile(self, sample_csv, sample_template, temp_dir):
+        """Test --async-compile compiles every record through the compile script."""
+        stub = temp_dir / "fake_latex.sh"
+        stub.write_text('touch "${1%.tex}.pdf"\n')
+        output_dir = temp_dir / "output"
+
+        rc = mail_merge.main([
+            str(sample_template),
+            str(sample_csv),
+            "--output-dir", str(output_dir),
+            "--compile-script", str(stub),
+            "--workers", "2",
+            "--async-compile",
+        ])
+        assert rc == 0
+        assert len(list(output_dir.glob("*.pdf"))) == 3
 
 # ============================================================================
 # GENERATE_CHART.PY TESTS
@@ -325,6 +509,14 @@ class TestGenerateChart:
         assert labels == ["Series A", "Series B", "Series C"]
         assert generate_chart.parse_legend(None) is None
 
+    def test_parse_json_accepts_nan(self):
+        """Test that chart JSON keeps json-module semantics for NaN gaps and errors."""
+        data = generate_chart.parse_json('{"x": [1, 2, 3], "y": [4, NaN, 6]}')
+        assert data["x"] == [1, 2, 3]
+        assert data["y"][1] != data["y"][1]  # NaN
+        with pytest.raises(json.JSONDecodeError):
+            generate_chart.parse_json("{invalid json}")
+
     def test_get_colorblind_palette(self):
         """Test colorblind-friendly palette generation."""
         colors = generate_chart.get_colorblind_palette(3)
@@ -335,208 +527,152 @@ class TestGenerateChart:
         colors_large = generate_chart.get_colorblind_palette(20)
         assert len(colors_large) == 20
 
-    def test_plot_bar_basic(self, temp_dir):
+    def test_plot_bar_basic(self, ax):
         """Test basic bar chart generation."""
-        import matplotlib.pyplot as plt
-
         data = {"x": ["A", "B", "C"], "y": [10, 20, 15]}
-        fig, ax = plt.subplots()
         generate_chart.plot_bar(data, ax)
 
-        output_path = temp_dir / "bar.png"
-        plt.savefig(output_path)
-        plt.close()
+        buf = io.BytesIO()
+        ax.figure.savefig(buf, format="raw")
 
-        assert output_path.exists()
+        assert buf.tell() > 0
 
-    def test_plot_bar_multi_series(self, temp_dir):
+    def test_plot_bar_multi_series(self, ax):
         """Test multi-series grouped bar chart."""
-        import matplotlib.pyplot as plt
-
         data = {
             "x": ["Q1", "Q2", "Q3"],
             "y": [[10, 15, 12], [20, 25, 22]]  # Two series
         }
-        fig, ax = plt.subplots()
         generate_chart.plot_bar(data, ax, legend_labels=["2023", "2024"])
 
-        output_path = temp_dir / "bar_multi.png"
-        plt.savefig(output_path)
-        plt.close()
+        buf = io.BytesIO()
+        ax.figure.savefig(buf, format="raw")
 
-        assert output_path.exists()
+        assert buf.tell() > 0
 
-    def test_plot_bar_missing_keys(self):
+    def test_plot_bar_missing_keys(self, ax):
         """Test bar chart with missing required keys."""
-        import matplotlib.pyplot as plt
-
         data = {"x": ["A", "B"]}  # Missing 'y'
-        fig, ax = plt.subplots()
 
         with pytest.raises(ValueError, match="Bar chart requires"):
             generate_chart.plot_bar(data, ax)
-        plt.close()
 
-    def test_plot_line_basic(self, temp_dir):
+    def test_plot_line_basic(self, ax):
         """Test basic line chart generation."""
-        import matplotlib.pyplot as plt
-
         data = {"x": [1, 2, 3, 4], "y": [10, 15, 13, 17]}
-        fig, ax = plt.subplots()
         generate_chart.plot_line(data, ax, show_grid=True)
 
-        output_path = temp_dir / "line.png"
-        plt.savefig(output_path)
-        plt.close()
+        buf = io.BytesIO()
+        ax.figure.savefig(buf, format="raw")
 
-        assert output_path.exists()
+        assert buf.tell() > 0
 
-    def test_plot_scatter_basic(self, temp_dir):
+    def test_plot_scatter_basic(self, ax):
         """Test scatter plot generation."""
-        import matplotlib.pyplot as plt
-
         data = {"x": [1, 2, 3, 4, 5], "y": [2, 4, 1, 3, 5]}
-        fig, ax = plt.subplots()
         generate_chart.plot_scatter(data, ax)
 
-        output_path = temp_dir / "scatter.png"
-        plt.savefig(output_path)
-        plt.close()
+        buf = io.BytesIO()
+        ax.figure.savefig(buf, format="raw")
 
-        assert output_path.exists()
+        assert buf.tell() > 0
 
-    def test_plot_scatter_with_sizes(self, temp_dir):
+    def test_plot_scatter_with_sizes(self, ax):
         """Test scatter plot with custom point sizes."""
-        import matplotlib.pyplot as plt
-
         data = {
             "x": [1, 2, 3],
             "y": [2, 4, 3],
             "sizes": [50, 100, 150]
         }
-        fig, ax = plt.subplots()
         generate_chart.plot_scatter(data, ax)
 
-        output_path = temp_dir / "scatter_sizes.png"
-        plt.savefig(output_path)
-        plt.close()
+        buf = io.BytesIO()
+        ax.figure.savefig(buf, format="raw")
 
-        assert output_path.exists()
+        assert buf.tell() > 0
 
-    def test_plot_pie_basic(self, temp_dir):
+    def test_plot_pie_basic(self, ax):
         """Test pie chart generation."""
-        import matplotlib.pyplot as plt
-
         data = {
             "labels": ["A", "B", "C"],
             "values": [30, 40, 30]
         }
-        fig, ax = plt.subplots()
         generate_chart.plot_pie(data, ax)
 
-        output_path = temp_dir / "pie.png"
-        plt.savefig(output_path)
-        plt.close()
+        buf = io.BytesIO()
+        ax.figure.savefig(buf, format="raw")
 
-        assert output_path.exists()
+        assert buf.tell() > 0
 
-    def test_plot_pie_empty_data(self):
+    def test_plot_pie_empty_data(self, ax):
         """Test pie chart with empty data."""
-        import matplotlib.pyplot as plt
-
         data = {"labels": [], "values": []}
-        fig, ax = plt.subplots()
 
         # Should not raise, matplotlib handles empty data
-        try:
-            generate_chart.plot_pie(data, ax)
-        finally:
-            plt.close()
+        generate_chart.plot_pie(data, ax)
 
-    def test_plot_pie_single_value(self, temp_dir):
+    def test_plot_pie_single_value(self, ax):
         """Test pie chart with single data point."""
-        import matplotlib.pyplot as plt
-
         data = {"labels": ["A"], "values": [100]}
-        fig, ax = plt.subplots()
         generate_chart.plot_pie(data, ax)
 
-        output_path = temp_dir / "pie_single.png"
-        plt.savefig(output_path)
-        plt.close()
+        buf = io.BytesIO()
+        ax.figure.savefig(buf, format="raw")
 
-        assert output_path.exists()
+        assert buf.tell() > 0
 
-    def test_plot_heatmap(self, temp_dir):
+    def test_plot_heatmap(self, ax):
         """Test heatmap generation."""
-        import matplotlib.pyplot as plt
-
         data = {
             "matrix": [[1, 2, 3], [4, 5, 6], [7, 8, 9]],
             "xlabels": ["X1", "X2", "X3"],
             "ylabels": ["Y1", "Y2", "Y3"]
         }
-        fig, ax = plt.subplots()
         generate_chart.plot_heatmap(data, ax)
 
-        output_path = temp_dir / "heatmap.png"
-        plt.savefig(output_path)
-        plt.close()
+        buf = io.BytesIO()
+        ax.figure.savefig(buf, format="raw")
 
-        assert output_path.exists()
+        assert buf.tell() > 0
 
-    def test_plot_box(self, temp_dir):
+    def test_plot_box(self, ax):
         """Test box plot generation."""
-        import matplotlib.pyplot as plt
-
         data = {
             "data": [[1, 2, 3, 4, 5], [2, 3, 4, 5, 6], [3, 4, 5, 6, 7]],
             "labels": ["A", "B", "C"]
         }
-        fig, ax = plt.subplots()
         generate_chart.plot_box(data, ax, show_grid=True)
 
-        output_path = temp_dir / "box.png"
-        plt.savefig(output_path)
-        plt.close()
+        buf = io.BytesIO()
+        ax.figure.savefig(buf, format="raw")
 
-        assert output_path.exists()
+        assert buf.tell() > 0
 
-    def test_plot_histogram(self, temp_dir):
+    def test_plot_histogram(self, ax):
         """Test histogram generation."""
-        import matplotlib.pyplot as plt
-
         data = {
             "values": [1, 2, 2, 3, 3, 3, 4, 4, 5],
             "bins": 5
         }
-        fig, ax = plt.subplots()
         generate_chart.plot_histogram(data, ax)
 
-        output_path = temp_dir / "histogram.png"
-        plt.savefig(output_path)
-        plt.close()
+        buf = io.BytesIO()
+        ax.figure.savefig(buf, format="raw")
 
-        assert output_path.exists()
+        assert buf.tell() > 0
 
-    def test_plot_area(self, temp_dir):
+    def test_plot_area(self, ax):
         """Test area chart generation."""
-        import matplotlib.pyplot as plt
-
         data = {"x": [1, 2, 3, 4], "y": [10, 15, 13, 17]}
-        fig, ax = plt.subplots()
         generate_chart.plot_area(data, ax)
 
-        output_path = temp_dir / "area.png"
-        plt.savefig(output_path)
-        plt.close()
+        buf = io.BytesIO()
+        ax.figure.savefig(buf, format="raw")
 
-        assert output_path.exists()
+        assert buf.tell() > 0
 
-    def test_plot_radar(self, temp_dir):
+    def test_plot_radar(self):
         """Test radar chart generation."""
-        import matplotlib.pyplot as plt
-
         data = {
             "labels": ["A", "B", "C", "D", "E"],
             "values": [4, 3, 5, 2, 4]
@@ -544,51 +680,116 @@ class TestGenerateChart:
         fig = plt.figure()
         ax = generate_chart.plot_radar(data, None)
 
-        output_path = temp_dir / "radar.png"
-        plt.savefig(output_path)
+        buf = io.BytesIO()
+        ax.figure.savefig(buf, format="raw")
         plt.close()
 
-        assert output_path.exists()
+        assert buf.tell() > 0
+
+    def test_read_csv_columns_matches_pandas(self, temp_dir):
+        """Test read_csv_columns reads headers, numbers, NA tokens and bools like pandas."""
+        csv_path = temp_dir / "chart.csv"
+        csv_path.write_text("x,y,y,y.1\nA,1,2.5,1_000\nB,3,,4\n")
+
+        columns = generate_chart.read_csv_columns(csv_path)
+        df = pd.read_csv(csv_path, dtype={"y.1": str})
+        assert list(columns) == list(df.columns) == ["x", "y", "y.2", "y.1"]
+        assert columns["y"] == [1, 3]
+        assert columns["y.2"][0] == 2.5
+        assert pd.isna(columns["y.2"][1])
+        assert columns["y.1"] == ["1_000", 4]
+
+        # pandas' default NA tokens are gaps, and True/False cells are bools
+        na_tokens = ["NA", "N/A", "n/a", "null", "NULL", "None", "#N/A", "<NA>", "nan", "-NaN", ""]
+        csv_path.write_text(
+            "y,flag\n10,True\n" + "".join(f"{token},false\n" for token in na_tokens) + "30,TRUE\n"
+        )
+        columns = generate_chart.read_csv_columns(csv_path)
+        df = pd.read_csv(csv_path)
+        assert columns["flag"] == df["flag"].tolist() == [True] + [False] * len(na_tokens) + [True]
+        assert df["y"].isna().sum() == len(na_tokens)
+        assert pd.Series(columns["y"]).isna().tolist() == df["y"].isna().tolist()
+        assert pd.Series(columns["y"]).dtype.kind == "f"
 
     def test_chart_cli_integration_bar(self, temp_dir):
         """Integration test: Generate bar chart via CLI."""
         output_path = temp_dir / "cli_bar.png"
         data_json = '{"x":["A","B","C"],"y":[10,20,15]}'
 
-        result = subprocess.run(
-            [
-                sys.executable,
-                str(SCRIPTS_DIR / "generate_chart.py"),
-                "bar",
-                "--data", data_json,
-                "--output", str(output_path),
-                "--title", "Test Chart"
-            ],
-            capture_output=True,
-            text=True
-        )
+        rc = generate_chart.main([
+            "bar",
+            "--data", data_json,
+            "--output", str(output_path),
+            "--title", "Test Chart",
+            "--png-compress", "1",
+        ])
 
-        assert result.returncode == 0
+        assert rc == 0
         assert output_path.exists()
 
-    def test_chart_cli_invalid_json(self, temp_dir):
+    def test_chart_cli_invalid_json(self, temp_dir, capsys):
         """Test CLI with invalid JSON data."""
         output_path = temp_dir / "invalid.png"
 
+        with pytest.raises(SystemExit) as exc_info:
+            generate_chart.main([
+                "bar",
+                "--data", "{invalid json}",
+                "--output", str(output_path)
+            ])
+
+        assert exc_info.value.code != 0
+        assert "Invalid JSON" in capsys.readouterr().err
+
+    def test_chart_cli_batch(self, temp_dir):
+        """Test rendering several charts from stdin in one process."""
+        jobs = [
+            {"data": {"x": ["A", "B"], "y": [1, 2]}, "output": str(temp_dir / "b1.png")},
+            {"chart_type": "pie", "data": {"labels": ["A", "B"], "values": [1, 2]},
+             "output": str(temp_dir / "p1.png"), "title": "Pie"},
+        ]
+
         result = subprocess.run(
             [
                 sys.executable,
                 str(SCRIPTS_DIR / "generate_chart.py"),
                 "bar",
-                "--data", "{invalid json}",
-                "--output", str(output_path)
+                "--batch",
+                "--png-compress", "1",
             ],
+            input="\n".join(json.dumps(job) for job in jobs),
             capture_output=True,
             text=True
         )
 
-        assert result.returncode != 0
-        assert "Invalid JSON" in result.stderr
+        assert result.returncode == 0
+        assert (temp_dir / "b1.png").exists()
+        assert (temp_dir / "p1.png").exists()
+
+    def test_chart_batch_style_does_not_leak(self, temp_dir, monkeypatch):
+        """Test that a style set by one batch job is undone for the next job."""
+        from matplotlib.figure import Figure
+
+        jobs = [
+            {"data": {"x": ["A"], "y": [1]}, "output": str(temp_dir / "dark.png"),
+             "style": "dark_background"},
+            {"data": {"x": ["A"], "y": [1]}, "output": str(temp_dir / "plain.png")},
+        ]
+        edgecolors = []
+        savefig = Figure.savefig
+
+        def recording_savefig(fig, *args, **kwargs):
+            # dark_background sets patch.edgecolor; the default style does not
+            edgecolors.append(plt.rcParams["patch.edgecolor"])
+            return savefig(fig, *args, **kwargs)
+
+        monkeypatch.setattr(Figure, "savefig", recording_savefig)
+        monkeypatch.setattr(sys, "stdin", io.StringIO("\n".join(json.dumps(job) for job in jobs)))
+        before = dict(plt.rcParams)
+
+        assert generate_chart.main(["bar", "--batch"]) == 0
+        assert edgecolors == ["white", before["patch.edgecolor"]]
+        assert dict(plt.rcParams) == before
 
 
 # ============================================================================
@@ -611,17 +812,23 @@ class TestCsvToLatex:
         assert "\\textbackslash" in result
         assert "path" in result
 
+    @pytest.mark.parametrize("raw,escaped", [
+        ("&", r"\&"), ("%", r"\%"), ("$", r"\$"), ("#", r"\#"), ("_", r"\_"),
+        ("{", r"\{"), ("}", r"\}"), ("~", r"\textasciitilde{}"),
+        ("^", r"\textasciicircum{}"), ("\\", r"\textbackslash{}"),
+    ])
+    def test_escape_latex_each_special_char(self, raw, escaped):
+        """Test the escape of each LaTeX special character on its own."""
+        assert csv_to_latex.escape_latex(f"a{raw}b") == f"a{escaped}b"
+
     def test_escape_latex_empty_cells(self):
         """Test escaping of empty/NaN cells."""
-        import pandas as pd
         assert csv_to_latex.escape_latex(None) == ""
         assert csv_to_latex.escape_latex(pd.NA) == ""
         assert csv_to_latex.escape_latex("") == ""
 
     def test_detect_alignment_numeric(self, temp_dir):
         """Test alignment detection for numeric columns."""
-        import pandas as pd
-
         df = pd.DataFrame({
             "Name": ["Alice", "Bob"],
             "Age": [25, 30],
@@ -633,8 +840,6 @@ class TestCsvToLatex:
 
     def test_detect_alignment_mixed(self, temp_dir):
         """Test alignment detection with mixed columns."""
-        import pandas as pd
-
         df = pd.DataFrame({
             "ID": ["A1", "B2"],
             "Count": [10, 20],
@@ -646,8 +851,6 @@ class TestCsvToLatex:
 
     def test_generate_booktabs_table(self, temp_dir):
         """Test booktabs style table generation."""
-        import pandas as pd
-
         df = pd.DataFrame({
             "Name": ["Alice", "Bob"],
             "Age": [25, 30]
@@ -668,8 +871,6 @@ class TestCsvToLatex:
 
     def test_generate_booktabs_alternating_rows(self):
         """Test booktabs with alternating row colors."""
-        import pandas as pd
-
         df = pd.DataFrame({
             "Col1": ["A", "B", "C"],
             "Col2": [1, 2, 3]
@@ -684,8 +885,6 @@ class TestCsvToLatex:
 
     def test_generate_grid_table(self):
         """Test grid style table generation."""
-        import pandas as pd
-
         df = pd.DataFrame({
             "A": [1, 2],
             "B": [3, 4]
@@ -701,8 +900,6 @@ class TestCsvToLatex:
 
     def test_generate_simple_table(self):
         """Test simple style table generation."""
-        import pandas as pd
-
         df = pd.DataFrame({
             "X": ["a", "b"],
             "Y": [1, 2]
@@ -719,8 +916,6 @@ class TestCsvToLatex:
 
     def test_generate_plain_table(self):
         """Test plain style table (no lines)."""
-        import pandas as pd
-
         df = pd.DataFrame({
             "A": [1],
             "B": [2]
@@ -735,10 +930,23 @@ class TestCsvToLatex:
         assert r"\hline" not in result  # No lines
         assert r"\toprule" not in result
 
+    def test_format_body_parallel_matches_serial(self, monkeypatch):
+        """Test chunked parallel formatting keeps row order and row colours."""
+        df = pd.DataFrame({
+            "Name": [f"item_{i}" for i in range(7)],
+            "Value": range(7)
+        })
+        serial = csv_to_latex.format_body(df, True, csv_to_latex.HLINE)
+
+        monkeypatch.setattr(csv_to_latex, "PARALLEL_ROW_THRESHOLD", 2)
+        monkeypatch.setattr(csv_to_latex.os, "cpu_count", lambda: 3)
+        parallel = csv_to_latex.format_body(df, True, csv_to_latex.HLINE)
+
+        assert parallel == serial
+        assert serial.count(r"\rowcolor{gray!10}") == 3
+
     def test_escape_latex_special_chars_in_table(self):
         """Test that special characters are escaped in table cells."""
-        import pandas as pd
-
         df = pd.DataFrame({
             "Symbol": ["&", "%", "$", "#", "_"],
             "Escaped": ["amp", "pct", "dlr", "hash", "under"]
@@ -779,39 +987,102 @@ class TestCsvToLatex:
         assert r"\begin{table}" in content
         assert "Test Table" in content
 
-    def test_csv_to_latex_empty_csv(self, temp_dir):
+    def test_csv_to_latex_output_replaced_only_on_success(self, sample_csv, temp_dir,
+                                                          capsys, monkeypatch):
+        """Test a failure while streaming the table leaves --output untouched."""
+        output_path = temp_dir / "table.tex"
+        output_path.write_text("previous table\n")
+        write_table = csv_to_latex.write_table
+
+        def failing_write_table(buf, *args):
+            buf.write("\\begin{table}\n")
+            raise ValueError("bad cell")
+
+        monkeypatch.setattr(csv_to_latex, "write_table", failing_write_table)
+        with pytest.raises(SystemExit) as exc_info:
+            csv_to_latex.main([str(sample_csv), "--output", str(output_path)])
+        assert exc_info.value.code == 1
+        assert "Failed to generate LaTeX table: bad cell" in capsys.readouterr().err
+        assert output_path.read_text() == "previous table\n"
+        assert sorted(p.name for p in temp_dir.iterdir()) == ["data.csv", "table.tex"]
+
+        monkeypatch.setattr(csv_to_latex, "write_table", write_table)
+        assert csv_to_latex.main([str(sample_csv), "--output", str(output_path)]) == 0
+        assert r"\begin{tabular}" in output_path.read_text()
+        assert sorted(p.name for p in temp_dir.iterdir()) == ["data.csv", "table.tex"]
+        umask = os.umask(0)
+        os.umask(umask)
+        assert output_path.stat().st_mode & 0o777 == 0o666 & ~umask
+
+    def test_csv_to_latex_ragged_rows(self, temp_dir, capsys):
+        """Test that rows with missing trailing cells are accepted."""
+        csv_path = temp_dir / "ragged.csv"
+        csv_path.write_text("a,b\n1,2\n3\n")
+
+        assert csv_to_latex.main([str(csv_path)]) == 0
+        out = capsys.readouterr().out
+        assert r"1 & 2.0 \\" in out
+        assert r"3 &  \\" in out
+
+    def test_csv_to_latex_max_rows_keeps_formatting(self, temp_dir, capsys):
+        """Test that --max-rows does not change how the kept values are formatted."""
+        csv_path = temp_dir / "blank.csv"
+        csv_path.write_text("id,count\na,1\nb,\nc,3\n")
+
+        csv_to_latex.main([str(csv_path)])
+        full = capsys.readouterr().out
+        csv_to_latex.main([str(csv_path), "--max-rows", "2"])
+        truncated = capsys.readouterr().out
+        assert r"a & 1.0 \\" in full
+        assert r"a & 1.0 \\" in truncated
+
+    def test_csv_to_latex_max_rows_truncates(self, temp_dir, capsys, monkeypatch):
+        """Test --max-rows keeps the first rows, adds a "..." row, and reads one extra row."""
+        csv_path = temp_dir / "long.csv"
+        csv_path.write_text("name,value\n" + "".join(f"r{i},{i}\n" for i in range(10)))
+        read_sizes = []
+        read_csv_file = csv_to_latex.read_csv_file
+
+        def recording_read_csv_file(csv_file, nrows=None):
+            read_sizes.append(nrows)
+            return read_csv_file(csv_file, nrows=nrows)
+
+        monkeypatch.setattr(csv_to_latex, "read_csv_file", recording_read_csv_file)
+
+        assert csv_to_latex.main([str(csv_path), "--max-rows", "3"]) == 0
+        out = capsys.readouterr().out
+        assert read_sizes == [4]
+        assert r"r2 & 2 \\" in out
+        assert "r3" not in out
+        assert r"... & ... \\" in out
+
+        # Exactly max_rows rows: nothing is cut, so no marker row
+        assert csv_to_latex.main([str(csv_path), "--max-rows", "10"]) == 0
+        out = capsys.readouterr().out
+        assert r"r9 & 9 \\" in out
+        assert "..." not in out
+
+    def test_csv_to_latex_empty_csv(self, temp_dir, capsys):
         """Test handling of empty CSV files."""
         csv_path = temp_dir / "empty.csv"
         csv_path.write_text("col1,col2\n")  # Only headers
 
-        result = subprocess.run(
-            [
-                sys.executable,
-                str(SCRIPTS_DIR / "csv_to_latex.py"),
-                str(csv_path)
-            ],
-            capture_output=True,
-            text=True
-        )
+        with pytest.raises(SystemExit) as exc_info:
+            csv_to_latex.main([str(csv_path)])
 
-        assert result.returncode != 0
-        assert "empty" in result.stderr.lower()
+        assert exc_info.value.code != 0
+        assert "empty" in capsys.readouterr().err.lower()
 
-    def test_csv_to_latex_alignment_mismatch(self, sample_csv, temp_dir):
+    def test_csv_to_latex_alignment_mismatch(self, sample_csv, temp_dir, capsys):
         """Test error when alignment string length doesn't match columns."""
-        result = subprocess.run(
-            [
-                sys.executable,
-                str(SCRIPTS_DIR / "csv_to_latex.py"),
+        with pytest.raises(SystemExit) as exc_info:
+            csv_to_latex.main([
                 str(sample_csv),
                 "--align", "lr"  # CSV has 3 columns, but only 2 alignment chars
-            ],
-            capture_output=True,
-            text=True
-        )
+            ])
 
-        assert result.returncode != 0
-        assert "Alignment" in result.stderr
+        assert exc_info.value.code != 0
+        assert "Alignment" in capsys.readouterr().err
 
 
 # ============================================================================
@@ -857,49 +1128,56 @@ class TestValidateLatex:
         assert "tikz" in packages
         assert "pgfplots" in packages
 
-    def test_validate_balanced_environments(self, temp_dir):
+    def test_preamble_reread_after_edit(self, temp_dir):
+        """Test that the cached preamble text is refreshed when the file changes."""
+        preamble = temp_dir / "preamble.tex"
+        preamble.write_text(r"\usetikzlibrary{arrows}" + "\n")
+        assert validate_latex.extract_tikz_libraries(str(preamble)) == {"arrows"}
+
+        preamble.write_text(r"\usetikzlibrary{arrows, calc, positioning}" + "\n")
+        assert validate_latex.extract_tikz_libraries(str(preamble)) == {
+            "arrows", "calc", "positioning",
+        }
+
+    def test_validate_balanced_environments(self):
         """Test detection of balanced environments."""
-        tex_file = temp_dir / "test.tex"
-        tex_file.write_text(
+        source = (
             r"\begin{theorem}" + "\n" +
             r"Content here." + "\n" +
             r"\end{theorem}" + "\n"
         )
 
-        errors = validate_latex.validate_file(str(tex_file), set())
+        errors = validate_latex.validate_string(source, set(), "test.tex")
         # Filter out non-environment errors
         env_errors = [e for e in errors if e.category in ("ENV_MISMATCH", "ENV_UNCLOSED")]
         assert len(env_errors) == 0
 
-    def test_validate_unbalanced_environments(self, temp_dir):
+    def test_validate_unbalanced_environments(self):
         """Test detection of unbalanced environments."""
-        tex_file = temp_dir / "unbalanced.tex"
-        tex_file.write_text(
+        source = (
             r"\begin{theorem}" + "\n" +
             r"Missing end tag" + "\n"
         )
 
-        errors = validate_latex.validate_file(str(tex_file), set())
+        errors = validate_latex.validate_string(source, set(), "unbalanced.tex")
         env_errors = [e for e in errors if "ENV_UNCLOSED" in e.category]
         assert len(env_errors) > 0
         assert "theorem" in env_errors[0].message
 
-    def test_validate_mismatched_environments(self, temp_dir):
+    def test_validate_mismatched_environments(self):
         """Test detection of mismatched begin/end tags."""
-        tex_file = temp_dir / "mismatched.tex"
-        tex_file.write_text(
+        source = (
             r"\begin{theorem}" + "\n" +
             r"\end{lemma}" + "\n"
         )
 
-        errors = validate_latex.validate_file(str(tex_file), set())
+        errors = validate_latex.validate_string(source, set(), "mismatched.tex")
         env_errors = [e for e in errors if "ENV_MISMATCH" in e.category]
         assert len(env_errors) > 0
 
-    def test_validate_nested_environments(self, temp_dir):
+    def test_validate_nested_environments(self):
         """Test validation of properly nested environments."""
-        tex_file = temp_dir / "nested.tex"
-        tex_file.write_text(
+        source = (
             r"\begin{theorem}" + "\n" +
             r"\begin{proof}" + "\n" +
             r"Nested content" + "\n" +
@@ -907,29 +1185,27 @@ class TestValidateLatex:
             r"\end{theorem}" + "\n"
         )
 
-        errors = validate_latex.validate_file(str(tex_file), set())
+        errors = validate_latex.validate_string(source, set(), "nested.tex")
         env_errors = [e for e in errors if e.category in ("ENV_MISMATCH", "ENV_UNCLOSED")]
         assert len(env_errors) == 0
 
-    def test_validate_float_in_tcolorbox(self, temp_dir):
+    def test_validate_float_in_tcolorbox(self):
         """Test detection of floats inside tcolorbox environments."""
-        tex_file = temp_dir / "float_in_box.tex"
-        tex_file.write_text(
+        source = (
             r"\begin{theorem}" + "\n" +
             r"\begin{table}" + "\n" +
             r"\end{table}" + "\n" +
             r"\end{theorem}" + "\n"
         )
 
-        errors = validate_latex.validate_file(str(tex_file), set())
+        errors = validate_latex.validate_string(source, set(), "float_in_box.tex")
         float_errors = [e for e in errors if "FLOAT_IN_TCOLORBOX" in e.category]
         assert len(float_errors) > 0
         assert "table" in float_errors[0].message.lower()
 
-    def test_validate_figure_in_tcolorbox(self, temp_dir):
+    def test_validate_figure_in_tcolorbox(self):
         """Test detection of figure floats in tcolorbox."""
-        tex_file = temp_dir / "figure_in_box.tex"
-        tex_file.write_text(
+        source = (
             r"\begin{definition}" + "\n" +
             r"\begin{figure}" + "\n" +
             r"\includegraphics{image.png}" + "\n" +
@@ -937,135 +1213,200 @@ class TestValidateLatex:
             r"\end{definition}" + "\n"
         )
 
-        errors = validate_latex.validate_file(str(tex_file), set())
+        errors = validate_latex.validate_string(source, set(), "figure_in_box.tex")
         float_errors = [e for e in errors if "FLOAT_IN_TCOLORBOX" in e.category]
         assert len(float_errors) > 0
 
-    def test_validate_tikz_outside_environment(self, temp_dir):
+    def test_validate_tikz_outside_environment(self):
         """Test detection of TikZ commands outside tikzpicture."""
-        tex_file = temp_dir / "tikz_outside.tex"
-        tex_file.write_text(
+        source = (
             r"\node[circle] at (0,0) {A};" + "\n"  # Outside tikzpicture
         )
 
-        errors = validate_latex.validate_file(str(tex_file), set())
+        errors = validate_latex.validate_string(source, set(), "tikz_outside.tex")
         tikz_errors = [e for e in errors if "TIKZ_OUTSIDE" in e.category]
         assert len(tikz_errors) > 0
 
-    def test_validate_tikz_inside_environment(self, temp_dir):
+    def test_validate_tikz_inside_environment(self):
         """Test TikZ commands inside tikzpicture are valid."""
-        tex_file = temp_dir / "tikz_inside.tex"
-        tex_file.write_text(
+        source = (
             r"\begin{tikzpicture}" + "\n" +
             r"\node[circle] at (0,0) {A};" + "\n" +
             r"\draw (0,0) -- (1,1);" + "\n" +
             r"\end{tikzpicture}" + "\n"
         )
 
-        errors = validate_latex.validate_file(str(tex_file), set())
+        errors = validate_latex.validate_string(source, set(), "tikz_inside.tex")
         tikz_errors = [e for e in errors if "TIKZ_OUTSIDE" in e.category]
         assert len(tikz_errors) == 0
 
-    def test_validate_tikz_node_without_label(self, temp_dir):
+    def test_validate_tikz_node_without_label(self):
         """Test detection of \\node without label braces."""
-        tex_file = temp_dir / "node_no_label.tex"
-        tex_file.write_text(
+        source = (
             r"\begin{tikzpicture}" + "\n" +
             r"\node[circle] at (0,0);" + "\n" +  # Missing {}
             r"\end{tikzpicture}" + "\n"
         )
 
-        errors = validate_latex.validate_file(str(tex_file), set())
+        errors = validate_latex.validate_string(source, set(), "node_no_label.tex")
         node_errors = [e for e in errors if "TIKZ_NODE_LABEL" in e.category]
         assert len(node_errors) > 0
 
-    def test_validate_tikz_node_with_label(self, temp_dir):
+    def test_validate_tikz_node_with_label(self):
         """Test that \\node with label braces is valid."""
-        tex_file = temp_dir / "node_with_label.tex"
-        tex_file.write_text(
+        source = (
             r"\begin{tikzpicture}" + "\n" +
             r"\node[circle] at (0,0) {};" + "\n" +  # Empty label OK
             r"\node at (1,1) {A};" + "\n" +  # Label OK
             r"\end{tikzpicture}" + "\n"
         )
 
-        errors = validate_latex.validate_file(str(tex_file), set())
+        errors = validate_latex.validate_string(source, set(), "node_with_label.tex")
         node_errors = [e for e in errors if "TIKZ_NODE_LABEL" in e.category]
         assert len(node_errors) == 0
 
-    def test_validate_stray_ampersand(self, temp_dir):
+    def test_validate_stray_ampersand(self):
         """Test detection of unescaped & outside tables."""
-        tex_file = temp_dir / "stray_amp.tex"
-        tex_file.write_text(
+        source = (
             r"This is text & more text." + "\n"  # Unescaped &
         )
 
-        errors = validate_latex.validate_file(str(tex_file), set())
+        errors = validate_latex.validate_string(source, set(), "stray_amp.tex")
         amp_errors = [e for e in errors if "STRAY_AMPERSAND" in e.category]
         assert len(amp_errors) > 0
 
-    def test_validate_ampersand_in_tabular(self, temp_dir):
+    def test_validate_ampersand_in_tabular(self):
         """Test that & is valid inside tabular environments."""
-        tex_file = temp_dir / "amp_in_table.tex"
-        tex_file.write_text(
+        source = (
             r"\begin{tabular}{ll}" + "\n" +
             r"Col1 & Col2 \\" + "\n" +
             r"A & B \\" + "\n" +
             r"\end{tabular}" + "\n"
         )
 
-        errors = validate_latex.validate_file(str(tex_file), set())
+        errors = validate_latex.validate_string(source, set(), "amp_in_table.tex")
         amp_errors = [e for e in errors if "STRAY_AMPERSAND" in e.category]
         assert len(amp_errors) == 0
 
-    def test_validate_ampersand_in_align(self, temp_dir):
+    def test_validate_ampersand_in_align(self):
         """Test that & is valid inside align environments."""
-        tex_file = temp_dir / "amp_in_align.tex"
-        tex_file.write_text(
+        source = (
             r"\begin{align}" + "\n" +
             r"x &= 1 \\" + "\n" +
             r"y &= 2" + "\n" +
             r"\end{align}" + "\n"
         )
 
-        errors = validate_latex.validate_file(str(tex_file), set())
+        errors = validate_latex.validate_string(source, set(), "amp_in_align.tex")
         amp_errors = [e for e in errors if "STRAY_AMPERSAND" in e.category]
         assert len(amp_errors) == 0
 
-    def test_validate_comments_ignored(self, temp_dir):
+    def test_validate_comments_ignored(self):
         """Test that commented-out code is ignored."""
-        tex_file = temp_dir / "comments.tex"
-        tex_file.write_text(
+        source = (
             r"% \begin{theorem}" + "\n" +
             r"% \node[circle] at (0,0);" + "\n" +
             r"% Stray & ampersand" + "\n" +
             r"Valid content" + "\n"
         )
 
-        errors = validate_latex.validate_file(str(tex_file), set())
+        errors = validate_latex.validate_string(source, set(), "comments.tex")
         # Should have no errors because everything is commented
         assert len(errors) == 0
 
-    def test_validate_inline_comments(self, temp_dir):
+    def test_validate_inline_comments(self):
         """Test that inline comments are stripped before validation."""
-        tex_file = temp_dir / "inline_comments.tex"
-        tex_file.write_text(
+        source = (
             r"\begin{theorem} % Starting a theorem" + "\n" +
             r"Content % with & ampersand in comment" + "\n" +
             r"\end{theorem}" + "\n"
         )
 
-        errors = validate_latex.validate_file(str(tex_file), set())
+        errors = validate_latex.validate_string(source, set(), "inline_comments.tex")
         # Should not detect stray ampersand because it's in a comment
         amp_errors = [e for e in errors if "STRAY_AMPERSAND" in e.category]
         assert len(amp_errors) == 0
 
+    def test_validate_string_matches_file(self, temp_dir):
+        """Test that in-memory validation reports the same errors as a file."""
+        source = (
+            r"\begin{theorem}" + "\r\n" +
+            r"\begin{table}" + "\r\n" +
+            r"A & B" + "\r\n" +
+            r"\end{lemma}" + "\r\n"
+        )
+        tex_file = temp_dir / "crlf.tex"
+        tex_file.write_bytes(source.encode("utf-8"))
+
+        from_file = validate_latex.validate_file(str(tex_file), set())
+        from_string = validate_latex.validate_string(source, set(), "crlf.tex")
+        assert from_file
+        assert [e.to_dict() for e in from_string] == [e.to_dict() for e in from_file]
+
+    def test_validate_line_numbers_match_splitlines(self, temp_dir):
+        """Test that form feeds and Unicode line separators count as line breaks."""
+        source = (
+            "\\begin{itemize}\fTom & Jerry\u2028\\end{center}\x85"
+            "text\v\\end{itemize}\n\\node at (0,0);\n"
+        )
+        tex_file = temp_dir / "separators.tex"
+        tex_file.write_text(source, encoding="utf-8")
+
+        expected = [(3, "ENV_MISMATCH"), (6, "TIKZ_NODE_LABEL"), (2, "STRAY_AMPERSAND")]
+        from_file = validate_latex.validate_file(str(tex_file), set())
+        from_string = validate_latex.validate_string(source, set(), "separators.tex")
+        assert [(e.line, e.category) for e in from_file] == expected
+        assert [(e.line, e.category) for e in from_string] == expected
+
     def test_validate_file_not_found(self):
         """Test handling of missing files."""
         errors = validate_latex.validate_file("nonexistent.tex", set())
         assert len(errors) == 1
         assert "FILE" in errors[0].category
 
+    def test_validate_files_parallel_matches_sequential(self, temp_dir):
+        """Test that validating files in worker processes keeps errors in file order."""
+        paths = []
+        for n, body in enumerate([
+            r"\begin{itemize}" + "\n",
+            "Clean text\n",
+            r"Tom & Jerry" + "\n" + r"\end{center}" + "\n",
+        ]):
+            tex_file = temp_dir / f"batch_{n}.tex"
+            tex_file.write_text(body)
+            paths.append(str(tex_file))
+
+        sequential = validate_latex.validate_files(paths, set(), jobs=1)
+        parallel = validate_latex.validate_files(paths, set(), jobs=2)
+        assert [e.to_dict() for e in parallel] == [e.to_dict() for e in sequential]
+        assert [e.file for e in parallel] == ["batch_0.tex", "batch_2.tex", "batch_2.tex"]
+
+    def test_validate_files_default_jobs_by_size(self, temp_dir, monkeypatch):
+        """Test that jobs=None only starts worker processes for large inputs."""
+        paths = []
+        for n in range(3):
+            tex_file = temp_dir / f"small_{n}.tex"
+            tex_file.write_text("Tom & Jerry\n")
+            paths.append(str(tex_file))
+        pools = []
+
+        class RecordingExecutor(validate_latex.ProcessPoolExecutor):
+            def __init__(self, max_workers=None):
+                pools.append(max_workers)
+                super().__init__(max_workers=max_workers)
+
+        monkeypatch.setattr(validate_latex, "ProcessPoolExecutor", RecordingExecutor)
+        monkeypatch.setattr(validate_latex.os, "cpu_count", lambda: 2)
+
+        small = validate_latex.validate_files(paths, set())
+        assert pools == []
+
+        monkeypatch.setattr(validate_latex, "PARALLEL_SIZE_THRESHOLD", 10)
+        large = validate_latex.validate_files(paths, set())
+        assert pools == [2]
+        assert len(small) == 3
+        assert [e.to_dict() for e in large] == [e.to_dict() for e in small]
+
     def test_validate_cli_integration(self, temp_dir):
         """Integration test: Run validator via CLI."""
         tex_file = temp_dir / "test.tex"
@@ -1088,7 +1429,7 @@ class TestValidateLatex:
         assert result.returncode == 0  # No errors
         assert "0 errors" in result.stdout
 
-    def test_validate_cli_with_errors(self, temp_dir):
+    def test_validate_cli_with_errors(self, temp_dir, capsys):
         """Test CLI with file containing errors."""
         tex_file = temp_dir / "errors.tex"
         tex_file.write_text(
@@ -1096,37 +1437,20 @@ class TestValidateLatex:
             r"Unclosed environment" + "\n"
         )
 
-        result = subprocess.run(
-            [
-                sys.executable,
-                str(SCRIPTS_DIR / "validate_latex.py"),
-                str(tex_file)
-            ],
-            capture_output=True,
-            text=True
-        )
+        rc = validate_latex.main([str(tex_file)])
 
-        assert result.returncode == 1  # Has errors
-        assert "error" in result.stdout.lower()
+        assert rc == 1  # Has errors
+        assert "error" in capsys.readouterr().out.lower()
 
-    def test_validate_cli_json_output(self, temp_dir):
+    def test_validate_cli_json_output(self, temp_dir, capsys):
         """Test CLI with JSON output format."""
         tex_file = temp_dir / "test.tex"
         tex_file.write_text(r"\begin{theorem}" + "\n")
 
-        result = subprocess.run(
-            [
-                sys.executable,
-                str(SCRIPTS_DIR / "validate_latex.py"),
-                str(tex_file),
-                "--json"
-            ],
-            capture_output=True,
-            text=True
-        )
+        validate_latex.main([str(tex_file), "--json"])
 
         # Should output valid JSON
-        output = json.loads(result.stdout)
+        output = json.loads(capsys.readouterr().out)
         assert "total_errors" in output
         assert "files_checked" in output
         assert "errors" in output
@@ -1146,37 +1470,28 @@ class TestEdgeCases:
         template_path = temp_dir / "template.tex"
         template_path.write_text("Hello {{name}}")
 
-        sys.argv = [
-            "mail_merge.py",
-            str(template_path),
-            str(csv_path),
-            "--output-dir", str(temp_dir / "out"),
-            "--no-compile"
-        ]
-
         with pytest.raises(SystemExit) as exc_info:
-            mail_merge.main()
+            mail_merge.main([
+                str(template_path),
+                str(csv_path),
+                "--output-dir", str(temp_dir / "out"),
+                "--no-compile"
+            ])
         assert exc_info.value.code == 1
 
-    def test_chart_negative_pie_values(self, temp_dir):
+    def test_chart_negative_pie_values(self, ax):
         """Test pie chart rejects negative values (matplotlib raises ValueError)."""
-        import matplotlib.pyplot as plt
-
         data = {
             "labels": ["A", "B", "C"],
             "values": [30, -10, 20]  # Negative value
         }
-        fig, ax = plt.subplots()
 
         # Matplotlib raises ValueError for negative pie values
         with pytest.raises(ValueError, match="non negative"):
             generate_chart.plot_pie(data, ax)
-        plt.close()
 
     def test_csv_latex_special_chars_comprehensive(self):
         """Test all LaTeX special characters are properly escaped."""
-        import pandas as pd
-
         special_chars = "&%$#_{}~^\\"
         df = pd.DataFrame({"Chars": [special_chars]})
 
@@ -1185,19 +1500,13 @@ class TestEdgeCases:
             highlight_header=True, alternating_rows=False
         )
 
-        # Check that raw special chars don't appear (except in commands)
-        lines = result.split("\n")
-        data_lines = [l for l in lines if not l.strip().startswith("%") and "Chars" not in l]
-        content = "\n".join(data_lines)
-
         # All special chars should be escaped
-        assert r"\&" in result
-        assert r"\%" in result
-        assert r"\$" in result
-        assert r"\#" in result
-        assert r"\_" in result
+        expected = (r"\&", r"\%", r"\$", r"\#", r"\_", r"\{", r"\}",
+                    r"\textasciitilde{}", r"\textasciicircum{}", r"\textbackslash{}")
+        missing = [e for e in expected if e not in result]
+        assert not missing, missing
 
-    def test_validate_multiple_files(self, temp_dir):
+    def test_validate_multiple_files(self, temp_dir, capsys):
         """Test validator with multiple files."""
         file1 = temp_dir / "file1.tex"
         file2 = temp_dir / "file2.tex"
@@ -1205,19 +1514,10 @@ class TestEdgeCases:
         file1.write_text(r"\begin{theorem}" + "\n" + r"\end{theorem}")
         file2.write_text(r"\begin{lemma}" + "\n")  # Unclosed
 
-        result = subprocess.run(
-            [
-                sys.executable,
-                str(SCRIPTS_DIR / "validate_latex.py"),
-                str(file1),
-                str(file2)
-            ],
-            capture_output=True,
-            text=True
-        )
+        rc = validate_latex.main([str(file1), str(file2)])
 
-        assert result.returncode == 1
-        assert "file2.tex" in result.stdout
+        assert rc == 1
+        assert "file2.tex" in capsys.readouterr().out
 
 
 if __name__ == "__main__":